@@ -6,11 +6,25 @@ from src.version import VERSION
 
 # Modules
 from src.car import Car
-from src.track import Track, STAGE_CONFIG, HORIZON_Y
+from src.track import Track, STAGE_CONFIG, HORIZON_Y, MOUNTAIN_FOREST_IMAGE
 from src.ui import UI, HUD_FONT_SIZE
 from src.effects import Effects
 from src.background import BackgroundManager
-from src.sound import SoundManager
+from src.sound import SoundManager, preload_engine_sounds
+from src.assets import assets, stage_image_keys
+from src.texture_cache import is_cached
+from src.stage_data import StageConfigWatcher
+from src.timestep import FixedTimestep, lerp, smoothing_factor, SIM_HZ
+from src.controls import read_controls, quantize
+from src.sim import RaceSim
+from src.replay import InputReplay, ReplayPlayer
+from src.opponents import OPPONENTS_AVAILABLE
+from src.opponent_sprites import OpponentSprites
+from src.ghost import Ghost, GhostRecorder
+from src.autopilot import Autopilot
+from src.rewind import RewindBuffer, REWIND_SPEED
+from src.splits import BestSplits, SplitRecorder
+from src.skidmarks import SkidMarks, SKIDMARKS_AVAILABLE
 
 # --- Constants ---
 SCREEN_WIDTH = 800
@@ -26,15 +40,15 @@ STATE_GAME_CLEAR = 4
 STATE_REPLAY = 5 # NEW: Replay Mode
 STATE_SETTINGS = 6 # Volume settings overlay (can be entered from any other state)
 
-# Volume Settings Constants
-# トンネルの壁を擦ったときに火花を出し始める速度（内部単位）。コーナリングの火花は
-# 最高速域(150.0 ≈ 310km/h)専用だが、壁擦りはそれより下から出す。
-# 注意: 壁(TUNNEL_WALL_LIMIT=1200)はオフロード境界(約1025)より外にあるため、壁に触れている
-# 間は必ずオフロード扱いで速度がOFFROAD_MAX_SPEED(32.4 ≈ 67km/h)に張り付く。中速域(100km/h
-# ≈ 48.5)を閾値にすると高速で突っ込んだ直後の減速中しか火花が出ないので、擦っている間ずっと
-# 出るよう路肩の砂埃と同じ10.0に合わせている。ここを32.4より上げると火花はほぼ出なくなる。
-WALL_SPARK_MIN_SPEED = 10.0
+# `python main.py --opponents` で AI の対戦車（src/opponents.py）を OPPONENT_COUNT 台走らせる。
+# 既定のタイムアタックには出さない（接触でタイムが変わる。NumPy が無い環境では指定しても 0 台）
+OPPONENTS_FLAG = "--opponents"
+OPPONENT_COUNT = 20
+
+# `python main.py --autopilot` で自動運転（src/autopilot.py）に走らせる（デモ・計測用）
+AUTOPILOT_FLAG = "--autopilot"
 
+# Volume Settings Constants
 SETTINGS_FILE = "settings.json"
 BGM_BASE_VOLUME = 0.5  # BGM volume at master_volume = 1.0
 DEFAULT_MASTER_VOLUME = 0.7  # Used when no settings.json exists yet
@@ -106,6 +120,14 @@ def save_settings(master_volume):
         print(f"Error writing settings: {e}")
 
 
+def follow_camera(track, z, camera_y, slope, smoothing):
+    """カメラ高さと勾配のローパスフィルタを1刻み進める（投影ジャンプ防止・背景と道路の同期）。
+    プレイ中もリプレイの再計算中も同じ式を通す。"""
+    camera_y += (track.get_height_at(z) - camera_y) * smoothing
+    slope += (track.get_slope_at(z) - slope) * smoothing
+    return camera_y, slope
+
+
 def main():
     # --- Initialization ---
     reset_logs() # [FIX 2026-07-17] Start each run with clean log files
@@ -119,17 +141,40 @@ def main():
     # --- Volume Settings ---
     master_volume = load_settings()
 
+    # --- Asset Loading ---
+    # 画像・音声のデコードをワーカースレッドへまとめて投げ、終わるまでローディング画面を回す。
+    # 各インスタンスは assets から変換済みのものを受け取るだけになる（src/assets.py）。
+    # 縮小・拡縮済みのものがディスクにキャッシュされていれば元画像のデコードは省く（src/texture_cache.py）
+    assets.preload([k for k in ("car", "afterfire") if not is_cached(k)]
+                   + ["spark", "sand", "dust", MOUNTAIN_FOREST_IMAGE])
+    assets.preload([k for k in stage_image_keys(STAGE_CONFIG[1]) if not is_cached(k)],
+                   alpha=False)
+    assets.preload_bytes(["bgm"])
+    preload_engine_sounds()
+    ui = UI(SCREEN_WIDTH, SCREEN_HEIGHT, font)
+    while assets.is_loading():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                assets.shutdown()
+                pygame.quit()
+                sys.exit()
+        done, total = assets.progress()
+        ui.draw_loading(screen, done / total if total else 1.0)
+        pygame.display.flip()
+        clock.tick(FPS)
+
     # --- BGM Setup ---
     # 読み込みに失敗しても無音で続行する。以降の再生は bgm_loaded で守ること。
     # music.play() は未ロードだと pygame.error を投げる（fadeout/set_volume は投げない）。
     bgm_loaded = False
     try:
-        bgm_file = "asset/turbo_apex.mp3"
-        pygame.mixer.music.load(bgm_file)
+        # music はストリーム再生なので、読み込んだバイト列は再生中ずっと参照を持っておく
+        bgm_data = assets.data("bgm")
+        pygame.mixer.music.load(bgm_data, "mp3")
         pygame.mixer.music.set_volume(BGM_BASE_VOLUME * master_volume)
         pygame.mixer.music.play(-1)
         bgm_loaded = True
-        print(f"Playing BGM: {bgm_file}")
+        print("Playing BGM: asset/turbo_apex.mp3")
     except Exception as e:
         print(f"BGM Error: {e}")
 
@@ -138,7 +183,6 @@ def main():
     car = Car(SCREEN_WIDTH, SCREEN_HEIGHT, player_y)
     
     track = Track()
-    ui = UI(SCREEN_WIDTH, SCREEN_HEIGHT, font)
     effects = Effects(SCREEN_WIDTH, SCREEN_HEIGHT)
     bg_manager = BackgroundManager(SCREEN_WIDTH, SCREEN_HEIGHT)
     sound_manager = SoundManager()
@@ -150,6 +194,20 @@ def main():
     state_timer = 0.0
     
     start_time = pygame.time.get_ticks()
+    # シミュレーションは固定刻み（src/timestep.py）。ラップタイムは刻みの積算で数えるので、
+    # 描画のフレームレートや処理落ちに左右されない
+    sim_clock = FixedTimestep()
+    # プレイ中の1刻み（物理・タイム・ゴール判定）は src/sim.py の RaceSim が進める
+    opponents = OPPONENT_COUNT if OPPONENTS_FLAG in sys.argv and OPPONENTS_AVAILABLE else 0
+    sim = RaceSim(car, track, opponents=opponents)
+    autopilot = Autopilot() if AUTOPILOT_FLAG in sys.argv else None
+    # 対戦車・ゴーストのスプライトはプレイヤーと同じ縮小済みの car.png から段階ごとに作っておく
+    opponent_sprites = OpponentSprites(car.original_img)
+    # 路面のタイヤ痕（src/skidmarks.py。NumPy が無い環境では出ない）
+    skidmarks = SkidMarks(car.rect) if SKIDMARKS_AVAILABLE else None
+    camera_smoothing = smoothing_factor(0.1, sim_clock.dt)
+    # 直前の刻みの (x, z, カメラ高さ, 勾配)。描画はこれと最新の刻みを補間する
+    prev_view = (0.0, 0.0, 0.0, 0.0)
     final_time = 0.0 # Time when goal reached
     goal_speed = 0.0 # Speed when crossing goal line
     smoothed_camera_y = 0.0  # カメラ高さのローパスフィルタ用変数
@@ -162,9 +220,22 @@ def main():
     total_time_result = 0.0
     
     # Replay Variables
-    replay_data = []
-    replay_index = 0
-    replay_active = False
+    # 記録は1刻みあたりの入力語だけ。再生は RaceSim で計算し直す（src/replay.py）
+    replay = InputReplay(SIM_HZ)
+    replay_player = None
+
+    # 自己ベストのゴースト（src/ghost.py）。プレイ中の走りを記録し、ゴールで最速なら保存する
+    ghost_recorder = GhostRecorder(SIM_HZ)
+    ghost = None
+
+    # 自己ベストとの差（src/splits.py）。ベストの距離ごとの通過時刻を、HUD が毎フレーム今の z で引く
+    split_recorder = SplitRecorder()
+    best_splits = None
+    split_delta = None
+
+    # 巻き戻し（src/rewind.py）。プレイ中に R / Y ボタンを押している間、直近10秒まで戻る
+    rewind = RewindBuffer(SIM_HZ)
+    rewinding = False
 
     # [FIX 2026-07-17] Previous-frame state of the menu/replay inputs. The B button
     # both exits the replay and is "Exit" on the GAME_CLEAR screen, so a held B ran
@@ -178,8 +249,19 @@ def main():
     vol_repeat_timer = 0.0  # counts down while left/right is held, for auto-repeat
 
     # Initial Route Setup
-    track.create_road(stage_id)
+    sim.start_stage(stage_id)
+    replay.start_stage(stage_id)
+    ghost_recorder.start_stage(stage_id)
+    rewind.start_stage(sim, smoothed_camera_y, smoothed_slope)
+    ghost = Ghost.open(stage_id)
+    split_recorder.start_stage(stage_id)
+    best_splits = BestSplits.load(stage_id)
+    if skidmarks is not None:
+        skidmarks.clear(stage_id)
     bg_manager.set_stage(stage_id)
+
+    # ステージ定義(src/stages.cfg)の保存を監視し、変わったキーに依存するキャッシュだけ作り直す
+    stage_watcher = StageConfigWatcher(STAGE_CONFIG)
     
     # --- Controller Setup ---
     pygame.joystick.init()
@@ -201,6 +283,7 @@ def main():
         while running:
             dt = clock.tick(FPS)
             dt_sec = dt / 1000.0
+            sim_ticks = sim_clock.advance(dt_sec)
             
             # --- Event Handling ---
             for event in pygame.event.get():
@@ -210,8 +293,16 @@ def main():
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_0:
                         sound_manager.toggle_mute()
+                    if event.key == pygame.K_9:
+                        print(f"Ground engine: {bg_manager.toggle_ground_engine()}")
 
 
+            # Stage config hot reload (only the caches that depend on the edited keys are rebuilt)
+            for changed_stage, changed_keys in stage_watcher.poll(dt_sec).items():
+                rebuilt = (track.apply_config_change(changed_stage, changed_keys)
+                           + bg_manager.apply_config_change(changed_stage, changed_keys))
+                print(f"Stage {changed_stage} config changed: {sorted(changed_keys)} -> rebuilt {rebuilt}")
+
             keys = pygame.key.get_pressed()
 
             # Raw (held) state of the menu/replay inputs, then the rising edges.
@@ -256,212 +347,98 @@ def main():
                     pygame.mixer.music.fadeout(1000)
                     sound_manager.silence() # Engine sound off
                 else:
-                    track.create_road(stage_id)
+                    sim.start_stage(stage_id)
+                    replay.start_stage(stage_id)
+                    ghost_recorder.start_stage(stage_id)
+                    if ghost is not None:
+                        ghost.close()
+                    ghost = Ghost.open(stage_id)
+                    split_recorder.start_stage(stage_id)
+                    best_splits = BestSplits.load(stage_id)
+                    split_delta = None
+                    if skidmarks is not None:
+                        skidmarks.clear(stage_id)
                     bg_manager.set_stage(stage_id)
-                        
-                    car.z = 0.0
-                    car.x = 0.0
-                    car.speed = 0.0
+
                     smoothed_camera_y = 0.0  # カメラ高さもリセット
                     smoothed_slope = 0.0  # 勾配もリセット
+                    rewind.start_stage(sim, smoothed_camera_y, smoothed_slope)
+                    prev_view = (car.x, car.z, smoothed_camera_y, smoothed_slope)
                     start_time = pygame.time.get_ticks()
                     current_state = STATE_PLAYING
             
             if current_state == STATE_PLAYING:
-                # Update Car Logic
-                car.update(keys, track, dt_sec, joystick, stage_id=stage_id)
-                
-                # Record Replay Data
-                replay_data.append({
-                    'x': car.x, 'z': car.z, 
-                    'speed': car.speed, 'steering_input': car.steering_input,
-                    # 'angle': car.angle, # REMOVED: Calculated in render loop, not stored in Car
-                    'stage_id': stage_id,
-                    'offroad_l': car.offroad_l, 'offroad_r': car.offroad_r,
-                    'braking': car.braking,
-                    'camera_y': smoothed_camera_y
-                })
-                
+                # 物理・記録・カメラ・ゴール判定は固定刻みで進める（描画フレームとは独立）
+                # リプレイの入力語で表せる値に丸めてから使う（再計算で同じ結果になるように）
+                controls = quantize(read_controls(keys, joystick))
+                rewinding = bool(keys[pygame.K_r] or (joystick and joystick.get_numbuttons() > 3
+                                                      and joystick.get_button(3)))  # Y button
+                if rewinding:
+                    # 押している間はシミュレーションを止め、進む刻みの REWIND_SPEED 倍ずつ戻す。
+                    # リプレイとゴーストの記録も戻した刻みまで切り詰める（再計算がずれない）
+                    restored = rewind.step_back(sim, sim_ticks * REWIND_SPEED)
+                    if restored is not None:
+                        smoothed_camera_y, smoothed_slope = restored
+                        replay.truncate(sim.ticks)
+                        ghost_recorder.truncate(sim.ticks)
+                        split_recorder.truncate(sim)
+                    prev_view = (car.x, car.z, smoothed_camera_y, smoothed_slope)
+                for _ in range(0 if rewinding else sim_ticks):
+                    if autopilot is not None:
+                        # 自動運転は刻みごとに判断する（記録される入力も同じく丸めた値）
+                        controls = quantize(autopilot(sim))
+                    prev_view = (car.x, car.z, smoothed_camera_y, smoothed_slope)
+                    reached_goal = sim.step(controls)
+                    replay.record(controls, sim)
+                    ghost_recorder.record(car)
+                    split_recorder.record(sim)
+                    if skidmarks is not None:
+                        skidmarks.update(car, track, stage_id)
+
+                    smoothed_camera_y, smoothed_slope = follow_camera(
+                        track, car.z, smoothed_camera_y, smoothed_slope, camera_smoothing)
+                    rewind.record(sim, smoothed_camera_y, smoothed_slope)
+
+                    # Goal Check (RaceSim は車の先端位置で判定する)
+                    if reached_goal:
+                        current_state = STATE_GOAL
+                        state_timer = 0.0
+                        goal_speed = car.speed # Capture speed for display
+                        car.speed = 0
+                        # Reset offroad state to prevent persistent effects in replay
+                        car.offroad_l = False
+                        car.offroad_r = False
+                        # Capture finish time
+                        final_time = sim.time
+                        stage_times[stage_id] = final_time
+                        # 開いている記録を閉じてから、自己ベストなら置き換える
+                        if ghost is not None:
+                            ghost.close()
+                            ghost = None
+                        if ghost_recorder.save_if_best(final_time):
+                            log_info(f"New best ghost for stage {stage_id}: {final_time:.2f}s")
+                        # ゴールしたら差はステージのタイムどうしで出す
+                        split_delta = final_time - best_splits.time if best_splits is not None else None
+                        best_splits = split_recorder.save_if_best(final_time) or best_splits
+                        break
+
+                if current_state == STATE_PLAYING and best_splits is not None:
+                    split_delta = best_splits.delta(car.z, sim.time)
+
                 # Sound Update
                 sound_manager.update(car.speed, car.accel_pressed)
                 
                 # Update Background (Parallax)
                 # Need curve value at player pos
                 curve_val = track.get_curve_at(car.z)
-                # Update Background (Parallax)
-                # Need curve value at player pos
-                curve_val = track.get_curve_at(car.z)
-                # Pitch from slope
-                # Slope 0.05 -> Pitch ?
-                # Heuristic: 0.05 slope ~= 100px shift?
-                slope = track.get_slope_at(car.z)
-                pitch_val = slope * 800.0 # Adjust multiplier as needed
                 
                 bg_manager.update(dt_sec, curve_val, car.speed)
-                
-                # カメラ高さと勾配のローパスフィルタ（投影ジャンプ防止）
-                target_camera_y = track.get_height_at(car.z)
-                smoothed_camera_y += (target_camera_y - smoothed_camera_y) * 0.1
-                
-                # 勾配も同じフィルタで滑らかに（背景と道路の同期のため）
-                target_slope = track.get_slope_at(car.z)
-                smoothed_slope += (target_slope - smoothed_slope) * 0.1
-                
-                # 背景にカメラ高さを通知（消失点同期用）
-                bg_manager.set_camera_y_offset(smoothed_camera_y)
 
-                # Spawn Dust/Sand if Offroad
-                # Independent Left/Right Logic
-                import random
-                
-                # Determine Stage Type
-                # is_stage4_sand = (stage_id == 4) # Direct check is safer
-                
-                # Sand Color for Stage 4 (Approximating road/ground color)
-                # Changed to brighter color as per user request (was 210, 180, 140)
-                # Using very bright sand/white to avoid darkening texture too much in BLEND_MULT
-                sand_color_ref = (255, 245, 225) 
-                # Check Track Config if possible or hardcode for now based on Stage 4 theme
-                
-                # Function to spawn
-                def spawn_tire_effect(gx, gy, steering):
-                    if stage_id == 4:
-                        # Sand Dust - Frequency based on speed/slip?
-                        # User: "Output amount = slip amount".
-                        # Here simplistic: if offroad, full slip.
-                        effects.add_sand_dust(gx, gy, slip_ratio=0.5, ground_color=sand_color_ref)
-                    else:
-                        # Normal Dust
-                        effects.add_dust(gx, gy, steering)
-                
-                # Left Tire
-                if car.offroad_l and car.speed > 10.0:
-                     if random.random() < 0.3: 
-                         # Add randomness to X (Tire Width)
-                         spawn_x = car.rect.bottomleft[0] + 5 + random.uniform(-10, 10)
-                         spawn_y = car.rect.bottomleft[1] - 25 
-                         spawn_tire_effect(spawn_x, spawn_y, car.steering_input)
-
-                # [Phase 22] Stage 4 Sand: Slip Dust (Acceleration Slip)
-                if stage_id == 4 and car.accel_pressed and car.speed < 107.0: # < 220km/h
-                    # "Slip State" -> Spawn dust
-                    # Frequency check
-                    # User Request: Half overall freq (0.05 -> 0.025)
-                    prob = 0.025 
-                    if car.speed < 73.0: # < 150km/h (~73 units)
-                        # User Request: 1.5x at low speed (was 2x)
-                        prob = 0.025 * 1.5 # = 0.0375
-                    
-                    if random.random() < prob:
-                        # Spawn at rear tires (random left or right or both)
-                        # Let's verify car rect positions
-                        # Spawn near bottom
-                        sx = car.rect.centerx + random.uniform(-40, 40)
-                        sy = car.rect.bottom - 10
-                        effects.add_sand_dust(sx, sy, slip_ratio=0.8, ground_color=sand_color_ref)
-                
-                # [Phase 22] Stage 4 Sand: Brake Dust
-                # Spawn dust when braking on sand
-                if stage_id == 4 and car.braking and car.speed > 10.0:
-                    if random.random() < 0.3: # 30% chance per frame
-                        # Front tires? or Rear?
-                        # Usually 4 wheels lock/slide. Let's do front mostly for visual diff?
-                        # Or Rear is safer. Let's do random position near all tires.
-                        
-                        # Generate 1 or 2 particles
-                        for _ in range(random.randint(1, 2)):
-                             # Random tire position
-                             offset_x = random.choice([-1, 1]) * (car.rect.width * 0.38)
-                             spawn_x = car.rect.centerx + offset_x + random.uniform(-10, 10)
-                             spawn_y = car.rect.bottom - 15
-                             effects.add_sand_dust(spawn_x, spawn_y, slip_ratio=0.6, ground_color=sand_color_ref)
-
-                # Right Tire
-                if car.offroad_r and car.speed > 10.0:
-                     if random.random() < 0.3:
-                         spawn_x = car.rect.bottomright[0] - 5 + random.uniform(-10, 10)
-                         spawn_y = car.rect.bottomright[1] - 25 
-                         spawn_tire_effect(spawn_x, spawn_y, car.steering_input)
-
-                # Sparks (High Speed Cornering)
-                # Condition: Speed > 150.0 (~310km/h) AND (Strong Curve OR Strong Steering)
-                # Curve > 1.0 or Steering > 0.5
-                if car.speed > 150.0:
-                    should_spark = False
-                    spark_x = 0
-                    spark_flip = False # Default False (Left side?)
-                    
-                    # Logic: If turning RIGHT, Left side scrapes? (Weight transfer)
-                    # For simplicity, let's spawn from "Lower Side" of the chassis (Outer side of turn)
-                    # Turn Right (curve > 0) -> Left side (bottomleft) scrapes?
-                    # Actually, if curve > 0, we are turning Right. Centrifugal force pushes car Left.
-                    # Left suspension compresses. Skid plate on Left might scrape.
-                    
-                    # User req: Inner side.
-                    # Right Curve -> Right side.
-                    # Left Curve -> Left side.
-                    
-                    # Using Curve Value from Track
-                    if curve_val > 1.5: # Sharp Right Curve
-                        if random.random() < 0.03: 
-                             should_spark = True
-                             # User req: Inner side (Right), Outward 15px
-                             spark_x = car.rect.bottomright[0] + 15
-                             spark_flip = True # Right side -> Flip
-                    elif curve_val < -1.5: # Sharp Left Curve
-                        if random.random() < 0.03:
-                             should_spark = True
-                             # User req: Inner side (Left), Outward 15px
-                             spark_x = car.rect.bottomleft[0] - 15
-                             spark_flip = False # Left side -> Normal
-                    
-                    # Also check steering input for drift-like sparks
-                    if not should_spark and abs(car.steering_input) > 0.7:
-                         if random.random() < 0.02: 
-                             should_spark = True
-                             if car.steering_input > 0: # Steering Right
-                                 # Right side
-                                 spark_x = car.rect.bottomright[0] + 15
-                                 spark_flip = True
-                             else:
-                                 # Left side
-                                 spark_x = car.rect.bottomleft[0] - 15
-                                 spark_flip = False
-                    
-                    if should_spark:
-                         # User req: y-10px (Total -20 from bottom)
-                         spark_y = car.rect.bottom - 20
-                         effects.add_spark(spark_x, spark_y, flip_x=spark_flip)
-
-                # Sparks (Tunnel Wall Scrape)
-                # 壁を擦っている間は、上のコーナリング火花と違って最高速(150.0)を待たずに出す
-                # （閾値はWALL_SPARK_MIN_SPEEDの定義を参照）。見た目・位置は上と同じ火花。
-                # 接触は連続する（コーナーの一瞬とは違う）ので発生頻度は上より高め。
-                if car.wall_contact != 0 and car.speed > WALL_SPARK_MIN_SPEED:
-                    if random.random() < 0.25:
-                        if car.wall_contact > 0:  # 右の壁
-                            wall_spark_x = car.rect.bottomright[0] + 15
-                            wall_spark_flip = True
-                        else:                     # 左の壁
-                            wall_spark_x = car.rect.bottomleft[0] - 15
-                            wall_spark_flip = False
-                        effects.add_spark(wall_spark_x, car.rect.bottom - 20, flip_x=wall_spark_flip)
-
-                # Goal Check (Use car front position for natural feel)
-                # Add forward offset: approximately half of car's visual length in world space
-                car_front_offset = 700.0  # 車の長さ + α
-                if car.z + car_front_offset >= track.goal_distance:
-                    current_state = STATE_GOAL
-                    state_timer = 0.0
-                    goal_speed = car.speed # Capture speed for display
-                    car.speed = 0
-                    # Reset offroad state to prevent persistent effects in replay
-                    car.offroad_l = False
-                    car.offroad_r = False
-                    # Capture finish time
-                    final_time = (pygame.time.get_ticks() - start_time) / 1000.0
-                    stage_times[stage_id] = final_time
-                    
+                # Dust / sand / sparks: Effects turns the car state into particles with
+                # per-stage, per-surface emitters (rates per second, so the amount is the
+                # same at any frame rate; see src/emitters.py)
+                effects.update_emitters(dt_sec, car, stage_id, curve_val)
+
             elif current_state == STATE_GOAL:
                 state_timer += dt_sec
                 if state_timer >= 1.5:
@@ -480,7 +457,7 @@ def main():
                      # Restart Game
                      stage_id = 0 # Will incr to 1 in INIT
                      stage_times = {}
-                     replay_data = [] # [FIX 2026-07-17] Clear stale replay from previous run
+                     replay = InputReplay(SIM_HZ) # [FIX 2026-07-17] Clear stale replay from previous run
                      smoothed_camera_y = 0.0
                      smoothed_slope = 0.0
                      current_state = STATE_NEXT_STAGE_INIT
@@ -495,71 +472,42 @@ def main():
                      running = False
 
                  # "Replay" -> R or X button
-                 if menu_pressed['replay']:
+                 if menu_pressed['replay'] and len(replay) > 0:
                      current_state = STATE_REPLAY
-                     replay_index = 0
-                     replay_active = True
-                     # [FIX 2025-12-11] Clear effects and reset car state at replay start
+                     # 最初の刻みで記録の先頭ステージから計算し直す（コースも車もそこで作り直される）
+                     replay_player = ReplayPlayer(replay, sim)
+                     # [FIX 2025-12-11] Clear effects at replay start
                      effects.clear_all()  # Clear any lingering particles
-                     car.offroad_l = False
-                     car.offroad_r = False
-                     # [FIX 2025-12-11] Reset to Stage 1 track at replay start
-                     if len(replay_data) > 0:
-                         first_stage = replay_data[0].get('stage_id', 1)
-                         stage_id = first_stage
-                         track.create_road(stage_id)
-                         bg_manager.set_stage(stage_id)
 
             elif current_state == STATE_REPLAY:
-                 if replay_index < len(replay_data):
-                     d = replay_data[replay_index]
-                     car.x = d['x']
-                     car.z = d['z']
-                     car.speed = d['speed']
-                     car.steering_input = d['steering_input']
-                     # car.angle = d['angle'] # REMOVED
-                     # [FIX 2025-12-11] Reset offroad flags only on first replay frame
-                     # After first frame, restore from recorded data for realistic replay
-                     if replay_index == 0:
-                         car.offroad_l = False
-                         car.offroad_r = False
-                         car.offroad = False
-                     else:
-                         car.offroad_l = d['offroad_l']
-                         car.offroad_r = d['offroad_r']
-                         car.offroad = car.offroad_l or car.offroad_r
-                     car.braking = d['braking']
-                     
-                     # [FIX 2025-12-11] Detect stage change during replay and recreate track
-                     new_stage = d['stage_id']
-                     if new_stage != stage_id:
-                         stage_id = new_stage
-                         track.create_road(stage_id)
+                 # 記録した入力で、プレイ中と同じ刻みを計算し直す
+                 for _ in range(sim_ticks):
+                     prev_view = (car.x, car.z, smoothed_camera_y, smoothed_slope)
+                     more, stage_changed = replay_player.step()
+                     if not more:
+                         current_state = STATE_GAME_CLEAR
+                         break
+                     if stage_changed:
+                         stage_id = replay_player.stage_id
                          bg_manager.set_stage(stage_id)
-                     
-                     # Restore Camera Y
-                     # If recorded as 0 (bug or flat), recalculate fallback
-                     rec_cam_y = d.get('camera_y', 0.0)
-                     if rec_cam_y == 0.0 and stage_id in [2,3,5]: # Stages with hills
-                         # Fallback to calculated height
-                         rec_cam_y = track.get_height_at(car.z)
-                     
-                     smoothed_camera_y = rec_cam_y
-
-                     # [FIX 2026-07-17] Background scroll/pitch/camera-offset were only
-                     # updated in STATE_PLAYING, so the background froze during replay
-                     # even though the car kept moving. Drive them from replay data too.
-                     replay_curve_val = track.get_curve_at(car.z)
-                     bg_manager.update(dt_sec, replay_curve_val, car.speed)
-                     bg_manager.set_camera_y_offset(smoothed_camera_y)
+                         if skidmarks is not None:
+                             skidmarks.clear(stage_id)
+                         smoothed_camera_y = 0.0
+                         smoothed_slope = 0.0
+                     smoothed_camera_y, smoothed_slope = follow_camera(
+                         track, car.z, smoothed_camera_y, smoothed_slope, camera_smoothing)
+                     if skidmarks is not None:
+                         skidmarks.update(car, track, stage_id)
+                     if stage_changed:
+                         # ステージの頭では z が 0 へ戻るので、その刻みは補間せずにそのまま描く
+                         prev_view = (car.x, car.z, smoothed_camera_y, smoothed_slope)
+
+                 # [FIX 2026-07-17] Background scroll/pitch/camera-offset were only
+                 # updated in STATE_PLAYING, so the background froze during replay
+                 # even though the car kept moving. Drive them from replay data too.
+                 replay_curve_val = track.get_curve_at(car.z)
+                 bg_manager.update(dt_sec, replay_curve_val, car.speed)
 
-                     replay_target_slope = track.get_slope_at(car.z)
-                     smoothed_slope += (replay_target_slope - smoothed_slope) * 0.1
-
-                     replay_index += 1
-                 else:
-                     current_state = STATE_GAME_CLEAR
-                     
                  # Exit Replay (Brake)
                  # [FIX 2026-07-17] Was button(0)=A, same button as CONTINUE on the next
                  # screen, causing an immediate unintended restart. Brake is button(1)=B.
@@ -602,45 +550,57 @@ def main():
             effects.update_particles(dt_sec)
 
             # --- Rendering ---
+            # 描画は直前の刻みと最新の刻みの間を補間した位置から見る（src/timestep.py）。
+            # 止まっている状態では補間しない
+            view_alpha = sim_clock.alpha if current_state in (STATE_PLAYING, STATE_REPLAY) else 1.0
+            view_x, view_z, view_camera_y, view_slope = (
+                lerp(a, b, view_alpha) for a, b in zip(
+                    prev_view, (car.x, car.z, smoothed_camera_y, smoothed_slope)))
+
             render_stage_id = stage_id
             if render_stage_id > 6: render_stage_id = 6
             
             # 1. Background
             # [TUNING] Pitch Offset
             # フィルタ済みの勾配を使用（道路のカメラ高さと同期）
-            pitch_offset = -smoothed_slope * 300.0
+            pitch_offset = -view_slope * 300.0
 
             # Safer background fill（背景レイヤーの下地。BGより先に塗る）
             bg_sky, bg_ground = track.get_bg_colors(render_stage_id)
             pygame.draw.rect(screen, bg_sky, (0, 0, SCREEN_WIDTH, HORIZON_Y))
             pygame.draw.rect(screen, bg_ground, (0, HORIZON_Y, SCREEN_WIDTH, SCREEN_HEIGHT - HORIZON_Y))
 
+            # 背景にカメラ高さを通知（消失点同期用。道路と同じ補間済みの値を使う）
+            if current_state in (STATE_PLAYING, STATE_REPLAY):
+                bg_manager.set_camera_y_offset(view_camera_y)
+
             # 地面テクスチャの流れの消失点を道路に係留する
             # （帯の最上段を道路が貫く画面位置に合わせ、道路の左右で扇状に流れるようにする）
             ground_top_z = bg_manager.get_ground_top_depth()
-            bg_manager.set_road_anchor(track.get_road_screen_offset(car.z, car.x, ground_top_z))
+            bg_manager.set_road_anchor(track.get_road_screen_offset(view_z, view_x, ground_top_z))
 
-            bg_manager.draw(screen, pitch_offset=pitch_offset, player_z=car.z)
+            bg_manager.draw(screen, pitch_offset=pitch_offset, player_z=view_z)
 
             # 2. Track
             current_fog_color = bg_manager.get_fog_color(render_stage_id)
-            track.draw(screen, car.z, car.x, SCREEN_WIDTH, SCREEN_HEIGHT, render_stage_id, current_fog_color, smoothed_camera_y)
+            road_sprites = None
+            if sim.opponents is not None:
+                opponent_x, opponent_z = sim.opponents.view(view_alpha)
+                opponent_sprites.prepare(opponent_x, opponent_z, sim.opponents.braking, view_z)
+                road_sprites = opponent_sprites
+            if ghost is not None and current_state == STATE_PLAYING:
+                # 描画している時刻（直前の刻みと最新の刻みの間）の位置を記録から引く
+                ghost_pose = ghost.sample(sim.time - (1.0 - view_alpha) * sim.dt)
+                if ghost_pose is not None:
+                    if road_sprites is None:
+                        opponent_sprites.clear()
+                    opponent_sprites.add_ghost(ghost_pose[1], ghost_pose[0], view_z)
+                    road_sprites = opponent_sprites
+            track.draw(screen, view_z, view_x, SCREEN_WIDTH, SCREEN_HEIGHT, render_stage_id, current_fog_color, view_camera_y,
+                       sprites=road_sprites, skidmarks=skidmarks)
 
             # [TEST] 道路描画後の霧オーバーレイ（水平線近くを馴染ませる）
-            # 坑口の山が画面に写っている間（トンネル手前ほぼ全域〜内部）は
-            # 最前面に霧の帯が浮いて見えるため即座に非表示にする
-            overlay_haze_mult = getattr(bg_manager, '_overlay_haze_mult', 1.0)
-            if current_fog_color and overlay_haze_mult > 0.0:
-                fog_overlay_height = 80  # 水平線から80px下まで
-                fog_overlay = pygame.Surface((SCREEN_WIDTH, fog_overlay_height), pygame.SRCALPHA)
-                for i in range(fog_overlay_height):
-                    # 非線形グラデーション（三乗で上が濃く下が薄い）
-                    t = i / float(fog_overlay_height)  # 0 (top) to 1 (bottom)
-                    fade = (1.0 - t) ** 3  # 三乗で急激にフェード
-                    alpha = int(fade * 200 * overlay_haze_mult)  # 最大200（強め）
-                    pygame.draw.line(fog_overlay, (*current_fog_color, alpha),
-                                   (0, i), (SCREEN_WIDTH, i))
-                screen.blit(fog_overlay, (0, HORIZON_Y))
+            bg_manager.draw_fog_overlay(screen, current_fog_color)
             
             # 3. Car
             total_time_sec = (pygame.time.get_ticks() - start_time) / 1000.0
@@ -687,13 +647,15 @@ def main():
                 ui.draw_replay_status(screen)
             else:
                 if hud_state == STATE_PLAYING:
-                     elapsed_time = (pygame.time.get_ticks() - start_time) / 1000.0
+                     elapsed_time = sim.time
                 else:
                      # Show frozen time
                      elapsed_time = final_time
 
                 rem_dist = max(0, int((track.goal_distance - car.z)/100))
-                ui.draw_hud(screen, stage_id, elapsed_time, rem_dist)
+                ui.draw_hud(screen, stage_id, elapsed_time, rem_dist, split_delta)
+                if hud_state == STATE_PLAYING and rewinding:
+                    ui.draw_rewind_status(screen, rewind.seconds_available)
 
             # Show active speed or frozen goal speed
             display_speed = car.speed
@@ -729,6 +691,7 @@ def main():
         # past this point and skipped cleanup (engine sound channels left open,
         # pygame never quit).
         sound_manager.cleanup()
+        assets.shutdown()
         log_info("Application Exit")
         pygame.quit()
 
@@ -0,0 +1,175 @@
+"""アセット（画像・音声）の一括読み込み。
+
+以前は各モジュールが __init__ の中で pygame.image.load を同期で呼んでおり、パスも cwd 相対
+（asset/car.png）だったため、起動時はデコードが直列に並び、main.py 以外の場所から起動すると
+読み込みに失敗していた。AssetStore はファイルのデコードをスレッドプールで並列に進め、
+メインスレッドでしかできない後処理（convert() / convert_alpha()、Sound の生成）だけを
+受け取り時に行う。main.py はデコード中にローディング画面を回し、各モジュールはキーで受け取る。
+
+    assets.preload([...])       … デコードを投げる（すぐ戻る）
+    assets.progress()           … (完了数, 総数)。ローディング画面用
+    assets.image("car")         … 変換済み Surface を返す（デコード中なら待つ）
+
+キーは ASSET_FILES の名前か、プロジェクトルートからの相対パス（ステージ定義の 'bg_image' 等）。
+ファイルが無い場合は従来の pygame.image.load と同じく FileNotFoundError を送出するので、
+呼び出し側の except はそのまま使える。
+"""
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+# asset/ は src/ と同じ階層（プロジェクトルート直下）にある
+PROJECT_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# 名前で呼ぶアセット。ステージ固有の画像は src/stages.cfg のパスをそのままキーにする。
+ASSET_FILES = {
+    "car": "asset/car.png",
+    "afterfire": "asset/afterfire.png",
+    "spark": "asset/spark.png",
+    "sand": "asset/vfx_smoke_beige_sand.png",
+    "dust": "asset/vfx_dirt_kickup.png",
+    "bgm": "asset/turbo_apex.mp3",
+}
+
+# デコードのスレッド数。PNG のデコード（SDL_image）は GIL を手放すので、コア数まで並列に進む
+ASSET_WORKERS = min(8, os.cpu_count() or 4)
+
+
+def asset_path(key):
+    """キーからプロジェクトルート基準の絶対パスを返す（cwd に依存しない）。"""
+    return os.path.join(PROJECT_ROOT, ASSET_FILES.get(key, key))
+
+
+def _decode_image(path):
+    # ワーカースレッドで実行。ピクセル形式の変換はディスプレイが要るのでここではしない
+    return pygame.image.load(path)
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class AssetStore:
+    """スレッドプールでデコードし、受け取り時にメインスレッドで後処理するアセット置き場。"""
+
+    def __init__(self, workers=ASSET_WORKERS):
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._jobs = {}      # (種類, キー) -> Future（デコード結果）
+        self._ready = {}     # (種類, キー) -> 後処理済みの値
+
+    def _submit(self, kind, key, decode):
+        job_key = (kind, key)
+        with self._lock:
+            if job_key in self._jobs or job_key in self._ready:
+                return
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="asset")
+            self._jobs[job_key] = self._pool.submit(decode, asset_path(key))
+
+    def preload(self, keys, alpha=True):
+        """画像のデコードをまとめて投げる。alpha は受け取り時の convert_alpha / convert の別。"""
+        kind = "image_alpha" if alpha else "image"
+        for key in keys:
+            self._submit(kind, key, _decode_image)
+
+    def preload_bytes(self, keys):
+        """ファイルの中身をバイト列として読んでおく（BGM・WAV 用）。"""
+        for key in keys:
+            self._submit("bytes", key, _read_bytes)
+
+    def preload_with(self, kind, keys, decode):
+        """任意のデコード関数 decode(絶対パス) をワーカーで走らせる（エンジン音の WAV 整形など）。
+        受け取りは load(kind, key, decode, finalize)。kind は用途ごとの名前空間。"""
+        for key in keys:
+            self._submit(kind, key, decode)
+
+    def progress(self):
+        """(デコード済みの数, 依頼された総数) を返す。"""
+        with self._lock:
+            total = len(self._jobs) + len(self._ready)
+            done = len(self._ready) + sum(1 for f in self._jobs.values() if f.done())
+        return done, total
+
+    def is_loading(self):
+        done, total = self.progress()
+        return done < total
+
+    def _take(self, kind, key, decode, finalize, keep):
+        job_key = (kind, key)
+        if job_key in self._ready:
+            value = self._ready[job_key]
+            if not keep:
+                del self._ready[job_key]
+            return value
+        self._submit(kind, key, decode)  # 未依頼ならここで投げて待つ（同期読み込みと同じ）
+        with self._lock:
+            future = self._jobs.pop(job_key)
+        value = finalize(future.result())  # デコード時の例外はここで再送出される
+        if keep:
+            self._ready[job_key] = value
+        return value
+
+    def image(self, key, alpha=True, keep=True):
+        """変換済みの Surface を返す。
+
+        共有される Surface なので、呼び出し側は拡縮・コピーした結果を使い、直接描き込まないこと。
+        keep=False はステージ画像のように一度使えば済むもの用（置き場から外して返す）。
+        """
+        if alpha:
+            return self._take("image_alpha", key, _decode_image,
+                              lambda surf: surf.convert_alpha(), keep)
+        return self._take("image", key, _decode_image, lambda surf: surf.convert(), keep)
+
+    def data(self, key, keep=False):
+        """ファイルの中身を読み取り専用のファイルオブジェクトで返す（pygame.mixer.music.load 用）。"""
+        return io.BytesIO(self._take("bytes", key, _read_bytes, lambda raw: raw, keep))
+
+    def load(self, kind, key, decode, finalize=None, keep=True):
+        """preload_with で投げたものを受け取る。finalize はメインスレッドで結果に掛ける後処理。"""
+        return self._take(kind, key, decode, finalize or (lambda value: value), keep)
+
+    def discard(self, keys):
+        """読み込み済み・読み込み中のものを捨てる（不要になった先読みの解放用）。"""
+        with self._lock:
+            for key in keys:
+                for job_key in [k for k in (*self._jobs, *self._ready) if k[1] == key]:
+                    self._ready.pop(job_key, None)
+                    future = self._jobs.pop(job_key, None)
+                    if future is not None:
+                        future.cancel()
+
+    def clear(self):
+        with self._lock:
+            for future in self._jobs.values():
+                future.cancel()
+            self._jobs.clear()
+            self._ready.clear()
+
+    def shutdown(self):
+        self.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+# ゲーム全体で共有する置き場
+assets = AssetStore()
+
+
+def stage_image_keys(stage_cfg):
+    """ステージ定義が使う画像のキー（背景・地面）。BackgroundManager と先読みで共有する。"""
+    keys = []
+    for name in ("bg_image", "ground_image"):
+        path = stage_cfg.get(name)
+        if path and path not in keys:
+            keys.append(path)
+    return keys
+
@@ -0,0 +1,128 @@
+"""人の操作なしでステージを走る自動運転（デモ走行・再現できる計測用）。
+
+Autopilot(sim) は keep_center 等と同じ policy（RaceSim を受け取り ControlInput を返す）で、
+run_stages() にも main.py の --autopilot にもそのまま差し込める。
+
+速度は先読みの表で決める。コースを作り直すたびに（Track.layout_version）セグメントごとに
+「そこから一定速で走ったとき、カーブの遠心力（Car.update のドリフト）のうちステアで打ち消し
+切れない分の横流れが、道幅の余裕 AUTOPILOT_LATERAL_ROOM に収まる最高速」を求める
+（短いきついカーブは道幅を使って打ち消し切れない速さのまま抜ける）。それをブレーキで
+落とせる分だけ手前へ伝播させたものが目標速度の表で、走行中はその表を引いて、
+目標より遅ければアクセル、速すぎればブレーキを踏む。
+
+ステアは今いるセグメントのドリフトを打ち消す量（フィードフォワード）に、目標の横位置
+（先のカーブの内側へ少し寄せた線）との差を AUTOPILOT_LATERAL_FRAMES フレームで詰める量を足す。
+Car.update のステアは横位置を直接動かす（慣性が無い）ので、比例制御だけで振動しない。
+"""
+
+import math
+
+from .car import (NORMAL_MAX_SPEED, BRAKE_RATE, STEER_SENSITIVITY_LOW, STEER_SENSITIVITY_HIGH,
+                  STEER_LOW_SPEED_PLATEAU)
+from .controls import ControlInput
+from .track import STRIPE_LENGTH
+
+# ステアのうちカーブの打ち消しに使ってよい割合（残りを横位置の修正に回す）
+AUTOPILOT_STEER_BUDGET = 1.0
+# 打ち消し切れない横流れを許す幅（world units）。内側の線から外側のオフロード境界まで
+# 約1500あり、少しはみ出しても次の直線で戻せる
+AUTOPILOT_LATERAL_ROOM = 1600.0
+# 目標速度の表を求めるときに試す速度の刻み
+AUTOPILOT_SPEED_STEP = 4.0
+# 目標速度の表を手前へ伝播させるときに見込む減速（60fps の1フレームあたり。最高速域の効き）
+AUTOPILOT_BRAKE = BRAKE_RATE * 0.4
+# 横位置の差を何フレームで詰めるか
+AUTOPILOT_LATERAL_FRAMES = 20.0
+# カーブの内側へ寄せる量（曲率あたり world units）と、寄せる上限
+AUTOPILOT_INSIDE_LINE = 120.0
+AUTOPILOT_MAX_OFFSET = 500.0
+# 目標の横位置を決めるときに先読みする距離（world units）
+AUTOPILOT_LOOKAHEAD = 3000.0
+
+
+def turn_speed(speed, stage_id):
+    """Car.update のステアの効き（1フレームあたりの横移動量）。"""
+    if speed <= STEER_LOW_SPEED_PLATEAU:
+        turn = STEER_SENSITIVITY_LOW
+    else:
+        ratio = min(1.0, (speed - STEER_LOW_SPEED_PLATEAU) / (NORMAL_MAX_SPEED - STEER_LOW_SPEED_PLATEAU))
+        turn = STEER_SENSITIVITY_LOW + (STEER_SENSITIVITY_HIGH - STEER_SENSITIVITY_LOW) * ratio
+    if stage_id == 5 and speed >= 48.5:
+        turn *= 0.85
+    return turn
+
+
+def drift_rate(curve, speed, stage_id):
+    """Car.update のカーブによる横流れ（1フレームあたり。正なら x が減る向き）。"""
+    ratio = max(0.0, min(1.0, speed / NORMAL_MAX_SPEED))
+    return curve * ratio * (5.5 if stage_id == 5 else 4.0)
+
+
+def build_speed_profile(track, stage_id):
+    """セグメントごとの目標速度の表を作る（コース外の1つ先まで）。"""
+    top = NORMAL_MAX_SPEED + 5.0  # 下り坂の最高速（Car.max_speed_boost）
+    curves = [abs(seg['curve']) for seg in track.segments]
+    n = len(curves)
+    profile = [AUTOPILOT_SPEED_STEP] * n + [top]
+    v = AUTOPILOT_SPEED_STEP
+    while v <= top:
+        # 速度 v で1セグメント走る間に、打ち消し切れずに流される量（負なら戻せる量）
+        frames = STRIPE_LENGTH / v
+        turn = turn_speed(v, stage_id) * AUTOPILOT_STEER_BUDGET
+        drift_per_curve = drift_rate(1.0, v, stage_id)
+        # need: そのセグメントから先を速度 v のまま走ったときに要る横の余裕（奥から積む）
+        need = 0.0
+        for i in range(n - 1, -1, -1):
+            need = max(0.0, need + (drift_per_curve * curves[i] - turn) * frames)
+            if need <= AUTOPILOT_LATERAL_ROOM:
+                profile[i] = v  # v を昇順に試すので、収まる最大の速度が残る
+        v += AUTOPILOT_SPEED_STEP
+    brake = AUTOPILOT_BRAKE * (0.5 if stage_id == 4 else 1.0)  # Stage 4 は路上のブレーキが半分
+    # 奥から手前へ: 次のセグメントの目標までブレーキで落とせる速さに抑える（v² が距離に比例して減る）
+    per_segment = 2.0 * brake * STRIPE_LENGTH
+    for i in range(len(profile) - 2, -1, -1):
+        reachable = math.sqrt(profile[i + 1] ** 2 + per_segment)
+        if reachable < profile[i]:
+            profile[i] = reachable
+    return profile
+
+
+class Autopilot:
+    """RaceSim を受け取り ControlInput を返す policy。"""
+
+    def __init__(self):
+        self._profile = None
+        self._profile_key = None
+
+    def _speed_profile(self, track, stage_id):
+        key = (id(track), track.layout_version, stage_id)
+        if key != self._profile_key:
+            self._profile = build_speed_profile(track, stage_id)
+            self._profile_key = key
+        return self._profile
+
+    def __call__(self, sim):
+        car = sim.car
+        track = sim.track
+        stage_id = sim.stage_id
+        profile = self._speed_profile(track, stage_id)
+        i = min(int(car.z / STRIPE_LENGTH), len(profile) - 1)
+        speed = car.speed
+
+        # 横: 今のカーブの横流れを打ち消し、先のカーブの内側寄りの線へ寄せる
+        turn = turn_speed(speed, stage_id)
+        ahead = track.get_curve_at(car.z + AUTOPILOT_LOOKAHEAD)
+        target_x = max(-AUTOPILOT_MAX_OFFSET, min(AUTOPILOT_MAX_OFFSET, ahead * AUTOPILOT_INSIDE_LINE))
+        if track.get_tunnel_at(car.z, stage_id=stage_id):
+            target_x = 0.0
+        steer = drift_rate(track.get_curve_at(car.z), speed, stage_id) / turn
+        steer += (target_x - car.x) / (turn * AUTOPILOT_LATERAL_FRAMES)
+        steer = max(-1.0, min(1.0, steer))
+
+        # 前後: 目標速度の表（今と次のセグメントの低い方）に合わせる
+        target = min(profile[i], profile[min(i + 1, len(profile) - 1)])
+        if car.offroad:
+            return ControlInput(steer, True, False)
+        if speed > target + 2.0:
+            return ControlInput(steer, False, True)
+        return ControlInput(steer, speed < target, False)
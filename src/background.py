@@ -1,8 +1,12 @@
 import math
+from collections import OrderedDict
 
 import pygame
 from .track import (STAGE_CONFIG, HORIZON_Y, DRAW_DISTANCE,
                     PROJECTION_PLANE_DIST, CAMERA_HEIGHT)
+from .ground_mode7 import MODE7_AVAILABLE, Mode7GroundRenderer
+from .assets import assets, stage_image_keys
+from .texture_cache import load_or_build, is_cached
 
 # --- Ground Layer Config ---
 #
@@ -42,6 +46,23 @@ GROUND_RENDER_OFFSET_Y = 17
 # エイリアシング域のエネルギーが大幅に減る。縦の縮尺・スクロール速度は旧実装と同じ。
 GROUND_TEXTURE_WORLD_WIDTH = 41800.0
 
+# 地面の横帯の高さは行ごとに変える（GroundLayer._build_strip_layout）。帯1本は1つの横倍率・
+# 1つのミップで描くので、帯の中で横倍率やテクセルの進みが変わるほど理想の射影からずれる。
+# そのずれが以下の許容量に収まる範囲で帯を太くする。手前は行ごとの変化が緩いので太く、
+# 地平線の近くは変化が急なので1pxになる（固定2pxだった頃の約140本が約80本になる）。
+#   TOLERANCE_PX     … 帯の上下端で横倍率が違うことによる、画面端での模様の横ずれ（px）
+#   TOLERANCE_TEXELS … 帯の中で縦のテクセルの進みを等間隔と見なすことによる読み位置のずれ
+GROUND_STRIP_TOLERANCE_PX = 5.0
+GROUND_STRIP_TOLERANCE_TEXELS = 1.0
+# 品質のつまみ。許容量をこの値で割る（2.0 で許容量半分＝帯が細く本数が増える）
+GROUND_STRIP_QUALITY = 1.0
+GROUND_STRIP_MAX_HEIGHT = 16
+
+# 地面の描画エンジン。"strips" = 横帯を拡縮して blit（従来方式）、
+# "mode7" = NumPy で全行を一括サンプリング（src/ground_mode7.py。numpy が無ければ strips）。
+# 実行中は 9 キーで切り替えられる（main.py）。
+GROUND_ENGINE = "strips"
+
 # --- Gradient Smoothing Config ---
 GRADIENT_HEIGHT = 20  # グラデーション帯の高さ（上段、50%縮小）
 GRADIENT_HEIGHT_2 = 40  # 2段目の緩いグラデーションの高さ
@@ -54,11 +75,31 @@ GRADIENT_HEIGHT_2 = 40  # 2段目の緩いグラデーションの高さ
 TUNNEL_HAZE_FADE_DISTANCE = 3000.0
 TUNNEL_HAZE_HIDE_MARGIN = 1500.0
 
+# --- Gradient Band Cache Config ---
+# グラデーション帯・霧帯は「色・高さ・濃さの倍率」だけで決まるので、作った Surface を
+# キャッシュして毎フレームは blit だけにする。トンネル前後のフェード中は倍率が連続的に
+# 変わるため、HAZE_MULT_STEPS 段に量子化してキャッシュ済みの段を順に使う
+# （最大 alpha 200 でも1段あたり約6階調。3000単位のフェードで段差は見えない）。
+HAZE_MULT_STEPS = 32
+# フェードの全段（0〜HAZE_MULT_STEPS の33段）×帯4種 = 132枚が収まる上限。これより小さいと
+# トンネル前後のフェードのたびに帯を作り直す。帯1枚は 800px 幅の SRCALPHA（1行 3.2KB）なので、
+# 今のステージ定義の高さ（上段20・下段40・霧80・霧オーバーレイ80px）で全段を持つと約23MB、
+# 160枚がすべて最大の80pxだった場合は約41MB になる
+GRADIENT_BAND_CACHE_SIZE = 160
+# 空の合成キャッシュで、背景画像が覆わない部分に塗る抜き色（背景画像に使われていない色）
+SKY_CACHE_COLORKEY = (255, 0, 255)
+# GroundLayer._build_mips の処理の版数（ディスクキャッシュのキーに入る。処理を変えたら上げる）
+GROUND_MIP_VERSION = 1
+
 class BackgroundLayer:
-    def __init__(self, image_path, scroll_factor_x, scroll_factor_y, screen_width, screen_height, base_y_offset=0):
-        self.image = pygame.image.load(image_path).convert()
+    # wrap=True は左右がつながったパノラマ画像用。端で止めずに横へ回り続ける
+    # （ステージ定義の 'bg_wrap'。つながっていない画像で有効にすると継ぎ目が見える）。
+    def __init__(self, image_path, scroll_factor_x, scroll_factor_y, screen_width, screen_height,
+                 base_y_offset=0, wrap=False):
         # Scale to 2.0x width to allow for non-looping scroll
-        self.image = pygame.transform.scale(self.image, (int(screen_width * 2.0), screen_height + 250))
+        size = (int(screen_width * 2.0), screen_height + 250)
+        self.image, = load_or_build("sky", [image_path], (size,), lambda: [
+            pygame.transform.scale(assets.image(image_path, alpha=False, keep=False), size)])
         
         self.width = self.image.get_width()
         self.height = self.image.get_height()
@@ -76,6 +117,7 @@ class BackgroundLayer:
         self.scroll_factor_x = scroll_factor_x
         self.scroll_factor_y = scroll_factor_y
         self.base_y_offset = base_y_offset
+        self.wrap = wrap
         self.smoothed_curve = 0.0 # Smoothing state
         
     def update(self, dt, curve_value, player_speed):
@@ -93,6 +135,11 @@ class BackgroundLayer:
         move_speed = -use_curve * player_speed * self.scroll_factor_x
             
         self.current_x += move_speed * dt
+
+        if self.wrap:
+            # パノラマは [-width, 0) に畳む。draw() は current_x と current_x+width の2枚を並べる
+            self.current_x = self.current_x % self.width - self.width
+            return
         
         # Clamp Logic (Stop at edges)
         # Max X (Left Limit): 0 (Left edge of image at left edge of screen)
@@ -106,79 +153,172 @@ class BackgroundLayer:
         elif self.current_x > max_x:
             self.current_x = max_x
 
-    def draw(self, screen, pitch_offset_y=0):
+    def blit_position(self, pitch_offset_y=0):
+        """画像を置く画面上の整数座標。blit は小数座標を0方向へ切り捨てるのでそれに合わせる。
+
+        BackgroundManager の空の合成キャッシュは、この値が変わったときだけ作り直す。
+        """
         draw_y = self.base_y_offset + (pitch_offset_y * self.scroll_factor_y)
-        
-        # Split Rendering
-        # Top: Fixed (Center of image)
-        # Bottom: Scrolled (current_x)
-        
-        # Split point: HORIZON_Y
-        
-        # 1. Draw Top (Sky) - Fixed -> CHANGED to Scrolled
-        # Clip to top rect
-        screen.set_clip(0, 0, self.screen_width, HORIZON_Y)
-        # Using current_x instead of initial_x to allow sky to move
-        screen.blit(self.image, (self.current_x, draw_y))
-        
-        # 2. Draw Bottom (Ground) - Scrolled
-        # Clip to bottom rect
-        screen.set_clip(0, HORIZON_Y, self.screen_width, self.screen_height - HORIZON_Y)
-        screen.blit(self.image, (self.current_x, draw_y))
-        
-        # Reset Clip
-        screen.set_clip(None)
+        return int(self.current_x), int(draw_y)
+
+    def covers_screen(self, pitch_offset_y=0):
+        """画像が画面全体を覆うか（覆わない部分には main.py が塗った下地が見えている）。"""
+        x, y = self.blit_position(pitch_offset_y)
+        covers_x = self.wrap or (x <= 0 and x + self.width >= self.screen_width)
+        return covers_x and y <= 0 and y + self.height >= self.screen_height
+
+    def draw(self, screen, pitch_offset_y=0):
+        # 以前は HORIZON_Y で上下に分けて clip し、同じ位置へ2回 blit していた
+        # （上=空を固定、下=スクロールにしていた頃の名残。今は上下とも current_x）。1回で同じ絵になる。
+        x, y = self.blit_position(pitch_offset_y)
+        screen.blit(self.image, (x, y))
+        if self.wrap:
+            screen.blit(self.image, (x + self.width, y))
 
 class GroundLayer:
     # スクロールの状態を一切持たない。横は draw() の road_x_offset（＝道路が帯の最上段を
     # 貫く画面位置）、縦は player_z だけで決まる純粋な関数になっている。BackgroundLayer の
     # ような時間積分ではないため、直線では必ず中央へ戻り、フレームレートにも依存しない。
     def __init__(self, image_path, screen_width, screen_height):
-        # Load source and crop bottom section
-        src_img = pygame.image.load(image_path).convert()
-        
-        # Scale width 2.0x like main BG
-        # Increase height significantly to ensure we have enough "ground" pixels
-        target_total_height = 1200
-        scaled_img = pygame.transform.scale(src_img, (int(screen_width * 2.0), target_total_height))
-        
-        # Crop Height: Use the bottom section of the image, starting 200px below the horizon
-        # Reference Start Position -> y+200 (relative to horizon line on image)
-        base_horizon_on_image = target_total_height // 2
-        crop_start_y = base_horizon_on_image + 200 
-        
-        self.texture_height = target_total_height - crop_start_y
-        
-        crop_rect = pygame.Rect(0, crop_start_y, scaled_img.get_width(), self.texture_height)
-        self.image = scaled_img.subsurface(crop_rect).copy()
-        
+        # 拡縮・切り出し・ミップ列の生成は入力だけで決まるので、結果をディスクにキャッシュする
+        self.mips = load_or_build("ground", [image_path], (screen_width, GROUND_MIP_VERSION),
+                                  lambda: GroundLayer._build_mips(image_path, screen_width))
+        self.image = self.mips[0]
+        self.texture_height = self.image.get_height()
         self.width = self.image.get_width()
         self.height = self.image.get_height()
         self.screen_width = screen_width
         self.screen_height = screen_height
+        self.texels_per_world = self.width / GROUND_TEXTURE_WORLD_WIDTH
 
         # 縮小ストリップの横アンチエイリアシング（既知の問題②対策）。
         # デバッグキーMのA/B比較用フラグで、恒久的にはTrue運用。
         self.antialias = True
 
-        # 縦ミップマップ。帯の上端は1ストリップ(2px)でテクスチャを200テクセル以上飛ばすため、
-        # 素直に点サンプルすると激しく折り返す。縦を半分ずつ面積平均した列を作っておき、
-        # 描画時に飛ばす量に見合うレベルから読むことで、正しいフィルタ結果が1回のblitで得られる。
-        # 横は縮まないので模様の左右の形は保たれる。生成は読み込み時の一度きり。
-        # level n のテクセル1行 ≒ 元テクスチャの 2^n 行分。
-        self.mips = [self.image]
-        h = self.height
-        while h > 1:
-            h = max(1, h // 2)
-            self.mips.append(pygame.transform.smoothscale(self.mips[-1], (self.width, h)))
-
         # Use centralized constant for Y drawing start position
         self.start_y = HORIZON_Y + GROUND_RENDER_OFFSET_Y
 
+        # 描画エンジン（GROUND_ENGINE 参照）。mode7 の配列は初回使用時に作る
+        self.engine = GROUND_ENGINE
+        self._mode7 = None
+
+        # 帯の割り付け [(dy, 高さ, ミップレベル, 読むテクセル行数)]。帯の上端位置で決まる
+        self.strip_layout = []
+        self._layout_offset = None
+        self._refresh_strip_layout()
+
+    @staticmethod
+    def _build_mips(image_path, screen_width):
+        """地面テクスチャを拡縮・切り出しし、縦ミップ列 [level 0, level 1, ...] を作る。
+
+        縦ミップマップ。帯の上端は1ストリップ(2px)でテクスチャを200テクセル以上飛ばすため、
+        素直に点サンプルすると激しく折り返す。縦を半分ずつ面積平均した列を作っておき、
+        描画時に飛ばす量に見合うレベルから読むことで、正しいフィルタ結果が1回のblitで得られる。
+        横は縮まないので模様の左右の形は保たれる。level n のテクセル1行 ≒ 元テクスチャの 2^n 行分。
+        中身を変えたら GROUND_MIP_VERSION を上げる（ディスクキャッシュが作り直される）。
+        """
+        # Load source and crop bottom section
+        src_img = assets.image(image_path, alpha=False, keep=False)
+
+        # Scale width 2.0x like main BG
+        # Increase height significantly to ensure we have enough "ground" pixels
+        target_total_height = 1200
+        scaled_img = pygame.transform.scale(src_img, (int(screen_width * 2.0), target_total_height))
+
+        # Crop Height: Use the bottom section of the image, starting 200px below the horizon
+        # Reference Start Position -> y+200 (relative to horizon line on image)
+        base_horizon_on_image = target_total_height // 2
+        crop_start_y = base_horizon_on_image + 200
+        crop_rect = pygame.Rect(0, crop_start_y, scaled_img.get_width(),
+                                target_total_height - crop_start_y)
+        mips = [scaled_img.subsurface(crop_rect).copy()]
+        width, h = mips[0].get_size()
+        while h > 1:
+            h = max(1, h // 2)
+            mips.append(pygame.transform.smoothscale(mips[-1], (width, h)))
+        return mips
+
     def set_start_y(self, y):
         self.start_y = y
+        self._refresh_strip_layout()
+
+    def _row_scale(self, offset, dy):
+        """行 dy の横倍率 a*(offset+dy)（min_width によるクランプ前）。"""
+        a = GROUND_TEXTURE_WORLD_WIDTH / (self.width * CAMERA_HEIGHT)
+        return a * (offset + dy)
+
+    def _row_texel(self, offset, dy):
+        """行 dy が読む level 0 の縦テクセル座標（player_z を除いた部分。下へ進むほど増える）。"""
+        return -CAMERA_HEIGHT * PROJECTION_PLANE_DIST / (offset + dy) * self.texels_per_world
+
+    def _mip_level(self, offset, dy):
+        """行 dy を読むミップレベル。導出は draw() の「4. ミップレベル選択」を参照。"""
+        depth_numerator = CAMERA_HEIGHT * PROJECTION_PLANE_DIST
+        dv = self.texels_per_world * depth_numerator / ((offset + dy) ** 2)
+        if dv > 1.0:
+            return min(len(self.mips) - 1, int(math.log2(dv) + 0.5))
+        return 0
+
+    def _strip_error(self, offset, dy, h):
+        """dy から高さ h の帯を1本で描いたときの (横ずれpx, 縦の読み位置ずれテクセル, 読む行数)。
+
+        横: 帯は中央の行の横倍率で描く。上下端の行の理想の倍率との差が、画面端
+            （中心から screen_width/2）でのずれになる。クランプの掛かる行は倍率が一定なので、
+            消失点シフト0のときの min_width を下限として扱う。
+        縦: 帯は読んだ k 行を h 行へ等間隔に引き伸ばす（k は帯の中で理想のテクセルが進む量）。
+            各行の理想の読み位置との差の最大値。
+        """
+        floor = (self.screen_width + 2.0) / self.width
+        s_top = max(self._row_scale(offset, dy), floor)
+        s_bottom = max(self._row_scale(offset, dy + h - 1), floor)
+        shift_px = (self.screen_width / 2.0) * (s_bottom - s_top) / (s_bottom + s_top)
+
+        level = self._mip_level(offset, dy)
+        per_level = self.mips[level].get_height() / self.height
+        v0 = self._row_texel(offset, dy)
+        advance = [(self._row_texel(offset, dy + j) - v0) * per_level for j in range(h + 1)]
+        k = max(1, int(round(advance[h])))
+        texel_err = max(abs(j * k / h - advance[j]) for j in range(h + 1))
+        return shift_px, texel_err, k
+
+    def _build_strip_layout(self, offset):
+        """帯の割り付けを上から貪欲に決める。帯はミップレベルの境目を跨がない。
+
+        ピッチで帯全体が上へずれても画面下端まで届くよう、画面の高さぶん割り付けておく
+        （draw() は target_height で打ち切る）。
+        """
+        tol_px = GROUND_STRIP_TOLERANCE_PX / GROUND_STRIP_QUALITY
+        tol_texels = GROUND_STRIP_TOLERANCE_TEXELS / GROUND_STRIP_QUALITY
+        layout = []
+        dy = 0
+        while dy < self.screen_height:
+            level = self._mip_level(offset, dy)
+            h = 1
+            while (h < GROUND_STRIP_MAX_HEIGHT and dy + h < self.screen_height
+                   and self._mip_level(offset, dy + h) == level):
+                shift_px, texel_err, _ = self._strip_error(offset, dy, h + 1)
+                if shift_px > tol_px or texel_err > tol_texels:
+                    break
+                h += 1
+            layout.append((dy, h, level, self._strip_error(offset, dy, h)[2]))
+            dy += h
+        return layout
+
+    def _refresh_strip_layout(self):
+        """帯の上端位置（offset）が変わったときだけ、帯の割り付けを作り直す。"""
+        offset = self.start_y - HORIZON_Y
+        if offset == self._layout_offset:
+            return
+        self._layout_offset = offset
+        self.strip_layout = self._build_strip_layout(offset) if offset > 0 else []
 
     def draw(self, screen, pitch_offset_y=0, road_x_offset=0.0, player_z=0.0):
+        if self.engine == "mode7" and MODE7_AVAILABLE:
+            if self._mode7 is None:
+                self._mode7 = Mode7GroundRenderer(self)
+            self._mode7.draw(screen, pitch_offset_y, road_x_offset, player_z)
+            return
+
         # Raster Effect Loop for Perspective (Pseudo-3D)
 
         # Apply pitch to start_y
@@ -191,8 +331,6 @@ class GroundLayer:
         offset = self.start_y - HORIZON_Y
         if offset <= 0: return
 
-        strip_height = 2 # Performance vs Quality tradeoff. 2px is decent.
-
         # Loop from top of ground (current_start_y) to bottom of screen
         target_height = self.screen_height - current_start_y
         if target_height <= 0: return
@@ -214,9 +352,8 @@ class GroundLayer:
         # H はピッチで変わるため、ここ（描画時）で計算する必要がある。
         vp = road_x_offset * target_height / (target_height + offset)
 
-        # 横倍率の係数 a。テクスチャ幅がワールド上で GROUND_TEXTURE_WORLD_WIDTH 単位を
-        # 占めるように決める（導出は定数の説明を参照）。
-        a = GROUND_TEXTURE_WORLD_WIDTH / (self.width * CAMERA_HEIGHT)
+        # 横倍率 a*(offset+dy) は _row_scale。係数 a はテクスチャ幅がワールド上で
+        # GROUND_TEXTURE_WORLD_WIDTH 単位を占めるように決める（導出は定数の説明を参照）。
 
         # テクスチャの縦サンプリング。行dyが映すワールド奥行きは
         #     z(dy) = CAMERA_HEIGHT * PROJECTION_PLANE_DIST / (offset + dy)
@@ -226,12 +363,21 @@ class GroundLayer:
         # 符号を反転しているのは、テクスチャのv軸を手前向き（画面下へ進むほどvが増える）に
         # 保つため。画像の上下の向きが従来と変わらない。
         depth_numerator = CAMERA_HEIGHT * PROJECTION_PLANE_DIST
-        texels_per_world = self.width / GROUND_TEXTURE_WORLD_WIDTH
+        texels_per_world = self.texels_per_world
+
+        for dy, strip_h, level, src_h in self.strip_layout:
+            if dy >= target_height:
+                break
+            if dy + strip_h > target_height:
+                # 画面下端で切れる帯は、読む行数も同じ比率で減らす
+                src_h = max(1, int(round(src_h * (target_height - dy) / strip_h)))
+                strip_h = target_height - dy
+            # 横倍率と消失点シフトは帯の中央の行で求める（上下端のずれが半分ずつになる）
+            mid = dy + (strip_h - 1) / 2.0
 
-        for dy in range(0, target_height, strip_height):
             # 1. 消失点シフト計算（カーブ対応）
             # 上（dy=0）ほど強く、下（dy=target_height）ほど弱い
-            shift = vp * (1.0 - dy / target_height)
+            shift = vp * (1.0 - mid / target_height)
 
             # 2. Calculate Scale
             # Scale increases as we go down (dy increases)
@@ -248,86 +394,110 @@ class GroundLayer:
             # そこはミップマップがほぼ平均色まで潰しているため模様が無く見た目に出ない。
             min_width = 2.0 * max(center_x + shift,
                                   self.screen_width - center_x - shift) + 2.0
-            scale = max(a * (offset + dy), min_width / self.width)
+            scale = max(self._row_scale(offset, mid), min_width / self.width)
 
-            # 3. Source Strip Y - この行が映すワールド奥行きから直接求める
+            # 3. Source Strip Y - 帯の上端の行が映すワールド奥行きから直接求める
             world_z = player_z + depth_numerator / (offset + dy)
             v = -world_z * texels_per_world
 
-            # 4. ミップレベル選択。このストリップが跨ぐテクセル数 |dv| を strip_height 行で
-            # 読むので、1行あたり |dv|/strip_height テクセル分を平均したレベルが要る。
-            # level n の1行が元テクスチャの 2^n 行分にあたるので n = log2(|dv|/strip_height)。
-            dv = strip_height * texels_per_world * depth_numerator / ((offset + dy) ** 2)
-            level = 0
-            if dv > strip_height:
-                level = min(len(self.mips) - 1, int(math.log2(dv / strip_height) + 0.5))
+            # 4. ミップレベル選択（_mip_level。割り付け時に決めてある）。画面1行あたりに
+            # 進むテクセル数 |dv| ぶんを平均したレベルが要る。level n の1行が元テクスチャの
+            # 2^n 行分にあたるので n = log2(|dv|)。
             mip = self.mips[level]
             mip_h = mip.get_height()
             src_y = int(v * mip_h / self.height) % mip_h
 
             # 5. Handle Wrap-Around for Strip Height
-            current_strip_h = int(min(strip_height, target_height - dy))
-
-            # Source Rect
-            # We need to handle if src_y + strip_h > mip_h
-
-            if src_y + current_strip_h > mip_h:
-                # Part A (End of image)
-                h_a = int(mip_h - src_y)
-                self._draw_strip(screen, mip, dy, h_a, src_y, scale, center_x, pitch_offset_y, shift)
-
-                # Part B (Start of image)
-                h_b = int(current_strip_h - h_a)
-                self._draw_strip(screen, mip, dy + h_a, h_b, 0, scale, center_x, pitch_offset_y, shift)
-            else:
-
-                # Single part
-                self._draw_strip(screen, mip, dy, current_strip_h, src_y, scale, center_x, pitch_offset_y, shift)
-
-    def _draw_strip(self, screen, mip, dy, h, src_y, scale, center_x, pitch_offset_y, shift=0.0):
+            # 読む src_h 行がミップの下端を越えるなら、越えた分を先頭から読む（粗いミップは
+            # 数行しかないので何周もしうる）。画面側の行も読んだ行数の比で分ける。
+            read = 0
+            drawn = 0
+            while read < src_h:
+                take = min(src_h - read, mip_h - src_y)
+                end_h = int(round(strip_h * (read + take) / src_h))
+                self._draw_strip(screen, mip, dy + drawn, end_h - drawn, src_y, scale, center_x,
+                                 pitch_offset_y, shift, take)
+                read += take
+                drawn = end_h
+                src_y = 0
+
+    def _draw_strip(self, screen, mip, dy, h, src_y, scale, center_x, pitch_offset_y, shift=0.0,
+                    src_h=None):
+        """ミップの src_y から src_h 行（省略時は h 行）を読み、幅 width*scale・高さ h で描く。"""
         if h <= 0: return
+        if src_h is None: src_h = h
+        if src_h <= 0: return
+
+        # Scale Strip
+        # New width = self.width * scale
+        new_width = int(self.width * scale)
+        if new_width <= 0: return
+        # Draw Centered with Curve Shift（消失点シフト適用）
+        dest_x = center_x - (new_width // 2) + int(shift)
+        dest_y = self.start_y + int(pitch_offset_y) + dy
 
         # Extract Strip
-        # Full width of the source image (mip は縦だけ縮んでいるので幅は self.width のまま)
-        src_rect = pygame.Rect(0, src_y, self.width, h)
+        # mip は縦だけ縮んでいるので幅は self.width のまま。拡大する帯は幅が画面の数倍
+        # （近景では 8000px を超える）になり、拡大した大半が画面外に捨てられていた
+        # （地面の描画時間の約3/4）。拡大時は画面に載る列 [u0, u1) だけを切り出す。
+        # 元の列 u は拡大後に [u*new_width//width, (u+1)*new_width//width) を占めるので、
+        # 切り出した範囲もその境界に合わせて置く（列の継ぎ目の位置は最大1pxずれうる）。
+        u0, u1 = 0, self.width
+        x0, scaled_width = 0, new_width
+        if new_width > self.width:
+            u0 = max(0, -dest_x * self.width // new_width)
+            u1 = min(self.width, (self.screen_width - dest_x) * self.width // new_width + 1)
+            if u1 <= u0: return
+            x0 = u0 * new_width // self.width
+            scaled_width = u1 * new_width // self.width - x0
+        src_rect = pygame.Rect(u0, src_y, u1 - u0, src_h)
         try:
             strip_surf = mip.subsurface(src_rect)
         except ValueError:
             return
 
-        # Scale Strip
-        # New width = self.width * scale
-        new_width = int(self.width * scale)
-        if new_width <= 0: return
-
         # 縮小時(new_width < 元幅)は smoothscale（面積平均）を使う（既知の問題②対策）。
         # ニアレスト(scale)での縮小は列の間引きになり、フレーム毎に違う列が落ちて
         # 偽の細かいチラつきを生む。この偽HFが外向き拡大流の時間エイリアシングの
         # 主要因の一つだった（細かい模様だけ逆走・内向きに滑って見える）。
         # 拡大時は従来どおりニアレスト（近景のくっきり感を維持。bilinearだと眠くなる）。
         if new_width < self.width and self.antialias:
-            scaled_strip = pygame.transform.smoothscale(strip_surf, (new_width, h))
+            scaled_strip = pygame.transform.smoothscale(strip_surf, (scaled_width, h))
         else:
-            scaled_strip = pygame.transform.scale(strip_surf, (new_width, h))
-        
-        # Draw Centered with Curve Shift（消失点シフト適用）
-        dest_x = center_x - (new_width // 2) + int(shift)
-        dest_y = self.start_y + int(pitch_offset_y) + dy
-
-        
-        # Clip X to screen (optional, blit handles it but optimization?)
-        screen.blit(scaled_strip, (dest_x, dest_y))
+            scaled_strip = pygame.transform.scale(strip_surf, (scaled_width, h))
+        screen.blit(scaled_strip, (dest_x + x0, dest_y))
 
 class BackgroundManager:
+    # STAGE_CONFIG から作る派生キャッシュと依存キー（Track.CONFIG_DEPS と同じ扱い）。
+    #   layers       … 拡大済みの背景画像と、地面テクスチャの切り出し・ミップマップ（読み込みが重い）
+    #   layer_offset … 背景画像の縦位置と横の回り込み。画像は作り直さず値だけ差し替える
+    # 霧・グラデーションの色は描画のたびに cfg から読むので、保存した次のフレームから反映される。
+    CONFIG_DEPS = {
+        'layers': frozenset({'bg_image', 'ground_image'}),
+        'layer_offset': frozenset({'bg_offset_y', 'bg_wrap'}),
+    }
+
     def __init__(self, screen_width, screen_height):
         self.layers = []
         self.ground_layer = None # Experimental
+        self.ground_engine = GROUND_ENGINE  # ステージが変わって GroundLayer を作り直しても引き継ぐ
         self.current_stage_id = -1
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.ground_offset = GROUND_RENDER_OFFSET_Y
         self.road_x_offset = 0.0  # 帯の最上段を道路が貫く画面x（中央からのオフセット）
         self.camera_y_offset = 0.0  # 道路カメラ高さに連動するオフセット（消失点同期用）
+
+        # グラデーション帯のキャッシュ（_get_band）と、背景/地面からの色サンプリングのメモ。
+        # どちらも画像が変わる _load_layers で空にする。
+        self._band_cache = OrderedDict()
+        self._bg_color_memo = {}
+        self._ground_color_memo = None
+
+        # 空の合成キャッシュ（背景レイヤー＋上段グラデーション帯を画面サイズに合成したもの）。
+        # 詳細は _draw_sky。
+        self._sky_surface = None
+        self._sky_key = None
     
     def get_ground_top_depth(self):
         """地面テクスチャの帯の最上段が対応する奥行き z を返す（係留用）。
@@ -371,6 +541,16 @@ class BackgroundManager:
         # クランプ: 極端な高低差での描画位置ずれを防止（±15pxに制限）
         self.camera_y_offset = max(-15.0, min(15.0, raw_offset))
     
+    def toggle_ground_engine(self):
+        """地面の描画エンジンを strips ⇔ mode7 で切り替え、切り替え後の名前を返す。"""
+        if self.ground_engine == "strips" and MODE7_AVAILABLE:
+            self.ground_engine = "mode7"
+        else:
+            self.ground_engine = "strips"
+        if self.ground_layer:
+            self.ground_layer.engine = self.ground_engine
+        return self.ground_engine
+
     def adjust_ground_offset(self, delta):
         self.ground_offset += delta
         print(f"Ground Offset: {self.ground_offset}")
@@ -383,10 +563,32 @@ class BackgroundManager:
             return
             
         self.current_stage_id = stage_id
+        self._load_layers()
+
+    def apply_config_change(self, stage_id, keys):
+        """ステージ定義の変更を反映し、作り直したキャッシュ名を返す（Track.apply_config_change と同じ）。"""
+        if stage_id != self.current_stage_id:
+            return []
+        if keys & self.CONFIG_DEPS['layers']:
+            self._load_layers()
+            return ['layers', 'layer_offset']
+        if keys & self.CONFIG_DEPS['layer_offset']:
+            cfg = STAGE_CONFIG.get(stage_id, STAGE_CONFIG[1])
+            for layer in self.layers:
+                layer.base_y_offset = cfg.get("bg_offset_y", 0)
+                layer.wrap = cfg.get("bg_wrap", False)
+            return ['layer_offset']
+        return []
+
+    def _load_layers(self):
         self.layers.clear()
         self.ground_layer = None # Reset ground layer
+        self._band_cache.clear()
+        self._bg_color_memo.clear()
+        self._ground_color_memo = None
+        self._sky_key = None
         
-        cfg = STAGE_CONFIG.get(stage_id, STAGE_CONFIG[1])
+        cfg = STAGE_CONFIG.get(self.current_stage_id, STAGE_CONFIG[1])
         bg_file = cfg.get("bg_image")
         ground_file = cfg.get("ground_image", bg_file) # Use ground_image if exists, else fallback to bg
         bg_offset = cfg.get("bg_offset_y", 0)
@@ -400,7 +602,8 @@ class BackgroundManager:
             # Factor Y: 0.1 (Slight vertical shift)
             # 下のBackgroundLayer(bg_file, 0.06←ここは背景のy軸
             # BackgroundLayer(bg_file, 0.06 ...) -> Changed to 0.02 -> 0.01 (Half speed)
-            layer = BackgroundLayer(bg_file, 0.01, 0.1, self.screen_width, self.screen_height, base_y_offset=bg_offset)
+            layer = BackgroundLayer(bg_file, 0.01, 0.1, self.screen_width, self.screen_height,
+                                    base_y_offset=bg_offset, wrap=cfg.get("bg_wrap", False))
             self.layers.append(layer)
             
             # Experimental Ground Layer initialization
@@ -408,7 +611,14 @@ class BackgroundManager:
             self.ground_layer = GroundLayer(ground_file, self.screen_width, self.screen_height)
             # Sync with current dynamic offset
             self.ground_layer.set_start_y(HORIZON_Y + self.ground_offset)
-
+            self.ground_layer.engine = self.ground_engine
+
+        # 次のステージの画像を裏でデコードしておく（ステージ切り替え時の読み込み待ちを消す）
+        next_cfg = STAGE_CONFIG.get(self.current_stage_id + 1)
+        if next_cfg is not None:
+            # 派生テクスチャがキャッシュ済みなら元画像のデコードは要らない
+            assets.preload([k for k in stage_image_keys(next_cfg) if not is_cached(k)],
+                           alpha=False)
             
     def get_fog_color(self, stage_id):
         # Allow checking config override first
@@ -458,12 +668,18 @@ class BackgroundManager:
         layer = self.layers[0]
         # Image Y = Screen Y - base_offset
         img_y = int(max(0, min(layer.height - 1, screen_y - layer.base_y_offset)))
+        # 画像は読み込み後に変わらないので、一度読んだ行はメモから返す（get_at はロックを伴い遅い）
+        color = self._bg_color_memo.get(img_y)
+        if color is not None:
+            return color
         try:
-            return layer.image.get_at((layer.width // 2, img_y))[:3]
+            color = tuple(layer.image.get_at((layer.width // 2, img_y))[:3])
         except Exception as e:
             from .logger import log_warn
             log_warn(f"_sample_bg_color_at_y failed: {e}")
             return (100, 100, 100)
+        self._bg_color_memo[img_y] = color
+        return color
     
     def _sample_ground_color(self):
         """GroundLayerの平均的な色を返す（スクロールに連動しない固定色）
@@ -474,13 +690,43 @@ class BackgroundManager:
         """
         if not self.ground_layer:
             return (80, 60, 40)
+        if self._ground_color_memo is not None:
+            return self._ground_color_memo
         try:
             coarsest = self.ground_layer.mips[-1]
-            return coarsest.get_at((self.ground_layer.width // 2, 0))[:3]
+            self._ground_color_memo = tuple(coarsest.get_at((self.ground_layer.width // 2, 0))[:3])
         except Exception as e:
             from .logger import log_warn
             log_warn(f"_sample_ground_color failed: {e}")
             return (80, 60, 40)
+        return self._ground_color_memo
+
+    def _get_band(self, height, top_color, bottom_color, max_alpha, exponent, fade_in, mult):
+        """縦グラデーションの半透明帯（画面幅 x height）をキャッシュから返す。
+
+        行 i（t = i/height）の色は top_color→bottom_color の線形補間、alpha は
+        fade_in なら t**exponent、そうでなければ (1-t)**exponent に max_alpha*mult を掛けたもの。
+        mult は HAZE_MULT_STEPS 段に量子化してキーに含めるので、フェード中も作り直しは
+        段が変わったときだけで、一度通った段は再利用される。
+        """
+        mult = round(max(0.0, min(1.0, mult)) * HAZE_MULT_STEPS) / HAZE_MULT_STEPS
+        key = (height, tuple(top_color), tuple(bottom_color), max_alpha, exponent, fade_in, mult)
+        band = self._band_cache.get(key)
+        if band is not None:
+            self._band_cache.move_to_end(key)
+            return band
+
+        band = pygame.Surface((self.screen_width, height), pygame.SRCALPHA)
+        for i in range(height):
+            t = i / float(height)  # 0.0 ~ 1.0
+            color = self._interpolate_color(top_color, bottom_color, t)
+            fade = t ** exponent if fade_in else (1.0 - t) ** exponent
+            alpha = int(fade * max_alpha * mult)
+            pygame.draw.line(band, (*color, alpha), (0, i), (self.screen_width, i))
+        self._band_cache[key] = band
+        if len(self._band_cache) > GRADIENT_BAND_CACHE_SIZE:
+            self._band_cache.popitem(last=False)
+        return band
     
     def _compute_tunnel_haze_mult(self, player_z):
         """トンネル入口手前〜区間内〜出口後にかけて、地平線ヘイズの不透明度倍率(0〜1)を計算
@@ -544,10 +790,13 @@ class BackgroundManager:
             mult = min(mult, m)
         return mult
 
-    def _draw_gradient_band(self, screen, pitch_offset):
-        """GroundLayer開始位置の手前に2段階グラデーション帯を描画（透明度付き）"""
+    def _prepare_gradient_band(self, pitch_offset):
+        """GroundLayer開始位置の手前に置く上段グラデーション帯と、その画面yを返す（無ければ None）。
+
+        下段グラデ・霧グラデの設定もここで決めて保存する（描画は GroundLayer の後）。
+        """
         if not self.layers or not self.ground_layer:
-            return
+            return None
         
         # ステージ固有の設定を取得
         cfg = STAGE_CONFIG.get(self.current_stage_id, STAGE_CONFIG[1])
@@ -572,16 +821,10 @@ class BackgroundManager:
         blended_bottom_color = self._interpolate_color(bg_horizon_color, ground_color, 0.5)  # 50%平均
         
         # === 上段グラデーション（メイン） ===
-        gradient_surface = pygame.Surface((self.screen_width, stage_gradient_height), pygame.SRCALPHA)
-        for i in range(stage_gradient_height):
-            t = i / float(stage_gradient_height)  # 0.0 ~ 1.0
-            # 上端はtop_color、下端は平均色（blended_bottom_color）
-            color = self._interpolate_color(top_color, blended_bottom_color, t)
-            # 上端は透明、下端は半透明（非線形：上側が薄く、下側が濃い）
-            fade = t ** 2  # 2乗で上側が薄く、下側が濃い
-            alpha = int(fade * 180 * self._tunnel_haze_mult)  # 下グラデと同じ180に統一
-            pygame.draw.line(gradient_surface, (*color, alpha), (0, i), (self.screen_width, i))
-        screen.blit(gradient_surface, (0, gradient_start_y))
+        # 上端はtop_color、下端は平均色（blended_bottom_color）。
+        # 上端は透明、下端は半透明（2乗で上側が薄く、下側が濃い。最大は下グラデと同じ180）
+        gradient_surface = self._get_band(stage_gradient_height, top_color, blended_bottom_color,
+                                          180, 2, True, self._tunnel_haze_mult)
         
         # 上段グラデの高さを保存（デバッグ用）
         self._last_gradient_height = stage_gradient_height
@@ -623,6 +866,36 @@ class BackgroundManager:
             self._fog_enabled = False
             self._fog_base_start_y = None
             self._fog_height = None
+
+        return gradient_surface, gradient_start_y
+
+    def _draw_sky(self, screen, pitch_offset, combined_offset):
+        """背景レイヤーと上段グラデーション帯を、画面サイズの合成キャッシュ経由で描く。
+
+        背景は 1600x850 の画像の blit、帯は半透明 blit で、どちらも毎フレームの変化は
+        1px 未満のことが多い。整数のスクロール位置・ピッチ・帯（色と濃さの段）のどれかが
+        変わったときだけ合成し直し、それ以外のフレームは不透明な1枚を blit するだけにする。
+        ステージが変わると _load_layers がキーを捨てる。
+        """
+        band = self._prepare_gradient_band(combined_offset)
+        key = (tuple(layer.blit_position(pitch_offset) for layer in self.layers), band)
+        if self._sky_surface is None or self._sky_surface.get_size() != screen.get_size():
+            self._sky_surface = pygame.Surface(screen.get_size(), 0, screen)
+            self._sky_key = None
+        sky = self._sky_surface
+        if key != self._sky_key:
+            if self.layers and self.layers[0].covers_screen(pitch_offset):
+                sky.set_colorkey(None)
+            else:
+                # 画像が覆わない部分は main.py が塗った下地を見せる（その部分だけ抜き色にする）
+                sky.fill(SKY_CACHE_COLORKEY)
+                sky.set_colorkey(SKY_CACHE_COLORKEY)
+            for layer in self.layers:
+                layer.draw(sky, pitch_offset)
+            if band is not None:
+                sky.blit(band[0], (0, band[1]))
+            self._sky_key = key
+        screen.blit(sky, (0, 0))
     
     def _draw_lower_gradient(self, screen, pitch_offset):
         """下段グラデーションを描画（GroundLayerの後に呼び出す）"""
@@ -634,13 +907,9 @@ class BackgroundManager:
 
 
         
-        gradient_surface = pygame.Surface((self.screen_width, height), pygame.SRCALPHA)
-        for i in range(height):
-            t = i / float(height)  # 0.0 ~ 1.0
-            # 下段は非線形フェードアウト（2乗減衰：上側が濃く、下側が長く薄い）
-            fade = (1.0 - t) ** 2
-            alpha = int(fade * 180 * self._tunnel_haze_mult)  # 最大180で強めに
-            pygame.draw.line(gradient_surface, (*blended_color, alpha), (0, i), (self.screen_width, i))
+        # 下段は非線形フェードアウト（2乗減衰：上側が濃く、下側が長く薄い。最大180で強めに）
+        gradient_surface = self._get_band(height, blended_color, blended_color,
+                                          180, 2, False, self._tunnel_haze_mult)
         screen.blit(gradient_surface, (0, start_y))
     
     def _draw_fog_gradient(self, screen, pitch_offset):
@@ -653,16 +922,25 @@ class BackgroundManager:
         fog_start_y = getattr(self, '_fog_base_start_y', 370) + int(pitch_offset)
 
         
-        fog_surface = pygame.Surface((self.screen_width, fog_height), pygame.SRCALPHA)
         # 霧の色を地平線付近の背景色からサンプリング（白ではなく自然な色に）
         fog_color = self._sample_bg_color_at_y(HORIZON_Y - 5)
-        for i in range(fog_height):
-            t = i / float(fog_height)  # 0.0 ~ 1.0
-            # 不透明から透明へ非線形フェードアウト（2乗減衰で下部が長く薄い）
-            fade = (1.0 - t) ** 2  # 2乗で上部は濃く、下部は長く薄く
-            alpha = int(fade * 100 * self._tunnel_haze_mult)  # 最大100で強めに
-            pygame.draw.line(fog_surface, (*fog_color, alpha), (0, i), (self.screen_width, i))
+        # 不透明から透明へ非線形フェードアウト（2乗で上部は濃く、下部は長く薄く。最大100）
+        fog_surface = self._get_band(fog_height, fog_color, fog_color,
+                                     100, 2, False, self._tunnel_haze_mult)
         screen.blit(fog_surface, (0, fog_start_y))
+
+    def draw_fog_overlay(self, screen, fog_color):
+        """道路描画後の霧オーバーレイ（水平線から80px下まで）。main.py から Track の後に呼ぶ。
+
+        坑口の山が画面に写っている間（トンネル手前ほぼ全域〜内部）は最前面に霧の帯が
+        浮いて見えるため、_overlay_haze_mult で即座に非表示にする。
+        """
+        overlay_haze_mult = getattr(self, '_overlay_haze_mult', 1.0)
+        if not fog_color or overlay_haze_mult <= 0.0:
+            return
+        # 非線形グラデーション（三乗で上が濃く下が薄い。最大200で強め）
+        fog_overlay = self._get_band(80, fog_color, fog_color, 200, 3, False, overlay_haze_mult)
+        screen.blit(fog_overlay, (0, HORIZON_Y))
             
     def draw(self, screen, pitch_offset=0, player_z=None):
         # 道路カメラ高さと勾配ピッチのオフセットを合成
@@ -679,11 +957,8 @@ class BackgroundManager:
         # main.py側の霧オーバーレイ用（坑口の山が見える間は即座に非表示）
         self._overlay_haze_mult = self._compute_overlay_haze_mult(player_z)
         
-        for layer in self.layers:
-            layer.draw(screen, pitch_offset)  # 背景レイヤーは従来通り
-        
-        # 上段グラデーション帯を描画（GroundLayerの前）
-        self._draw_gradient_band(screen, combined_offset)
+        # 背景レイヤー＋上段グラデーション帯（GroundLayerの前）。合成済みキャッシュから描く
+        self._draw_sky(screen, pitch_offset, combined_offset)
         
         if self.ground_layer:
             self.ground_layer.draw(screen, combined_offset, self.road_x_offset,
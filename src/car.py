@@ -1,4 +1,6 @@
 import pygame
+from .assets import assets
+from .texture_cache import load_or_build
 from .track import (STRIPE_LENGTH, ROAD_WORLD_WIDTH, TUNNEL_WALL_LIMIT,
                     TUNNEL_WALL_PUSHBACK, TUNNEL_WALL_PUSHBACK_RATIO)
 
@@ -14,11 +16,36 @@ STEER_SENSITIVITY_LOW = 16.0  # 2026-07-17: 30km/h以下の低速域で曲がり
 STEER_SENSITIVITY_HIGH = 5.0
 STEER_LOW_SPEED_PLATEAU = 29.1  # 2026-07-17: 60km/h相当。この速度まではSTEER_SENSITIVITY_LOWを維持
 
+# 上の加減速・ステアリング等の定数は「60fps の1フレームあたりの量」で調整されている。
+# update() は dt_sec * PHYSICS_REFERENCE_HZ 倍して使うので、シミュレーションの刻み
+# （main.py の SIM_HZ）を変えても1秒あたりの挙動は変わらない。
+PHYSICS_REFERENCE_HZ = 60.0
+
 PLAYER_WIDTH = 60
 PLAYER_HEIGHT = 40
 
+# 車体の傾き（Effects.calculate_sway: ステア ±2.5° + オフロードの揺れ ±1°）は、
+# 読み込み時に CAR_POSE_STEP 度刻みで回転させておいた画像から選ぶ（320px 幅の車で
+# 端の位置の差は 0.7px 以下）。範囲外の角度だけはその場で回転する
+CAR_POSE_MAX_ANGLE = 4.0
+CAR_POSE_STEP = 0.25
+# アフターファイアの揺らぎ（大きさ 0.8〜1.2 倍・回転 ±10°）も段階ごとに作っておき、乱数で選ぶ
+AFTERFIRE_SCALES = (0.8, 0.9, 1.0, 1.1, 1.2)
+AFTERFIRE_ANGLES = (-10.0, -5.0, 0.0, 5.0, 10.0)
+
+def _fit_width(img, target_width):
+    """幅が target_width を超えるときだけ、縦横比を保って target_width へ縮小する。"""
+    w, h = img.get_size()
+    if w > target_width:
+        return pygame.transform.scale(img, (target_width, int(h * target_width / w)))
+    return img
+
+
 class Car:
-    def __init__(self, screen_width, screen_height, player_y):
+    def __init__(self, screen_width, screen_height, player_y, load_sprites=True):
+        # load_sprites=False はディスプレイ無しのシミュレーション用（src/sim.py）。画像を読まず、
+        # 物理が使う車幅（rect.width。タイヤ位置のオフロード判定に効く）は縮小後のスプライト幅
+        # int(screen_width * 0.4) とみなす（car.png はこれより大きく、必ず縮小される）
         self.x = 0.0
         self.z = 0.0
         self.speed = 0.0
@@ -30,14 +57,25 @@ class Car:
         self.wall_contact = 0  # トンネルの壁との接触方向（0=なし / -1=左 / +1=右）。update()で毎フレーム更新
         
         # Load Image
+        if not load_sprites:
+            target_width = int(screen_width * 0.4)
+            self.img = self.original_img = self.fire_img = None
+            self.rect = pygame.Rect(0, 0, target_width, target_width // 2)
+            self.rect.center = (screen_width // 2, int(screen_height * 0.82))
+        else:
+            self._load_sprites(screen_width, screen_height, player_y)
+
+        # Slope Physics State
+        self.dynamic_max_speed = NORMAL_MAX_SPEED
+        self.max_speed_boost = 5.0 # Approx 10km/h (10 * 0.485)
+            
+    def _load_sprites(self, screen_width, screen_height, player_y):
         try:
-            self.img = pygame.image.load("asset/car.png").convert_alpha()
+            # 縮小済みのスプライトはディスクにキャッシュされる（src/texture_cache.py）
             target_width = int(screen_width * 0.4)
-            orig_w, orig_h = self.img.get_size()
-            if orig_w > target_width:
-                ratio = target_width / orig_w
-                new_h = int(orig_h * ratio)
-                self.img = pygame.transform.scale(self.img, (target_width, new_h))
+            self.img, = load_or_build("car", ["car"], (target_width,),
+                                      lambda: [_fit_width(assets.image("car"), target_width)],
+                                      alpha=True)
             
             # Store original image for rotation
             self.original_img = self.img
@@ -45,14 +83,12 @@ class Car:
             
             # Load Afterfire Texture
             try:
-                self.fire_img = pygame.image.load("asset/afterfire.png").convert_alpha()
                 # Pre-scale if too large? Assuming reasonable size or scale in render.
                 # Let's ensure it's not huge.
-                fw, fh = self.fire_img.get_size()
                 target_fire_w = int(target_width * 0.3) # 30% of car width
-                if fw > target_fire_w:
-                    ratio = target_fire_w / fw
-                    self.fire_img = pygame.transform.scale(self.fire_img, (target_fire_w, int(fh * ratio)))
+                self.fire_img, = load_or_build(
+                    "afterfire", ["afterfire"], (target_fire_w,),
+                    lambda: [_fit_width(assets.image("afterfire"), target_fire_w)], alpha=True)
             except FileNotFoundError:
                 print("Warning: afterfire.png not found")
                 self.fire_img = None
@@ -65,12 +101,59 @@ class Car:
             self.fire_img = None
             
             self.fire_img = None
-            
-        # Slope Physics State
+        self._build_render_sprites()
+
+    def _build_render_sprites(self):
+        """render() が毎フレーム回転・拡縮していた画像を、読み込み時にまとめて作っておく。"""
+        # 車体の姿勢: 角度 -CAR_POSE_MAX_ANGLE〜+CAR_POSE_MAX_ANGLE を CAR_POSE_STEP 刻み
+        steps = int(round(CAR_POSE_MAX_ANGLE / CAR_POSE_STEP))
+        self.pose_angles = [k * CAR_POSE_STEP for k in range(-steps, steps + 1)]
+        self.pose_atlas = [pygame.transform.rotate(self.original_img, a) if a else self.original_img
+                           for a in self.pose_angles]
+
+        # ブレーキランプのにじみ（円なので回転させても見た目は変わらない。1枚だけ作る）
+        glow_radius = int(self.rect.width * 0.05)
+        self.glow_img = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
+        pygame.draw.circle(self.glow_img, (255, 0, 0, 100), (glow_radius, glow_radius), glow_radius)
+        pygame.draw.circle(self.glow_img, (255, 100, 100, 150), (glow_radius, glow_radius), int(glow_radius*0.6))
+        pygame.draw.circle(self.glow_img, (255, 255, 255, 200), (glow_radius, glow_radius), int(glow_radius*0.3))
+
+        # アフターファイア: 大きさ × 回転の組み合わせ
+        self.fire_variants = []
+        if self.fire_img:
+            fw, fh = self.fire_img.get_size()
+            for scale in AFTERFIRE_SCALES:
+                scaled = pygame.transform.scale(self.fire_img, (int(fw * scale), int(fh * scale)))
+                self.fire_variants.extend(pygame.transform.rotate(scaled, a) for a in AFTERFIRE_ANGLES)
+
+    def _pose_for(self, angle):
+        """angle に最も近い回転済みの画像と、その角度を返す。"""
+        k = int(round((angle + CAR_POSE_MAX_ANGLE) / CAR_POSE_STEP))
+        if 0 <= k < len(self.pose_atlas):
+            return self.pose_atlas[k], self.pose_angles[k]
+        return pygame.transform.rotate(self.original_img, angle), angle
+
+    def reset(self):
+        """ステージ開始時の状態に戻す。物理の結果はこの状態と操作列だけで決まる（リプレイの再計算用）。"""
+        self.x = 0.0
+        self.z = 0.0
+        self.speed = 0.0
+        self.steering_input = 0.0
+        self.offroad = self.offroad_l = self.offroad_r = False
+        self.braking = False
+        self.accel_pressed = False
+        self.wall_contact = 0
         self.dynamic_max_speed = NORMAL_MAX_SPEED
-        self.max_speed_boost = 5.0 # Approx 10km/h (10 * 0.485)
-            
-    def update(self, keys, track, dt_sec, joystick=None, stage_id=1):
+
+    def update(self, controls, track, dt_sec, stage_id=1, sim_time=0.0):
+        """1刻み（dt_sec）ぶん進める。controls は src/controls.py の ControlInput。
+
+        sim_time はステージ開始からのシミュレーション時刻（秒）。Stage 4 の砂のグリップ変動の
+        位相に使う。実時計を読まないので、同じ操作列からは常に同じ結果になる。
+        """
+        # 1フレーム(60fps)あたりで調整された量を、この刻みぶんに換算する係数
+        step = dt_sec * PHYSICS_REFERENCE_HZ
+
         # 1. Steering
         speed_ratio = self.speed / NORMAL_MAX_SPEED # Use base for steering sensitivity to keep feel consistent
         speed_ratio = max(0.0, min(1.0, speed_ratio))
@@ -91,39 +174,13 @@ class Car:
         if stage_id == 5 and self.speed >= 48.5:
              current_turn_speed *= 0.85 
         
-        # Calculate steering input (-1.0 to 1.0) for visual tilt
-        self.steering_input = 0.0
-        
-        # Keyboard Input
-        if keys[pygame.K_LEFT]:
-            self.steering_input = -1.0
-        if keys[pygame.K_RIGHT]:
-            self.steering_input = 1.0
-        
-        # Controller Input (Steering)
-        if joystick:
-            # 1. D-pad (Hat switch)
-            if joystick.get_numhats() > 0:
-                hat_x, _ = joystick.get_hat(0)
-                if hat_x != 0:
-                    self.steering_input = float(hat_x) # -1.0 or 1.0
-
-            # 2. Analog Stick (Axis 0) - Overrides D-pad for precision
-            axis_x = joystick.get_axis(0) 
-            if abs(axis_x) > 0.1: # Deadzone
-                self.steering_input = axis_x
-
-        # Combine if both pressed (though rare) in keyboard only case,
-        # but stick handles 0 naturally.
-        # [FIX 2026-07-17] This zeroing used to run AFTER applying steering to
-        # position below, so both-keys-pressed moved self.x while steering_input
-        # (used for visual tilt and replay recording) stayed at 0.
-        if keys[pygame.K_LEFT] and keys[pygame.K_RIGHT]:
-            self.steering_input = 0.0
+        # Steering input (-1.0 to 1.0), also used for visual tilt and replay recording.
+        # キーボード・コントローラーの解釈は src/controls.py の read_controls() にある
+        self.steering_input = controls.steer
 
         # Apply steering to position
         if abs(self.steering_input) > 0.01:
-            self.x += self.steering_input * current_turn_speed
+            self.x += self.steering_input * current_turn_speed * step
 
         # ... (Rest of Physics logic remains same)
         
@@ -138,32 +195,8 @@ class Car:
             drift_factor = 5.5 # Increased from 4.0 (~1.4x)
         
         drift = curve * speed_ratio * drift_factor 
-        self.x -= drift
-        
-        # 3. Offroad Logic
-        safe_width_half = (ROAD_WORLD_WIDTH / 2.0) * 0.9 - 500.0
-        
-        # [NEW] Kerb Collision Logic (Widen safe area on kerbs)
-        # Check if kerbs exist at current Z
-        has_left_curb, has_right_curb = track.get_curb_at(self.z, stage_id=stage_id)
-        
-        # Define Kerb Safe Zone (matching rendering width roughly)
-        # CURB_WIDTH_RATIO = 0.06 => ~200 units. 
-        # Using 190.0 (User requested +10px extension total)
-        kerb_safe_zone = 200.0 
-        
-        left_limit = -safe_width_half
-        if has_left_curb:
-            left_limit -= kerb_safe_zone # Widen left
-            
-        right_limit = safe_width_half
-        if has_right_curb:
-            right_limit += kerb_safe_zone # Widen right
+        self.x -= drift * step
         
-        # Tire offset from center (based on actual car width, matching render logic)
-        # Render uses: tire_ox = cw * 0.38 + 15, so we use similar calculation
-        tire_offset = self.rect.width * 0.38 + 15.0
-
         # トンネル内では車を横に出さない。坑外へ抜けると背景が見えて絵が破綻する。
         # 上限の決め方はTUNNEL_WALL_LIMITの定義を参照（アーチの実寸ではなく視界で決めている）。
         # オフロード判定（中心から約1025）より外なので、路肩へ出て減速する余地は残る。
@@ -177,7 +210,9 @@ class Car:
             wall_limit = TUNNEL_WALL_LIMIT
             overshoot = abs(self.x) - wall_limit
             if overshoot > 0.0:
-                pushback = max(TUNNEL_WALL_PUSHBACK, overshoot * TUNNEL_WALL_PUSHBACK_RATIO)
+                # 定数は1フレームあたり。率は刻みが細かいぶん複利で効くので指数で換算する
+                ratio = 1.0 - (1.0 - TUNNEL_WALL_PUSHBACK_RATIO) ** step
+                pushback = max(TUNNEL_WALL_PUSHBACK * step, overshoot * ratio)
                 if self.x > 0.0:
                     self.x = max(wall_limit, self.x - pushback)
                     self.wall_contact = 1
@@ -185,9 +220,8 @@ class Car:
                     self.x = min(-wall_limit, self.x + pushback)
                     self.wall_contact = -1
 
-        self.offroad_l = (self.x - tire_offset) < left_limit
-        self.offroad_r = (self.x + tire_offset) > right_limit
-        self.offroad = self.offroad_l or self.offroad_r
+        # 3. Offroad Logic
+        self.update_offroad(track, stage_id)
         
         # --- Phase 20: Slope Physics & Dynamic Max Speed ---
         
@@ -219,15 +253,11 @@ class Car:
         
         # [FIX 2025-12-11] Reduce gravity effect when braking to allow brakes to work on downhills
         # Check braking state early (before applying gravity)
-        braking_active = keys[pygame.K_s] or keys[pygame.K_DOWN] or keys[pygame.K_b]
-        if joystick and joystick.get_button(1):
-            braking_active = True
-            
-        if braking_active:
+        if controls.brake:
             # Reduce gravity acceleration to 20% when braking
             gravity_accel *= 0.2
         
-        self.speed += gravity_accel
+        self.speed += gravity_accel * step
         
         # Debug Log (Temp)
         # if abs(current_slope) > 0.001:
@@ -242,16 +272,7 @@ class Car:
         self.accel_pressed = False
         self.braking = False
         
-        # Check Brake Input (S or B or Down Arrow)
-        if keys[pygame.K_s] or keys[pygame.K_DOWN] or keys[pygame.K_b]:
-            self.braking = True
-
-        # See if controller adds to input
-        # Button 0 = A/Cross (Accel)
-        # Button 1 = B/Circle (Brake)
-        if joystick:
-            if joystick.get_button(1): # Brake
-                self.braking = True
+        self.braking = controls.brake
 
         if self.braking:
             # Braking Logic (Adjusted)
@@ -269,8 +290,8 @@ class Car:
             if stage_id == 4 and not self.offroad:
                 curr_brake *= 0.5 # 50% braking power on sand track
                 
-            self.speed -= curr_brake
-        elif (keys[pygame.K_UP] or keys[pygame.K_w] or keys[pygame.K_SPACE] or (joystick and joystick.get_button(0))) and self.speed < current_limit:
+            self.speed -= curr_brake * step
+        elif controls.throttle and self.speed < current_limit:
              # Speed Ranges (Internal Units):
              # 310 km/h ~ 150.0 units
              # 280 km/h ~ 136.0 units
@@ -290,7 +311,7 @@ class Car:
              if stage_id == 4 and self.speed < 107.0:
                  # Intermittent traction loss
                  import math
-                 current_time = pygame.time.get_ticks() / 1000.0
+                 current_time = sim_time
                  
                  # User Request: Prevent 0 acceleration (Stall at 0km/h).
                  # Previous: 0.6 + 0.4*sin -> min 0.2.
@@ -313,9 +334,9 @@ class Car:
                  
                  current_accel *= grip
                  
-             self.speed += current_accel
+             self.speed += current_accel * step
 
-        elif (keys[pygame.K_UP] or keys[pygame.K_w] or keys[pygame.K_SPACE] or (joystick and joystick.get_button(0))) and not self.offroad:
+        elif controls.throttle and not self.offroad:
              # [FIX 2026-07-17] On-road and already at/above current_limit while still
              # holding the accelerator. The previous code fell through to the coast-decel
              # branch below every time speed reached the cap (since neither this elif's
@@ -329,7 +350,7 @@ class Car:
         elif self.speed > current_limit:
              # Fast deceleration when offroad or coasting above max
              decel = DECEL_RATE * 4.0 if self.offroad else DECEL_RATE
-             self.speed -= decel
+             self.speed -= decel * step
         
         # Natural coasting deceleration when no input (and not braking)
         if not self.accel_pressed and not self.braking and self.speed > 0:
@@ -339,12 +360,53 @@ class Car:
             if stage_id == 4 and self.offroad:
                 coast_decel *= 1.2
                 
-            self.speed -= coast_decel
+            self.speed -= coast_decel * step
         
         if self.speed < 0: self.speed = 0
         
         # 5. Position Update
-        self.z += self.speed
+        self.z += self.speed * step
+
+    def update_offroad(self, track, stage_id=1):
+        """x のタイヤ位置から offroad_l / offroad_r / offroad を決める（縁石の上は路面扱い）。
+
+        Car.update のほか、接触で横に押されたあと（src/collisions.py）にも同じ限界で呼ぶ。"""
+        safe_width_half = (ROAD_WORLD_WIDTH / 2.0) * 0.9 - 500.0
+        
+        # [NEW] Kerb Collision Logic (Widen safe area on kerbs)
+        # Check if kerbs exist at current Z
+        has_left_curb, has_right_curb = track.get_curb_at(self.z, stage_id=stage_id)
+        
+        # Define Kerb Safe Zone (matching rendering width roughly)
+        # CURB_WIDTH_RATIO = 0.06 => ~200 units. 
+        # Using 190.0 (User requested +10px extension total)
+        kerb_safe_zone = 200.0 
+        
+        left_limit = -safe_width_half
+        if has_left_curb:
+            left_limit -= kerb_safe_zone # Widen left
+            
+        right_limit = safe_width_half
+        if has_right_curb:
+            right_limit += kerb_safe_zone # Widen right
+        
+        # Tire offset from center (based on actual car width, matching render logic)
+        # Render uses: tire_ox = cw * 0.38 + 15, so we use similar calculation
+        tire_offset = self.rect.width * 0.38 + 15.0
+
+        self.offroad_l = (self.x - tire_offset) < left_limit
+        self.offroad_r = (self.x + tire_offset) > right_limit
+        self.offroad = self.offroad_l or self.offroad_r
+
+    def settle_after_push(self, track, stage_id=1):
+        """update の後に x を横へ動かされたとき（接触の押し離し）、横位置で決まるフラグを合わせる。
+
+        wall_contact は押されてトンネルの壁に押し付けられていれば壁の向き、離れていれば 0。"""
+        self.update_offroad(track, stage_id)
+        if track.get_tunnel_at(self.z, stage_id=stage_id) and abs(self.x) >= TUNNEL_WALL_LIMIT:
+            self.wall_contact = 1 if self.x > 0.0 else -1
+        else:
+            self.wall_contact = 0
 
     def render(self, screen, angle=0.0, offset_x=0.0, offset_y=0.0, shadow_color=(95, 95, 95)):
         # Rotate image based on angle
@@ -353,7 +415,8 @@ class Car:
         
         if abs(angle) > 0.1:
             # Positive Angle = CCW rotation
-            target_img = pygame.transform.rotate(self.original_img, angle)
+            # タイヤ・ランプの位置も選んだ画像の角度に合わせる
+            target_img, angle = self._pose_for(angle)
             target_rect = target_img.get_rect(center=self.rect.center)
             
         # Apply Offset
@@ -515,15 +578,9 @@ class Car:
             # oy should be positive (down)
             oy_light = (self.rect.height * 0.15) - 20
             
-            # Glow Radius
-            glow_radius = int(self.rect.width * 0.05)
-            
-            # Create Glow Surface
-            glow_surf = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surf, (255, 0, 0, 100), (glow_radius, glow_radius), glow_radius)
-            pygame.draw.circle(glow_surf, (255, 100, 100, 150), (glow_radius, glow_radius), int(glow_radius*0.6))
-            pygame.draw.circle(glow_surf, (255, 255, 255, 200), (glow_radius, glow_radius), int(glow_radius*0.3))
-            
+            # Glow (_build_render_sprites で作成済み)
+            glow_surf = self.glow_img
+
             # Rotation Setup
             import math
             # Pygame's rotation is CCW. In screen coordinates (Y down), 
@@ -543,14 +600,10 @@ class Car:
                 ry = curr_ox * sin_a + curr_oy * cos_a
                 return cx + rx, cy + ry
 
-            # Rotate the glow surface itself as well (Sync tilt)
-            # Even though it is currently circular, this ensures partial transparency or future shapes align.
-            if abs(angle) > 1.0:
-                 rotated_glow = pygame.transform.rotate(glow_surf, angle)
-            else:
-                 rotated_glow = glow_surf
-                 
-            # Note: rotating a surface changes its size. calculate offset for blit center.
+            # にじみは同心円なので回転させない（以前は毎フレーム rotate していたが見た目は同じ）。
+            # 形を変えるときは _build_render_sprites で角度ごとの画像を作ること
+            rotated_glow = glow_surf
+
             rg_w, rg_h = rotated_glow.get_size()
             rg_ox = rg_w // 2
             rg_oy = rg_h // 2
@@ -578,18 +631,9 @@ class Car:
             import random
             if random.random() < 0.4: # Slight increase in flicker freq
                 # Load texture if not loaded (or handled in init, but let's check safety)
-                if hasattr(self, 'fire_img') and self.fire_img:
-                    # Scaling variation
-                    scale = random.uniform(0.8, 1.2)
-                    w = int(self.fire_img.get_width() * scale)
-                    h = int(self.fire_img.get_height() * scale)
-                    
-                    # Resize
-                    curr_fire = pygame.transform.scale(self.fire_img, (w, h))
-                    
-                    # Random Rotation (optional, maybe slight)
-                    rot_angle = random.uniform(-10, 10)
-                    curr_fire = pygame.transform.rotate(curr_fire, rot_angle)
+                if self.fire_variants:
+                    # Scaling / rotation variation (_build_render_sprites で作成済みの組み合わせから選ぶ)
+                    curr_fire = random.choice(self.fire_variants)
                     
                     # Position
                     # Left Exhaust
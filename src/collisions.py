@@ -0,0 +1,119 @@
+"""車同士の接触判定。z でソートした並びで、前後が車長以内の組だけを調べる。
+
+全部の組を調べると台数の2乗で増えるので、全車（プレイヤー + 対戦車）の添字を z の昇順に
+並べた order を持ち、ソート済みの z で「k 台先との距離が車長未満の組」を k = 1, 2, ... と
+調べる（k 台先に1組も無ければ、それより先にも無い）。並びは1刻みではほとんど変わらないので、
+毎刻み前回の order の順に並べた z を安定ソート（ほぼ整列済みの列に速い timsort）し直す。
+
+重なった組は横方向にだけ押し離す（前後の位置・速度は変えない）。押し離したあとは
+接触した車を Car.update と同じ横の限界（トンネル内の壁 TUNNEL_WALL_LIMIT。トンネル外は無制限）に
+収め、壁際の車のぶんはもう一方が押される（CONTACT_ITERATIONS 回繰り返して詰める）。
+もともと壁の外にいた車は、押されてさらに外へ出ない範囲に留めるだけで壁へは戻さない。
+
+numpy はオプション依存（対戦車と同じく、無ければ使われない）。
+"""
+
+try:
+    import numpy as np
+except ImportError:  # numpy 無しでは対戦車が出ないので、接触も起きない
+    np = None
+
+from .track import TUNNEL_WALL_LIMIT
+
+# 当たり判定の車体の大きさ（world units）。幅は対戦車のスプライトの見かけの幅と同じ、
+# 長さは RaceSim のゴール判定の先端（CAR_FRONT_OFFSET = 700）を車体の中心から測ったものにそろえる
+CAR_BODY_WIDTH = 800.0
+CAR_BODY_LENGTH = 1400.0
+# 押し離しと横の限界への収めを繰り返す回数（壁際で挟まれたときの詰め）
+CONTACT_ITERATIONS = 3
+
+
+class ZSortedIndex:
+    """全車の添字を z の昇順に並べた order を、刻みごとに前回の並びから直す。"""
+
+    def __init__(self):
+        self.order = None
+
+    def update(self, z):
+        if self.order is None or len(self.order) != len(z):
+            self.order = np.argsort(z, kind='stable')
+        else:
+            self.order = self.order[np.argsort(z[self.order], kind='stable')]
+        return self.order
+
+    def neighbour_pairs(self, z, reach):
+        """z の差が reach 未満の組を (前の車の添字, 後ろの車の添字) の配列で返す。update() の後に呼ぶ。"""
+        order = self.order
+        zs = z[order]
+        firsts = []
+        seconds = []
+        for k in range(1, len(zs)):
+            close = (zs[k:] - zs[:-k]) < reach
+            if not close.any():
+                break
+            i = close.nonzero()[0]
+            firsts.append(order[i])
+            seconds.append(order[i + k])
+        if not firsts:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+
+class ContactSolver:
+    """全車の x / z から、接触した組を横に押し離す。"""
+
+    def __init__(self, width=CAR_BODY_WIDTH, length=CAR_BODY_LENGTH):
+        self.width = width
+        self.length = length
+        self.index = ZSortedIndex()
+        self.contacts = 0  # 直前の resolve() で重なっていた組の数
+
+    def resolve(self, x, z, tunnel_bounds=None):
+        """x を押し離した結果の新しい配列を返す。
+
+        tunnel_bounds はトンネル区間の境界列 [開始, 終了, 開始, ...]（OpponentField.tunnel_bounds）。"""
+        self.index.update(z)
+        a, b = self.index.neighbour_pairs(z, self.length)
+        if len(a):
+            dx = x[b] - x[a]
+            hit = np.abs(dx) < self.width
+            a, b = a[hit], b[hit]
+        self.contacts = len(a)
+        if not len(a):
+            return x
+        before = x
+        x = x.copy()
+        # 押す向きは最初の位置関係で決める（x が同じなら z の大きい方を右へ）
+        side = np.where(x[b] - x[a] >= 0.0, 1.0, -1.0)
+        pushed = hi = lo = None
+        if tunnel_bounds is not None:
+            # 収めるのは接触した車だけ。壁の外にいる車は押されて外へ出ない範囲に留め、
+            # 戻すのは Car.update の押し戻し（少しずつ）に任せる
+            pushed = np.concatenate((a, b))
+            in_tunnel = (np.searchsorted(tunnel_bounds, z[pushed], side='right') & 1).astype(bool)
+            limit = np.where(in_tunnel, TUNNEL_WALL_LIMIT, np.inf)
+            hi = np.maximum(limit, before[pushed])
+            lo = np.minimum(-limit, before[pushed])
+        for _ in range(CONTACT_ITERATIONS):
+            overlap = self.width - (x[b] - x[a]) * side
+            np.maximum(overlap, 0.0, out=overlap)
+            push = overlap * side * 0.5
+            np.subtract.at(x, a, push)
+            np.add.at(x, b, push)
+            if pushed is not None:
+                x[pushed] = np.clip(x[pushed], lo, hi)
+        return x
+
+    def resolve_field(self, car, field):
+        """プレイヤーの Car（添字 0）と OpponentField をまとめて押し離し、結果を書き戻す。
+
+        プレイヤーが押されたときは、路肩・壁のフラグも押された先の位置で Car.update と同じ
+        限界で決め直す（土ぼこり・火花が押される前の位置のまま出ないように）。"""
+        x = self.resolve(np.concatenate(((car.x,), field.x)),
+                         np.concatenate(((car.z,), field.z)), field.tunnel_bounds)
+        pushed_x = float(x[0])
+        if pushed_x != car.x:
+            car.x = pushed_x
+            car.settle_after_push(field.track, field.stage_id)
+        field.x = x[1:]
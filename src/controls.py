@@ -0,0 +1,86 @@
+"""運転操作の入力を、デバイスから切り離した1刻みぶんの値にまとめる。
+
+以前は Car.update が pygame.key.get_pressed() の配列とジョイスティックを直接読んでいたため、
+物理を SDL 無しで回すことも、記録した入力で再現することもできなかった。Car.update は
+ControlInput だけを受け取り、キーボード・コントローラーの解釈は read_controls() に集める。
+"""
+
+from typing import NamedTuple
+
+import pygame
+
+# アナログスティックの遊び（これ以下の傾きは無視して D-pad / キーボードの値を使う）
+STICK_DEADZONE = 0.1
+
+
+class ControlInput(NamedTuple):
+    steer: float = 0.0       # -1.0（左）〜 1.0（右）
+    throttle: bool = False
+    brake: bool = False
+
+
+NO_INPUT = ControlInput()
+
+# リプレイに記録する1刻みの入力語（16bit）: 下位8bit = ステア（-127〜127 の2の補数）、
+# bit8 = アクセル、bit9 = ブレーキ。アナログのステアは 1/127 刻みに丸まるので、
+# プレイ中も quantize() した値で車を動かす（記録と再計算の入力を一致させる）。
+STEER_STEPS = 127
+THROTTLE_BIT = 1 << 8
+BRAKE_BIT = 1 << 9
+
+
+def pack_controls(controls):
+    steer = int(round(max(-1.0, min(1.0, controls.steer)) * STEER_STEPS))
+    word = steer & 0xFF
+    if controls.throttle:
+        word |= THROTTLE_BIT
+    if controls.brake:
+        word |= BRAKE_BIT
+    return word
+
+
+def unpack_controls(word):
+    steer = word & 0xFF
+    if steer >= 0x80:
+        steer -= 0x100
+    return ControlInput(steer / STEER_STEPS, bool(word & THROTTLE_BIT), bool(word & BRAKE_BIT))
+
+
+def quantize(controls):
+    """リプレイの入力語で表せる値に丸める。"""
+    return unpack_controls(pack_controls(controls))
+
+
+def read_controls(keys, joystick=None):
+    """キーボード（get_pressed の配列）とコントローラーから ControlInput を作る。"""
+    steer = 0.0
+
+    # Keyboard Input
+    if keys[pygame.K_LEFT]:
+        steer = -1.0
+    if keys[pygame.K_RIGHT]:
+        steer = 1.0
+
+    # Controller Input (Steering)
+    if joystick:
+        # 1. D-pad (Hat switch)
+        if joystick.get_numhats() > 0:
+            hat_x, _ = joystick.get_hat(0)
+            if hat_x != 0:
+                steer = float(hat_x)  # -1.0 or 1.0
+
+        # 2. Analog Stick (Axis 0) - Overrides D-pad for precision
+        axis_x = joystick.get_axis(0)
+        if abs(axis_x) > STICK_DEADZONE:
+            steer = axis_x
+
+    # [FIX 2026-07-17] Both arrow keys held cancel out (see Car.update history).
+    if keys[pygame.K_LEFT] and keys[pygame.K_RIGHT]:
+        steer = 0.0
+
+    # Button 0 = A/Cross (Accel), Button 1 = B/Circle (Brake)
+    brake = bool(keys[pygame.K_s] or keys[pygame.K_DOWN] or keys[pygame.K_b]
+                 or (joystick and joystick.get_button(1)))
+    throttle = bool(keys[pygame.K_UP] or keys[pygame.K_w] or keys[pygame.K_SPACE]
+                    or (joystick and joystick.get_button(0)))
+    return ControlInput(steer, throttle, brake)
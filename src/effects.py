@@ -1,28 +1,45 @@
 import pygame
 
+from .assets import assets
+from .particles import ParticlePool, PARTICLE_DUST, PARTICLE_SAND, PARTICLE_SPARK, DUST_GROWTH, DUST_DECAY
+from .particle_sprites import ParticleAtlas, SparkSprites, PARTICLE_SPRITE_ROTATIONS
+from .emitters import build_emitters
+from .track import STAGE_CONFIG
+
+# Pool sizes (slots are recycled oldest-first once full). The pools are
+# struct-of-arrays (src/particles.py), so these can grow into the thousands.
+EFFECTS_MAX_PARTICLES = 30
+EFFECTS_MAX_SPARKS = 50
+# Largest particle scales, for the sprite atlases: dust starts at <= 1.0 and grows
+# DUST_GROWTH/s for 1/DUST_DECAY s; sand is 0.5-0.9 x (1 + slip_ratio <= 1.0).
+DUST_MAX_SCALE = 1.0 + DUST_GROWTH / DUST_DECAY
+SAND_MAX_SCALE = 1.8
+# Sparks: largest base scale (0.075) x the peak of the grow/shrink curve (1.4)
+SPARK_MAX_SCALE = 0.075 * 1.4
+
 class Effects:
     def __init__(self, screen_width, screen_height):
         self.screen_width = screen_width
         self.screen_height = screen_height
         
         # --- Advanced Particle System Setup ---
-        self.max_particles = 30
-        self.particles = [{'active': False} for _ in range(self.max_particles)]
-        self.pool_index = 0
+        self.max_particles = EFFECTS_MAX_PARTICLES
+        self.particles = ParticlePool(self.max_particles)
         
         # --- Sparks (High Speed Curve) ---
-        self.max_sparks = 50
-        self.sparks = [{'active': False} for _ in range(self.max_sparks)]
-        self.spark_pool_index = 0
+        self.max_sparks = EFFECTS_MAX_SPARKS
+        self.sparks = ParticlePool(self.max_sparks)
         try:
-            self.spark_img = pygame.image.load("asset/spark.png").convert_alpha()
+            self.spark_img = assets.image("spark")
         except Exception as e:
             print(f"Failed to load spark.png: {e}")
             self.spark_img = None
+        # Pre-scaled, pre-flipped, pre-tinted spark sprites (src/particle_sprites.py)
+        self.spark_sprites = SparkSprites(self.spark_img, SPARK_MAX_SCALE) if self.spark_img else None
             
         # Load Texture
         try:
-            self.sand_sheet = pygame.image.load("asset/vfx_smoke_beige_sand.png").convert_alpha()
+            self.sand_sheet = assets.image("sand")
             # User provided single texture, no split.
             self.sand_textures = [self.sand_sheet]
         except Exception as e:
@@ -31,12 +48,24 @@ class Effects:
             
         # Load Generic Dust Texture
         try:
-            self.dust_sheet = pygame.image.load("asset/vfx_dirt_kickup.png").convert_alpha()
+            self.dust_sheet = assets.image("dust")
             self.dust_textures = [self.dust_sheet]
         except Exception as e:
             print(f"Failed to load vfx_dirt_kickup.png: {e}")
             self.dust_textures = [] # Fallback to circle
 
+        # Pre-scaled (and for sand, pre-rotated) sprites per texture, indexed like the
+        # texture lists. Dust is built up front; sand has rotations too, so it is filled
+        # on first use and capped (src/particle_sprites.py).
+        self.dust_atlases = [ParticleAtlas(t, DUST_MAX_SCALE) for t in self.dust_textures]
+        self.sand_atlases = [ParticleAtlas(t, SAND_MAX_SCALE, rotations=PARTICLE_SPRITE_ROTATIONS, lazy=True)
+                             for t in self.sand_textures]
+
+        # Emitters for the current stage (src/emitters.py), rebuilt when the stage or
+        # its 'surface' / 'emitters' settings change
+        self.emitters = []
+        self._emitter_key = None
+
     def add_spark(self, x, y, flip_x=False):
         """
         Spawn a spark particle at (x, y).
@@ -46,21 +75,19 @@ class Effects:
         import random
         import math
         
-        p = self.sparks[self.spark_pool_index]
-        self.spark_pool_index = (self.spark_pool_index + 1) % self.max_sparks
-        
-        p['active'] = True
-        p['x'] = x
-        p['y'] = y
-        p['flip_x'] = flip_x
+        pool = self.sparks
+        i = pool.spawn(PARTICLE_SPARK)
+        pool.x[i] = x
+        pool.y[i] = y
+        pool.flip_x[i] = flip_x
         
         # 7. Short/Variable Life (0.05s - 0.2s)
         # assuming 60FPS. 0.05s = 3 frames. 0.2s = 12 frames.
         # life unit: 1.0 = 1 second (approx).
         duration = random.uniform(0.05, 0.25)
-        p['life_max'] = duration
-        p['life'] = duration
-        
+        pool.life_max[i] = duration
+        pool.life[i] = duration
+
         # 6. Size Variations (Large, Medium, Small)
         # User req: Half of previous (approx 1/10). Previous 0.12-0.15 etc.
         # Check previous: Large 0.12-0.15. Medium 0.08-0.12. Small 0.04-0.08.
@@ -73,14 +100,14 @@ class Effects:
         else: # Small (40%)
             base_scale = random.uniform(0.02, 0.04)
             
-        p['scale_base'] = base_scale
-        p['scale'] = base_scale
-        
+        pool.scale_base[i] = base_scale
+        pool.scale[i] = base_scale
+
         # 5. Random Direction Direction (-Y is Up)
         # User req: "Like an afterfire", "Do not move it".
         # So velocity should be 0.
-        p['vx'] = 0.0
-        p['vy'] = 0.0
+        pool.vx[i] = 0.0
+        pool.vy[i] = 0.0
         
     def add_dust(self, x, y, steering_input):
         """
@@ -91,173 +118,112 @@ class Effects:
         import random
         
         # Keep original logic for generic dust
-        p = self.particles[self.pool_index]
-        self.pool_index = (self.pool_index + 1) % self.max_particles
-        
+        pool = self.particles
+        i = pool.spawn(PARTICLE_DUST)
+
         # Reset Particle
-        p['active'] = True
-        p['type'] = 'dust'
-        p['x'] = x
-        p['y'] = y
-        p['life'] = 1.0
-        p['scale'] = random.uniform(0.5, 1.0) # Initial scale
-        p['angle'] = random.uniform(0, 360)
-        
+        pool.x[i] = x
+        pool.y[i] = y
+        pool.life[i] = 1.0
+        pool.life_max[i] = 1.0
+        pool.scale[i] = random.uniform(0.5, 1.0) # Initial scale
+        pool.angle[i] = random.uniform(0, 360)
+
         # Velocity Flow Logic
         # Flow opposite to steering (Wind effect)
-        flow_force = -steering_input * 15.0 
+        flow_force = -steering_input * 15.0
         # Reduced dispersion to half (User Request: 2025-12-11)
-        p['vx'] = flow_force + random.uniform(-1.0, 1.0)
+        pool.vx[i] = flow_force + random.uniform(-1.0, 1.0)
         # Heavy Mud: Less floaty initial rise
-        p['vy'] = random.uniform(-2.0, -4.5) 
-        p['color'] = (100, 80, 50) # Mud color fallback
-        
-        # Select random texture
-        if self.dust_textures:
-            p['img'] = random.choice(self.dust_textures)
-        else:
-            p['img'] = None
+        pool.vy[i] = random.uniform(-2.0, -4.5)
+
+        # Select random texture (-1 = no texture, drawn as a gray circle)
+        pool.texture[i] = random.randrange(len(self.dust_textures)) if self.dust_textures else -1
 
     def add_sand_dust(self, x, y, slip_ratio, ground_color=(230, 210, 160)):
         """
         Spawn a SAND dust particle.
         slip_ratio: 0.0 to 1.0 (Controls count/size elsewhere, here just phys initial state)
+        Always spawns one particle: the sand emitter rates in src/emitters.py already
+        include the 30% thinning (User Request: reduce particle count for visibility).
         """
         import random
-        
-        # User Request: Reduce particle count for visibility
-        # Skip generation randomly (only 30% chance to spawn)
-        # Since particle size and duration increased, we need fewer particles.
-        if random.random() > 0.3:
-            return
-
-        p = self.particles[self.pool_index]
-        self.pool_index = (self.pool_index + 1) % self.max_particles
-        
-        
-        p['active'] = True
-        # print(f"[DEBUG] Spawning Sand Particle at {x}, {y}")
-        p['type'] = 'sand'
-        p['x'] = x
-        p['y'] = y
-        
+
+        pool = self.particles
+        i = pool.spawn(PARTICLE_SAND)
+        pool.x[i] = x
+        pool.y[i] = y
+
         # Life: 0.2 - 0.6s
         # 1.0 life unit = 1 sec approx in main loop logic?
         # In update: life -= 1.5 * dt -> means 1.0 / 1.5 = 0.66s.
         # We need specific control.
         # User Request: Slower fade out -> Extend duration
         duration = random.uniform(0.8, 1.5) 
-        p['life_max'] = duration
-        p['life'] = duration
-        
+        pool.life_max[i] = duration
+        pool.life[i] = duration
+
         # Physics
         # Random Angle (lateral spread)
         # Z-axis spread simulated by X spread
-        spread = random.uniform(-15.0, 15.0) 
-        p['vx'] = spread * 0.5 # Initial burst sideways
-        
+        spread = random.uniform(-15.0, 15.0)
+        pool.vx[i] = spread * 0.5 # Initial burst sideways
+
         # Movement
         # "Floating" -> Light sand/smoke
         # User: "Lighter gravity, more dispersion"
-        p['vy'] = random.uniform(-3.0, -1.0) # Initial upward float
-        
+        pool.vy[i] = random.uniform(-3.0, -1.0) # Initial upward float
+
         # Size
-        p['scale'] = random.uniform(0.5, 0.9) * (1.0 + slip_ratio) # Larger dust clouds
-        p['angle'] = random.uniform(0, 360)
-        
-        # Color variation (Earth color)
-        # Random RGB +/- 5-10%
-        r, g, b = ground_color
-        var = random.uniform(0.9, 1.1)
-        p['color'] = (min(255, int(r * var)), min(255, int(g * var)), min(255, int(b * var)))
-        
-        if self.sand_textures:
-            p['img'] = random.choice(self.sand_textures)
-        else:
-            p['img'] = None
+        pool.scale[i] = random.uniform(0.5, 0.9) * (1.0 + slip_ratio) # Larger dust clouds
+        pool.angle[i] = random.uniform(0, 360)
+
+        # ground_color is not stored: the sand texture is drawn untinted.
+        pool.texture[i] = random.randrange(len(self.sand_textures)) if self.sand_textures else -1
 
     def update_particles(self, dt):
         """
         Update all active particles.
+        Per-type physics (dust gravity/drag, sand drag/wind, spark gravity/scale)
+        lives in src/particles.py and runs over whole arrays at once.
         """
-        # Dust / Sand
-        for p in self.particles:
-            if not p['active']: continue
-            
-            p_type = p.get('type', 'dust')
-            
-            if p_type == 'dust':
-                # Dirt Kickup Logic (Heavy Mud-like)
-                # Apply Gravity
-                gravity = 1.5 
-                p['vy'] += gravity * dt * 60 * 0.1 # Gravity accelerates downward
-                
-                # Drag (Air Resistance) - Mud is heavy, loses speed faster
-                p['vx'] *= 0.92
-                p['vy'] *= 0.92
-                
-                # Move
-                p['x'] += p['vx'] * dt * 60 
-                p['y'] += p['vy'] * dt * 60
-                
-                # Animate
-                # Decay faster (Mud clumps disappear/fall quickly)
-                p['life'] -= 2.5 * dt 
-                # Grow slower (Don't expand like smoke)
-                p['scale'] += 0.5 * dt
-                
-            elif p_type == 'sand':
-                # Sand Logic
-                # 1. Physics
-                # Drag (Air Resistance) -> Less drag for smoke/dust to travel further
-                drag = 0.96 
-                p['vx'] *= drag
-                p['vy'] *= drag
-                
-                # Gravity (Light)
-                gravity = 0.2 
-                p['vy'] += gravity * dt * 60 * 0.05 # Very weak gravity
-                
-                # Wind (Random Lateral)
-                import random
-                if random.random() < 0.2: # More frequent wind fluctuation
-                    wind = random.uniform(-0.8, 0.8) # Stronger wind
-                    p['vx'] += wind
-                
-                # Update Pos
-                p['x'] += p['vx'] * dt * 60
-                p['y'] += p['vy'] * dt * 60
-                
-                # 2. Life & Alpha
-                p['life'] -= dt 
-                
-            if p['life'] <= 0:
-                p['active'] = False
-                
-        # Sparks
-        for s in self.sparks:
-            if not s['active']: continue
-            
-            s['x'] += s['vx'] * dt * 60
-            s['y'] += s['vy'] * dt * 60
-            
-            # Gravity?
-            s['vy'] += 1.0 * dt * 60 
-            
-            s['life'] -= dt # Decrease by time (seconds)
-            
-            # 2. Scale Animation (Grow start, Shrink end)
-            progress = 1.0 - (s['life'] / s['life_max']) # 0.0 -> 1.0
-            if progress < 0.2:
-                # Grow
-                s['scale'] = s['scale_base'] * (1.0 + progress * 2.0)
+        self.particles.update(dt)
+        self.sparks.update(dt)
+
+    def update_emitters(self, dt, car, stage_id, curve):
+        """
+        Spawn dust/sand/sparks for this frame from the car state.
+        Each emitter has a rate in particles per second and accumulates dt, so the
+        amount emitted does not depend on the frame rate (src/emitters.py).
+        """
+        cfg = STAGE_CONFIG.get(stage_id, STAGE_CONFIG[1])
+        key = (stage_id, cfg.get('surface'), cfg.get('emitters'))
+        if key != self._emitter_key:
+            self.emitters = build_emitters(cfg)
+            self._emitter_key = key
+        for emitter in self.emitters:
+            count = emitter.count(dt, car, curve)
+            if count:
+                self.emit(emitter, count, car)
+
+    def emit(self, emitter, count, car):
+        """
+        Spawn a batch of count particles at the emitter's anchor on the car sprite.
+        Sparks right of the car's centre are flipped to face outward.
+        """
+        import random
+
+        rect = car.rect
+        for _ in range(count):
+            x, y = emitter.anchor(rect)
+            if emitter.jitter:
+                x += random.uniform(-emitter.jitter, emitter.jitter)
+            if emitter.particle == 'spark':
+                self.add_spark(x, y, flip_x=x > rect.centerx)
+            elif emitter.particle == 'sand':
+                self.add_sand_dust(x, y, slip_ratio=emitter.slip)
             else:
-                # Shrink
-                s['scale'] = s['scale_base'] * (1.4 - (progress - 0.2) * 1.0)
-                if s['scale'] < 0: s['scale'] = 0
-            
-            if s['life'] <= 0:
-                s['active'] = False
+                self.add_dust(x, y, car.steering_input)
 
     def calculate_sway(self, steering_input, speed, normal_max_speed, time_sec, is_offroad):
         """
@@ -307,18 +273,18 @@ class Effects:
         """
         Render effects that appear behind the car (dust, smoke).
         """
-        for p in self.particles:
-            if not p['active']: continue
-            # if not p['img']: continue  -> Allow None for fallback drawing 
-            
+        pool = self.particles
+        for i in pool.live():
             # Alpha Logic
-            type_p = p.get('type', 'dust')
-            
-            if type_p == 'sand':
+            is_sand = pool.kind[i] == PARTICLE_SAND
+            atlases = self.sand_atlases if is_sand else self.dust_atlases
+            atlas = atlases[pool.texture[i]] if pool.texture[i] >= 0 else None
+            life = pool.life[i]
+
+            if is_sand:
                 # Custom Fade: 0 -> 0.7 -> 0
                 # Life goes from max -> 0
-                max_l = p.get('life_max', 0.5)
-                life = p['life']
+                max_l = pool.life_max[i]
                 if max_l <= 0: max_l = 0.01
                 
                 prog = 1.0 - (life / max_l) # 0.0 -> 1.0
@@ -340,41 +306,24 @@ class Effects:
                 
             else:
                 # Default Dust
-                alpha = int(255 * p['life'])
+                alpha = int(255 * life)
                 if alpha < 0: alpha = 0
             
-            scaled_surf = None
-            rect = None
-            
-            # Rendering with Texture
-            if p['img']:
-                # Scaling
-                w = int(p['img'].get_width() * p['scale'])
-                h = int(p['img'].get_height() * p['scale'])
-                
-                if w > 0 and h > 0:
-                    scaled_surf = pygame.transform.scale(p['img'], (w, h))
-                    
-                    # Rotation
-                    if type_p == 'sand':
-                        scaled_surf = pygame.transform.rotate(scaled_surf, p['angle'])
-                        
-                    scaled_surf.set_alpha(alpha)
-                    
-                    # Position (Center)
-                    rect = scaled_surf.get_rect(center=(int(p['x']), int(p['y'])))
-                    
-                    # Render
-                    if scaled_surf:
-                         screen.blit(scaled_surf, rect)
-                 
+            # Rendering with Texture: one atlas lookup (quantised scale/rotation) + one blit
+            if atlas is not None:
+                surf = atlas.get(pool.scale[i], pool.angle[i] if is_sand else 0.0)
+                if surf is not None:
+                    surf.set_alpha(alpha)
+                    w, h = surf.get_size()
+                    screen.blit(surf, (int(pool.x[i]) - w // 2, int(pool.y[i]) - h // 2))
+
             # Fallback for Generic Dust (No Image)
-            if not p['img'] and type_p == 'dust':
+            if atlas is None and not is_sand:
                  # Draw simple gray circle
-                 alpha = int(255 * p['life'])
+                 alpha = int(255 * life)
                  s = pygame.Surface((10, 10), pygame.SRCALPHA)
                  pygame.draw.circle(s, (200, 200, 200, alpha), (5, 5), 4)
-                 screen.blit(s, (int(p['x']), int(p['y'])))
+                 screen.blit(s, (int(pool.x[i]), int(pool.y[i])))
             
     def render_sparks(self, screen):
         """
@@ -387,65 +336,22 @@ class Effects:
         
         import random
         
-        for s in self.sparks:
-            if not s['active']: continue
-            
-            # 4. Color Shift & 1. Alpha Jitter
-            # Calc life progress
-            progress = 1.0 - (s['life'] / s['life_max'])
-            
-            # Color: White -> Yellow -> Orange -> Red-ish
-            # R: 255
-            # G: 255 -> 200 -> 100 -> 0
-            # B: 255 -> 0 -> 0 -> 0 
-            r = 255
-            if progress < 0.2:
-                # White to Yellow
-                g = 255
-                b = int(255 * (1.0 - (progress/0.2)))
-            elif progress < 0.6:
-                # Yellow to Orange
-                g = int(255 - 155 * ((progress-0.2)/0.4)) # 255 -> 100
-                b = 0
-            else:
-                # Orange to Red
-                g = int(100 * (1.0 - ((progress-0.6)/0.4))) # 100 -> 0
-                b = 0
-                
-            color = (r, max(0, g), max(0, b))
-            
-            # Constant Alpha Jitter (0.6 - 1.0)
-            alpha_jitter = random.uniform(0.6, 1.0)
-            
-            # Simple scaling
-            w = int(self.spark_img.get_width() * s['scale'])
-            h = int(self.spark_img.get_height() * s['scale'])
-            
-            # Ensure at least 1px visibility if alive but scaled down
-            if w <= 0: w = 1
-            if h <= 0: h = 1
-            
-            surf = pygame.transform.scale(self.spark_img, (w, h))
-            
-            # Flip if needed (Right side)
-            if s.get('flip_x', False):
-                surf = pygame.transform.flip(surf, True, False)
-            
-            # Tinting logic for Additive Blend:
-            # If we just BLEND_ADD, white texture adds full color.
-            # To tint, we multiply color first.
-            surf.fill(color, special_flags=pygame.BLEND_MULT)
-            
-            # Apply Alpha
-            # For ADD blending, alpha often modulates the intensity (black = invisible).
-            # But surface alpha works too.
-            surf.set_alpha(int(255 * alpha_jitter))
-            
-            dest_rect = surf.get_rect(center=(int(s['x']), int(s['y'])))
-            
+        pool = self.sparks
+        sprites = self.spark_sprites
+        for i in pool.live():
+            # 4. Color Shift (White -> Yellow -> Orange -> Red, by life progress),
+            # size and side are baked into the cached sprite
+            progress = 1.0 - (pool.life[i] / pool.life_max[i])
+            surf = sprites.get(pool.scale[i], progress, pool.flip_x[i])
+
+            # 1. Constant Alpha Jitter (0.6 - 1.0)
+            surf.set_alpha(int(255 * random.uniform(0.6, 1.0)))
+
             # 3. Additive Blending
-            screen.blit(surf, dest_rect, special_flags=pygame.BLEND_ADD)
-            
+            w, h = surf.get_size()
+            screen.blit(surf, (int(pool.x[i]) - w // 2, int(pool.y[i]) - h // 2),
+                        special_flags=pygame.BLEND_ADD)
+
     def render_overlay(self, screen):
         """
         Render effects that appear on top (speed lines, lens flare).
@@ -463,7 +369,5 @@ class Effects:
         Clear all active particles and sparks.
         Used when starting replay to prevent lingering effects.
         """
-        for p in self.particles:
-            p['active'] = False
-        for s in self.sparks:
-            s['active'] = False
+        self.particles.clear()
+        self.sparks.clear()
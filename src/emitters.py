@@ -0,0 +1,167 @@
+"""パーティクルのエミッタ: どの状態のときに・車のどこから・毎秒いくつ粒を出すかの表。
+
+以前は main() が毎フレーム `random.random() < 0.3` のような確率で粒を出していたので、
+1秒に出る数がフレームレートで変わっていた（120fps なら 60fps の2倍）。ここでは出す量を
+毎秒の粒数 rate で持ち、Emitter が rate × dt を端数まで積んで、整数になった分をその
+フレームにまとめて出す。どのフレームレートでも1秒あたりの数は同じになる。
+
+表は路面（ステージ定義の 'surface'。既定は SURFACE_ASPHALT）ごとに EMITTER_TABLE から選び、
+ステージ定義の 'emitters' でエミッタごとに項目を上書きできる（src/stages.cfg）:
+
+    'surface': 'sand',
+    'emitters': {'brake_dust': {'rate': 12.0}},
+
+エミッタ1つの項目:
+    when        出す条件（EMITTER_CONDITIONS の名前。車の状態とカーブから決まる）
+    min_speed / max_speed   出す速度の範囲（内部単位。境界は含まない）
+    anchor      出す位置（EMITTER_ANCHORS の名前。画面上の車の矩形のタイヤ・車体の端）
+    jitter      位置の横のばらつき（±px）
+    particle    'dust' / 'sand' / 'spark'
+    rate        毎秒の粒数（以前の1フレームの確率 × 60fps。砂けむりの間引き 30% も込み）
+    slip        砂けむりの大きさ（Effects.add_sand_dust の slip_ratio）
+"""
+
+import random
+
+from .logger import log_warn
+
+SURFACE_ASPHALT = 'asphalt'
+SURFACE_SAND = 'sand'
+
+# トンネルの壁を擦ったときに火花を出し始める速度（内部単位）。コーナリングの火花は
+# 最高速域(150.0 ≈ 310km/h)専用だが、壁擦りはそれより下から出す。
+# 注意: 壁(TUNNEL_WALL_LIMIT=1200)はオフロード境界(約1025)より外にあるため、壁に触れている
+# 間は必ずオフロード扱いで速度がOFFROAD_MAX_SPEED(32.4 ≈ 67km/h)に張り付く。中速域(100km/h
+# ≈ 48.5)を閾値にすると高速で突っ込んだ直後の減速中しか火花が出ないので、擦っている間ずっと
+# 出るよう路肩の砂埃と同じ10.0に合わせている。ここを32.4より上げると火花はほぼ出なくなる。
+WALL_SPARK_MIN_SPEED = 10.0
+# コーナリングの火花: この速度を超えて、カーブがきつい・ハンドルを大きく切っているとき
+CORNER_SPARK_MIN_SPEED = 150.0
+CORNER_SPARK_CURVE = 1.5
+CORNER_SPARK_STEER = 0.7
+
+# 条件: (car, curve) -> bool
+EMITTER_CONDITIONS = {
+    'offroad_left': lambda car, curve: car.offroad_l,
+    'offroad_right': lambda car, curve: car.offroad_r,
+    'accelerating': lambda car, curve: car.accel_pressed,
+    'braking': lambda car, curve: car.braking,
+    'curve_left': lambda car, curve: curve < -CORNER_SPARK_CURVE,
+    'curve_right': lambda car, curve: curve > CORNER_SPARK_CURVE,
+    'steer_left': lambda car, curve: car.steering_input < -CORNER_SPARK_STEER,
+    'steer_right': lambda car, curve: car.steering_input > CORNER_SPARK_STEER,
+    'wall_left': lambda car, curve: car.wall_contact < 0,
+    'wall_right': lambda car, curve: car.wall_contact > 0,
+}
+
+# 位置: 画面上の車の矩形 -> (x, y)。'wheels' は粒ごとに左右どちらかのタイヤ
+EMITTER_ANCHORS = {
+    'tyre_left': lambda rect: (rect.left + 5, rect.bottom - 25),
+    'tyre_right': lambda rect: (rect.right - 5, rect.bottom - 25),
+    'rear': lambda rect: (rect.centerx, rect.bottom - 10),
+    'wheels': lambda rect: (rect.centerx + random.choice((-1, 1)) * rect.width * 0.38, rect.bottom - 15),
+    'edge_left': lambda rect: (rect.left - 15, rect.bottom - 20),
+    'edge_right': lambda rect: (rect.right + 15, rect.bottom - 20),
+}
+
+PARTICLE_NAMES = ('dust', 'sand', 'spark')
+
+# どのステージにもある火花（高速コーナリングの内側・切った側、トンネルの壁擦り）
+_SPARK_EMITTERS = {
+    'corner_spark_left': {'when': 'curve_left', 'min_speed': CORNER_SPARK_MIN_SPEED,
+                          'anchor': 'edge_left', 'particle': 'spark', 'rate': 1.8},
+    'corner_spark_right': {'when': 'curve_right', 'min_speed': CORNER_SPARK_MIN_SPEED,
+                           'anchor': 'edge_right', 'particle': 'spark', 'rate': 1.8},
+    'steer_spark_left': {'when': 'steer_left', 'min_speed': CORNER_SPARK_MIN_SPEED,
+                         'anchor': 'edge_left', 'particle': 'spark', 'rate': 1.2},
+    'steer_spark_right': {'when': 'steer_right', 'min_speed': CORNER_SPARK_MIN_SPEED,
+                          'anchor': 'edge_right', 'particle': 'spark', 'rate': 1.2},
+    # 接触は連続するのでコーナリングより多く出す
+    'wall_spark_left': {'when': 'wall_left', 'min_speed': WALL_SPARK_MIN_SPEED,
+                        'anchor': 'edge_left', 'particle': 'spark', 'rate': 15.0},
+    'wall_spark_right': {'when': 'wall_right', 'min_speed': WALL_SPARK_MIN_SPEED,
+                         'anchor': 'edge_right', 'particle': 'spark', 'rate': 15.0},
+}
+
+EMITTER_TABLE = {
+    SURFACE_ASPHALT: {
+        # 路肩の土ぼこり（オフロードに出ているタイヤから）
+        'offroad_dust_left': {'when': 'offroad_left', 'min_speed': 10.0, 'anchor': 'tyre_left',
+                              'jitter': 10.0, 'particle': 'dust', 'rate': 18.0},
+        'offroad_dust_right': {'when': 'offroad_right', 'min_speed': 10.0, 'anchor': 'tyre_right',
+                               'jitter': 10.0, 'particle': 'dust', 'rate': 18.0},
+        **_SPARK_EMITTERS,
+    },
+    SURFACE_SAND: {
+        'offroad_dust_left': {'when': 'offroad_left', 'min_speed': 10.0, 'anchor': 'tyre_left',
+                              'jitter': 10.0, 'particle': 'sand', 'rate': 5.4, 'slip': 0.5},
+        'offroad_dust_right': {'when': 'offroad_right', 'min_speed': 10.0, 'anchor': 'tyre_right',
+                               'jitter': 10.0, 'particle': 'sand', 'rate': 5.4, 'slip': 0.5},
+        # 加速のスリップ（220km/h 未満。150km/h 未満は下の分を足して 1.5倍）
+        'accel_slip': {'when': 'accelerating', 'max_speed': 107.0, 'anchor': 'rear',
+                       'jitter': 40.0, 'particle': 'sand', 'rate': 0.45, 'slip': 0.8},
+        'accel_slip_low': {'when': 'accelerating', 'max_speed': 73.0, 'anchor': 'rear',
+                           'jitter': 40.0, 'particle': 'sand', 'rate': 0.225, 'slip': 0.8},
+        # ブレーキで砂を巻き上げる（左右どちらかのタイヤ）
+        'brake_dust': {'when': 'braking', 'min_speed': 10.0, 'anchor': 'wheels',
+                       'jitter': 10.0, 'particle': 'sand', 'rate': 8.1, 'slip': 0.6},
+        **_SPARK_EMITTERS,
+    },
+}
+
+
+class Emitter:
+    """エミッタ1つ: 条件が続いている間、rate × dt を端数まで積んで出す数を返す。"""
+
+    def __init__(self, name, spec):
+        """spec は EMITTER_TABLE の1項目。名前の間違いは ValueError。"""
+        self.name = name
+        try:
+            self.condition = EMITTER_CONDITIONS[spec['when']]
+            self.anchor = EMITTER_ANCHORS[spec['anchor']]
+        except KeyError as e:
+            raise ValueError(f"emitter {name!r}: unknown or missing {e}") from None
+        self.particle = spec['particle']
+        if self.particle not in PARTICLE_NAMES:
+            raise ValueError(f"emitter {name!r}: unknown particle {self.particle!r}")
+        self.rate = float(spec['rate'])
+        self.min_speed = spec.get('min_speed', float('-inf'))
+        self.max_speed = spec.get('max_speed', float('inf'))
+        self.jitter = spec.get('jitter', 0.0)
+        self.slip = spec.get('slip', 0.5)
+        self._carry = None  # 積んだ端数。条件が切れている間は None
+
+    def count(self, dt, car, curve):
+        """この dt の間に出す粒の数。"""
+        if not (self.min_speed < car.speed < self.max_speed and self.condition(car, curve)):
+            self._carry = None
+            return 0
+        if self._carry is None:
+            # 条件が始まった瞬間の位相はランダムにする（短い接触でも平均 rate × 時間 になる）
+            self._carry = random.random()
+        self._carry += self.rate * dt
+        n = int(self._carry)
+        self._carry -= n
+        return n
+
+
+def build_emitters(stage_cfg):
+    """ステージ定義（STAGE_CONFIG の1ステージ）の 'surface' / 'emitters' からエミッタの並びを作る。
+
+    知らない路面・エミッタ名・項目の間違いは warn.log に書いて飛ばす（実行中の編集で落ちない）。"""
+    surface = stage_cfg.get('surface', SURFACE_ASPHALT)
+    table = EMITTER_TABLE.get(surface)
+    if table is None:
+        log_warn(f"unknown surface {surface!r}; using {SURFACE_ASPHALT!r} emitters")
+        table = EMITTER_TABLE[SURFACE_ASPHALT]
+    overrides = stage_cfg.get('emitters') or {}
+    for name in overrides:
+        if name not in table:
+            log_warn(f"ignoring override for unknown emitter {name!r} on surface {surface!r}")
+    emitters = []
+    for name, spec in table.items():
+        try:
+            emitters.append(Emitter(name, {**spec, **overrides.get(name, {})}))
+        except (ValueError, TypeError) as e:
+            log_warn(f"skipping emitter {name!r}: {e}")
+    return emitters
@@ -0,0 +1,151 @@
+"""自己ベストの走りを半透明の車（ゴースト）として再生する。
+
+ステージをゴールするたびに、そのステージのこれまでで最速なら、1刻みごとの
+(z, x, speed) を float32 で並べた記録を ghosts/stage_<id>.ghost に書き出す
+（1ステージ 100KB 前後）。ステージ開始時にそのファイルを mmap で開き、
+描画のたびに経過時間に対応する刻みの値を2つだけ読んで補間する。記録をリストや
+配列へ読み込むことはしない（ファイルの中身はページ単位で必要なところだけ読まれる）。
+
+記録は固定刻みなので、時刻から刻み番号は割り算で決まる（探索は要らない）。
+ヘッダに記録時の刻みの周波数を持つので、SIM_HZ を変えた後でも古い記録をそのまま使える。
+
+ファイル形式:
+    ヘッダ GHOST_HEADER（リトルエンディアン）: マジック b'GHST', 形式の版, 刻みの周波数,
+        ステージ番号, 刻み数, タイム(秒)
+    本体: 刻みごとに float32 の (z, x, speed)。i 番目は i + 1 刻み進めた後の状態。
+        array / memoryview のネイティブのバイト順のまま（対象の PC はどれもリトルエンディアン）
+"""
+
+import mmap
+import os
+import struct
+from array import array
+
+from .logger import log_warn
+
+GHOST_DIR = "ghosts"
+GHOST_MAGIC = b'GHST'
+GHOST_FORMAT = 1
+GHOST_HEADER = struct.Struct('<4sHHHxxId')
+GHOST_FIELDS = 3  # z, x, speed
+
+
+def ghost_path(stage_id, ghost_dir=GHOST_DIR):
+    return os.path.join(ghost_dir, f"stage_{stage_id}.ghost")
+
+
+def read_best_time(stage_id, ghost_dir=GHOST_DIR):
+    """保存済みの記録のタイム。記録が無い・読めないときは None。"""
+    try:
+        with open(ghost_path(stage_id, ghost_dir), 'rb') as f:
+            header = f.read(GHOST_HEADER.size)
+        magic, version, _, _, _, best = GHOST_HEADER.unpack(header)
+    except (OSError, struct.error):
+        return None
+    if magic != GHOST_MAGIC or version != GHOST_FORMAT:
+        return None
+    return best
+
+
+class GhostRecorder:
+    """プレイ中の1ステージぶんの (z, x, speed) を刻みごとに array('f') に積む。"""
+
+    def __init__(self, hz):
+        self.hz = hz
+        self.stage_id = None
+        self.samples = array('f')
+
+    def start_stage(self, stage_id):
+        self.stage_id = stage_id
+        self.samples = array('f')
+
+    def record(self, car):
+        """sim.step の直後に呼ぶ。"""
+        self.samples.extend((car.z, car.x, car.speed))
+
+    def truncate(self, ticks):
+        """最初の ticks 刻みまでに切り詰める（巻き戻し用。src/rewind.py）。"""
+        del self.samples[ticks * GHOST_FIELDS:]
+
+    def save_if_best(self, stage_time, ghost_dir=GHOST_DIR):
+        """これまでの記録より速ければ書き出して True を返す。
+
+        同じステージの Ghost を開いたままだと置き換えられない環境（Windows）があるので、
+        先に close() しておくこと。"""
+        best = read_best_time(self.stage_id, ghost_dir)
+        if best is not None and best <= stage_time:
+            return False
+        path = ghost_path(self.stage_id, ghost_dir)
+        tmp_path = path + ".tmp"
+        try:
+            os.makedirs(ghost_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(GHOST_HEADER.pack(GHOST_MAGIC, GHOST_FORMAT, self.hz, self.stage_id,
+                                          len(self.samples) // GHOST_FIELDS, stage_time))
+                self.samples.tofile(f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log_warn(f"could not save ghost for stage {self.stage_id}: {e}")
+            return False
+        return True
+
+
+class Ghost:
+    """保存済みの記録を mmap で開き、経過時間で (z, x, speed) を引く。"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = None
+        self._views = []  # mmap を閉じる前に逆順で release する
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.hz, self.stage_id, self.ticks, self.time = \
+                GHOST_HEADER.unpack_from(self._map)
+            if magic != GHOST_MAGIC or version != GHOST_FORMAT:
+                raise ValueError(f"not a ghost file (format {version})")
+            end = GHOST_HEADER.size + self.ticks * GHOST_FIELDS * 4
+            if len(self._map) < end:
+                raise ValueError(f"truncated ({len(self._map)} < {end} bytes)")
+            self._views.append(memoryview(self._map))
+            self._views.append(self._views[0][GHOST_HEADER.size:end])
+            self._views.append(self._views[1].cast('f'))
+            self._samples = self._views[2]
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def open(cls, stage_id, ghost_dir=GHOST_DIR):
+        """ステージの記録を開く。記録が無い・壊れているときは None。"""
+        path = ghost_path(stage_id, ghost_dir)
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            log_warn(f"ignoring ghost {path}: {e}")
+            return None
+
+    def sample(self, t):
+        """ステージ開始から t 秒の (z, x, speed)。記録の外（ゴール後）は None。"""
+        f = t * self.hz - 1.0
+        if f < 0.0:
+            f = 0.0
+        i = int(f)
+        if i + 1 >= self.ticks:
+            return None
+        a = f - i
+        s = self._samples
+        k = i * GHOST_FIELDS
+        return (s[k] + (s[k + 3] - s[k]) * a,
+                s[k + 1] + (s[k + 4] - s[k + 1]) * a,
+                s[k + 2] + (s[k + 5] - s[k + 2]) * a)
+
+    def close(self):
+        self._samples = None
+        while self._views:
+            self._views.pop().release()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
@@ -0,0 +1,126 @@
+"""地面の "mode-7" 描画エンジン（NumPy による一括サンプリング）。
+
+GroundLayer.draw は画面を高さ可変の横帯（許容誤差に収まる範囲で最大
+GROUND_STRIP_MAX_HEIGHT 行、画面によって80〜110本ほど）に分け、帯ごとにミップを
+切り出して拡縮・blit する。こちらは同じ射影を「画面の各行・各列がテクスチャの
+どのテクセルを読むか」という添字配列として作り、全ミップを縦に積んだ1枚の配列から
+1回の fancy indexing で地面領域をまとめて取り出して surfarray へ書き込む。
+
+行ごとに変わらない量（奥行き・クランプ前の横倍率・ミップレベルと積んだ配列内の開始行）は
+帯の上端位置 offset が決まった時点で表にしておき、毎フレームはスクロール（player_z）と
+消失点シフト（road_x_offset）だけを行ごとのオフセットとして足す。
+
+帯方式との違い:
+    - 1px 行単位で奥行きを求めるので、帯方式の「帯の中ではテクセルが等間隔に進む」近似がない
+    - 横は点サンプル。帯方式が縮小行で掛けている smoothscale（横の面積平均）は無い。
+      縮小になるのは地平線直下の十数行だけで、そこは縦ミップがほぼ平均色まで潰している
+
+霧はここでは描かない（以前あった行ごとの霧色ブレンドは外した）。地平線の霞は、
+どちらのエンジンでも BackgroundManager.draw が地面の後に下段グラデーション・霧グラデーションを
+重ね、道路の後に main.py が BackgroundManager.draw_fog_overlay を重ねて作る。
+
+numpy はオプション依存。無い環境では MODE7_AVAILABLE が False になり、GroundLayer は
+帯方式のまま描画する。
+"""
+
+try:
+    import numpy as np
+except ImportError:  # numpy 無しでもゲームは帯方式で動く
+    np = None
+
+import pygame
+
+from .track import HORIZON_Y, CAMERA_HEIGHT, PROJECTION_PLANE_DIST
+
+MODE7_AVAILABLE = np is not None
+
+
+class Mode7GroundRenderer:
+    """GroundLayer のミップと射影パラメータを共有して、地面を一括サンプリングで描く。"""
+
+    def __init__(self, layer):
+        self.layer = layer
+
+        # 全ミップを縦に積んだテクセル配列 (合計高さ, width)。要素は画面と同じピクセル形式の
+        # 整数（ミップは convert() 済みの画像から作っているので、そのまま pixels2d へ書ける）。
+        # 行優先にしておくと、1行ぶんの読み出しがメモリ上で連続する。
+        # level n の行 r は stacked[mip_base[n] + r]。
+        self.mip_base = []
+        rows = []
+        base = 0
+        for mip in layer.mips:
+            self.mip_base.append(base)
+            rows.append(pygame.surfarray.array2d(mip).T)
+            base += mip.get_height()
+        self.stacked = np.ascontiguousarray(np.concatenate(rows, axis=0))
+        self._flat = self.stacked.ravel()
+        self.mip_heights = np.array([m.get_height() for m in layer.mips], dtype=np.int64)
+
+        self._lut_offset = None
+
+    def _build_row_tables(self, offset):
+        """行 dy ごとの不変量を表にする。offset（帯の上端位置）が変わったときだけ呼ぶ。"""
+        layer = self.layer
+        # ピッチで帯が上へずれても画面下端まで埋まるよう、画面の高さの2倍ぶん持っておく
+        n = 2 * layer.screen_height
+        dys = np.arange(n, dtype=np.float64)
+        self.row_depth = CAMERA_HEIGHT * PROJECTION_PLANE_DIST / (offset + dys)
+        self.row_scale = np.array([layer._row_scale(offset, dy) for dy in range(n)])
+        levels = np.array([layer._mip_level(offset, dy) for dy in range(n)], dtype=np.int64)
+        self.row_base = np.array(self.mip_base, dtype=np.int64)[levels]
+        self.row_mip_h = self.mip_heights[levels]
+        self._lut_offset = offset
+
+    def draw(self, screen, pitch_offset_y=0, road_x_offset=0.0, player_z=0.0):
+        layer = self.layer
+        offset = layer.start_y - HORIZON_Y
+        if offset <= 0:
+            return
+        if offset != self._lut_offset:
+            self._build_row_tables(offset)
+
+        current_start_y = layer.start_y + int(pitch_offset_y)
+        target_height = layer.screen_height - current_start_y
+        if target_height <= 0:
+            return
+        # 画面より上にはみ出た行は描かない（ピッチが大きく負のとき）
+        first = max(0, -current_start_y)
+        if first >= target_height:
+            return
+        rows = slice(first, target_height)
+        dys = np.arange(first, target_height, dtype=np.float64)
+
+        width = layer.width
+        screen_width = layer.screen_width
+        center_x = screen_width // 2
+
+        # 横: 帯方式と同じ消失点シフトと min_width クランプを行ごとに（導出は GroundLayer.draw）
+        vp = road_x_offset * target_height / (target_height + offset)
+        shift = vp * (1.0 - dys / target_height)
+        min_width = 2.0 * np.maximum(center_x + shift, screen_width - center_x - shift) + 2.0
+        scale = np.maximum(self.row_scale[rows], min_width / width)
+        new_width = (width * scale).astype(np.int64)
+        dest_x = center_x - new_width // 2 + np.trunc(shift).astype(np.int64)
+        xs = np.arange(screen_width, dtype=np.int64)
+        u = ((xs[None, :] - dest_x[:, None]) * width) // new_width[:, None]
+        np.clip(u, 0, width - 1, out=u)
+
+        # 縦: この行が映すワールド奥行きからテクスチャ座標を直接求める
+        world_z = player_z + self.row_depth[rows]
+        v = -world_z * layer.texels_per_world
+        mip_h = self.row_mip_h[rows]
+        src_y = np.mod(np.trunc(v * mip_h / layer.height).astype(np.int64), mip_h)
+        src_row = self.row_base[rows] + src_y
+
+        # 一括サンプリング: 平坦化した配列から (行, 列) の添字で1回で取り出す
+        u += (src_row * width)[:, None]
+        ground = self._flat.take(u)
+
+        y0 = current_start_y + first
+        y1 = min(layer.screen_height, screen.get_height(), current_start_y + target_height)
+        ground = ground[:y1 - y0]
+        pixels = pygame.surfarray.pixels2d(screen)
+        try:
+            pixels[:, y0:y1] = ground.T
+        finally:
+            del pixels  # 参照が残っている間は画面がロックされたまま
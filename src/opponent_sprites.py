@@ -0,0 +1,140 @@
+"""対戦車のスプライト: 縮尺を量子化した拡縮済み画像の表と、道路描画への差し込み。
+
+対戦車の見かけの幅は Track.project の scale に比例して変わる。1台ごとに毎フレーム
+pygame.transform.scale を呼ぶ代わりに、car.png（プレイヤーと同じ縮小済み画像）と
+ブレーキランプ点灯版を、幅が OPPONENT_SPRITE_STEP 倍ずつ違う段階であらかじめ縮小しておき、
+描画時は最も近い段を選んで blit するだけにする（段の差は6%で、拡縮のちらつきは見えない）。
+自己ベストのゴースト（src/ghost.py）も、半透明にした同じ段の画像で同じ経路から描く。
+
+奥行きの前後関係は Track.draw の奥→手前のセグメント描画に差し込んで解決する。
+prepare() で見えている車を z の昇順に並べておき、Track.draw が各セグメントを描く直前に
+draw_until() で「それより奥のセグメントにいる車」を描く。手前の丘やカーブの路面は
+車のあとに描かれるので、坂の頂上の向こうに隠れた車は正しく隠れる。
+"""
+
+import math
+
+import pygame
+
+from .collisions import CAR_BODY_WIDTH
+from .track import STRIPE_LENGTH, PROJECTION_PLANE_DIST, DRAW_DISTANCE
+
+# 対戦車の見かけの車幅（world units）。当たり判定の車幅と同じにしておく
+OPPONENT_WORLD_WIDTH = CAR_BODY_WIDTH
+# これより奥の車は描かない（フォグでほぼ背景色になる距離。道路の描画距離の半分）
+OPPONENT_DRAW_DISTANCE = DRAW_DISTANCE * 0.5
+# 縮小段の最小幅（px）と、隣り合う段の幅の比
+OPPONENT_SPRITE_MIN_WIDTH = 8
+OPPONENT_SPRITE_STEP = 1.06
+# ゴーストの不透明度（0-255）
+GHOST_ALPHA = 110
+
+
+def _brake_variant(img):
+    """ブレーキランプを焼き込んだ複製を作る（Car.render のブレーキランプと同じ位置・色）。"""
+    out = img.copy()
+    w, h = img.get_size()
+    glow_radius = max(1, int(w * 0.05))
+    glow = pygame.Surface((glow_radius * 2, glow_radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(glow, (255, 0, 0, 100), (glow_radius, glow_radius), glow_radius)
+    pygame.draw.circle(glow, (255, 100, 100, 150), (glow_radius, glow_radius), int(glow_radius * 0.6))
+    pygame.draw.circle(glow, (255, 255, 255, 200), (glow_radius, glow_radius), int(glow_radius * 0.3))
+    cx, cy = w / 2, h / 2 + h * 0.15 - 20
+    for ox in (w * 0.25 + 2.5, w * 0.38 - 6.0):
+        for side in (-1, 1):
+            out.blit(glow, (int(cx + side * ox) - glow_radius, int(cy) - glow_radius))
+    return out
+
+
+class OpponentSprites:
+    """縮小段ごとの (通常, ブレーキ, ゴースト) スプライトと、1フレームぶんの描画待ちの車の列。"""
+
+    def __init__(self, base_img):
+        base_w, base_h = base_img.get_size()
+        brake_img = _brake_variant(base_img)
+        widths = []
+        w = float(OPPONENT_SPRITE_MIN_WIDTH)
+        while w < base_w:
+            widths.append(int(round(w)))
+            w *= OPPONENT_SPRITE_STEP
+        widths.append(base_w)
+        self.normal = []
+        self.brake = []
+        self.ghost = []
+        for w in widths:
+            size = (w, max(1, int(round(base_h * w / base_w))))
+            if self.normal and self.normal[-1].get_size() == size:
+                # 小さい段は丸めで同じ幅になる。段の番号は対数で引くので、詰めずに同じ画像を並べる
+                self.normal.append(self.normal[-1])
+                self.brake.append(self.brake[-1])
+                self.ghost.append(self.ghost[-1])
+                continue
+            if size == (base_w, base_h):
+                self.normal.append(base_img)
+                self.brake.append(brake_img)
+            else:
+                self.normal.append(pygame.transform.smoothscale(base_img, size))
+                self.brake.append(pygame.transform.smoothscale(brake_img, size))
+            ghost = self.normal[-1].copy()
+            if ghost.get_flags() & pygame.SRCALPHA:
+                ghost.fill((255, 255, 255, GHOST_ALPHA), special_flags=pygame.BLEND_RGBA_MULT)
+            else:  # 画像が無いときの代用の矩形（Car._load_sprites）
+                ghost.set_alpha(GHOST_ALPHA)
+            self.ghost.append(ghost)
+        # 段の選び方: 幅 OPPONENT_SPRITE_MIN_WIDTH * STEP^k の k を対数で求めて丸める
+        self._level_gain = OPPONENT_WORLD_WIDTH / OPPONENT_SPRITE_MIN_WIDTH
+        self._inv_log_step = 1.0 / math.log(OPPONENT_SPRITE_STEP)
+        self._last_level = len(widths) - 1
+        self._queue = []
+
+    def level_for(self, scale):
+        """Track.project の scale に対応する縮小段の番号。"""
+        width_ratio = self._level_gain * scale  # 最小幅に対する見かけの幅の比
+        if width_ratio <= 1.0:
+            return 0
+        return min(self._last_level, int(math.log(width_ratio) * self._inv_log_step + 0.5))
+
+    def prepare(self, xs, zs, braking, player_z):
+        """このフレームに描く車を選び、z の昇順に並べる。xs / zs / braking は全台ぶんの配列。
+
+        戻り値は最も奥の車のセグメント番号（描く車がなければ -1）。"""
+        visible = (zs > player_z + PROJECTION_PLANE_DIST) & (zs < player_z + OPPONENT_DRAW_DISTANCE)
+        idx = visible.nonzero()[0]
+        idx = idx[zs[idx].argsort()]
+        normal, brake = self.normal, self.brake
+        self._queue = [(int(z // STRIPE_LENGTH), z, x, brake if b else normal)
+                       for z, x, b in zip(zs[idx].tolist(), xs[idx].tolist(), braking[idx].tolist())]
+        return self.next_segment
+
+    def clear(self):
+        self._queue = []
+
+    def add_ghost(self, x, z, player_z):
+        """prepare() の後に、ゴーストを1台ぶん z の順を保って差し込む。"""
+        if not (player_z + PROJECTION_PLANE_DIST < z < player_z + OPPONENT_DRAW_DISTANCE):
+            return
+        queue = self._queue
+        i = len(queue)
+        while i > 0 and queue[i - 1][1] > z:
+            i -= 1
+        queue.insert(i, (int(z // STRIPE_LENGTH), z, x, self.ghost))
+
+    @property
+    def next_segment(self):
+        return self._queue[-1][0] if self._queue else -1
+
+    def draw_until(self, screen, min_segment, project_on_road):
+        """セグメント番号 min_segment 以上にいる車を奥から描き、残りの最も奥のセグメント番号を返す。
+
+        project_on_road(z, x) は道路上の点の (screen_x, screen_y, scale) を返す（Track.draw が渡す）。"""
+        queue = self._queue
+        while queue and queue[-1][0] >= min_segment:
+            _, z, x, images = queue.pop()
+            p = project_on_road(z, x)
+            if p is None:
+                continue
+            sx, sy, scale = p
+            img = images[self.level_for(scale)]
+            w, h = img.get_size()
+            screen.blit(img, (int(sx - w * 0.5), int(sy - h)))
+        return queue[-1][0] if queue else -1
@@ -0,0 +1,325 @@
+"""AI の対戦車。全台の状態を NumPy 配列で持ち、1刻みに1回の配列演算でまとめて進める。
+
+Car.update はスカラーの Python で1台ぶんを計算する。同じ式を台数ぶん回すと 50 台で 50 倍に
+なるので、OpponentField は x / z / speed / ステア / オフロード / 壁接触 / 動的最高速を長さ N の
+配列で持ち、Car.update と同じ路面ルール（カーブのドリフト、勾配の重力、オフロードの速度上限、
+Stage 4 の砂・Stage 5 のウェット補正、縁石、トンネルの壁）を配列演算で適用する。
+式と適用順は Car.update と1対1に対応する（Car.update を変えたらここも合わせること。
+tests/test_opponents.py が1台ぶんを突き合わせる）。
+
+1刻みのコストは台数ではなく NumPy の呼び出し回数で決まるので、分岐はなるべく前もって表にしてある:
+    セグメントの表   ステージ・刻み幅・セグメントだけで決まる係数（ドリフト係数、縁石込みの
+                    オフロード境界、下り坂の最高速、重力）。コースの作り直し（Track.layout_version）と
+                    刻み幅の変更のときだけ作り直し、step では台ごとのセグメント番号で1回引く
+    速度の帯の表     ブレーキ・加速の強さと Stage 4 のスリップは速度の閾値（80/107/130/136/150）で
+                    段になるので、帯の番号で1回引く
+    折れ線           ステアの効き（Stage 5 の段差込み）は np.interp 1回
+台ごとに残る分岐（ブレーキ・加速・張り付き・惰性）は増分の配列への copyto で書き分ける。
+係数を先に掛けてあるぶん丸めの順序は Car.update と違う（差は相対 1e-9 未満）。
+呼び出しは1刻み約40回で、手元の計測で1台・50台・200台がいずれも 55〜95µs/刻み
+（表にする前は約60回・100〜160µs。スカラーの Car.update は1台 5µs 前後）。
+
+numpy はオプション依存。無い環境では OPPONENTS_AVAILABLE が False になり、対戦車は出ない。
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:  # numpy 無しでも1台のレースは動く
+    np = None
+
+from .car import (NORMAL_MAX_SPEED, OFFROAD_MAX_SPEED, ACCEL_RATE, DECEL_RATE, GRAVITY_FACTOR,
+                  BRAKE_RATE, STEER_SENSITIVITY_LOW, STEER_SENSITIVITY_HIGH,
+                  STEER_LOW_SPEED_PLATEAU, PHYSICS_REFERENCE_HZ)
+from .track import (STAGE_CONFIG, STRIPE_LENGTH, ROAD_WORLD_WIDTH, CURB_START_ZONE,
+                    CURB_CURVE_THRESHOLD, TUNNEL_WALL_LIMIT, TUNNEL_WALL_PUSHBACK,
+                    TUNNEL_WALL_PUSHBACK_RATIO)
+
+# スタート時の並び: プレイヤーの OPPONENT_GRID_START 前から2列で OPPONENT_GRID_GAP ずつ
+# 間隔を空けて置く（同じ列の前後・隣の列とも、車体 src/collisions.py の CAR_BODY_* が重ならない）
+OPPONENT_GRID_START = 1600.0
+OPPONENT_GRID_GAP = 1600.0
+OPPONENT_GRID_LANE = 450.0
+# AI の目標最高速の幅（NORMAL_MAX_SPEED に対する比）。台ごとに乱数で決める
+OPPONENT_SKILL_RANGE = (0.80, 0.97)
+# AI が先読みするカーブの距離（world units）と、その曲率に対する当て舵の強さ
+OPPONENT_LOOKAHEAD = 3000.0
+OPPONENT_CURVE_FEED = 0.45
+
+OPPONENTS_AVAILABLE = np is not None
+
+# step がセグメント番号で引く係数表（OpponentField._build_step_tables）の行
+_SEG_DRIFT = 0          # curve * drift_factor * step（speed_ratio を掛けて x から引く）
+_SEG_LEFT = 1           # 車の中心がこれより左ならオフロード（縁石込み・tire_offset 込み）
+_SEG_RIGHT = 2
+_SEG_TARGET = 3         # 動的最高速の目標 × lerp_factor
+_SEG_GRAVITY = 4        # 1刻みの重力による増速
+_SEG_GRAVITY_BRAKE = 5  # 同・ブレーキ中（20%）
+_SEG_UPHILL = 6         # Stage 4 の砂のスリップを弱める上り坂
+_SEG_ROWS = 7
+# 速度の帯で引く表の行
+_BAND_BRAKE = 0          # 1刻みのブレーキの増分（負）
+_BAND_BRAKE_OFFROAD = 1  # 同・オフロード（Stage 4 の路上の半減がない）
+_BAND_ACCEL = 2          # 1刻みの加速の増分
+_BAND_SLIP = 3           # Stage 4 の砂で加速が途切れる速度か
+_BAND_ROWS = 4
+
+
+class OpponentField:
+    def __init__(self, count, body_width, seed=0):
+        """body_width は当たり判定の車幅（Car の rect.width。タイヤ位置のオフロード判定に使う）。"""
+        if not OPPONENTS_AVAILABLE:
+            raise RuntimeError("AI opponents need NumPy (pip install numpy)")
+        self.count = count
+        self.tire_offset = body_width * 0.38 + 15.0
+        self.rng = np.random.default_rng(seed)
+        self.skill = self.rng.uniform(*OPPONENT_SKILL_RANGE, count)
+        self.lane = self.rng.uniform(-600.0, 600.0, count)
+        self.target_speed = self.skill * NORMAL_MAX_SPEED
+        self.brake_speed = self.target_speed + 8.0
+        self.track = None
+        self.stage_id = None
+        self._layout_version = None
+        self._no_wall = np.zeros(count, dtype=np.int8)
+        self.reset()
+
+    def reset(self):
+        n = self.count
+        self.x = np.zeros(n)
+        self.z = np.zeros(n)
+        self.speed = np.zeros(n)
+        self.steering_input = np.zeros(n)
+        self.offroad_l = np.zeros(n, dtype=bool)
+        self.offroad_r = np.zeros(n, dtype=bool)
+        self.offroad = np.zeros(n, dtype=bool)
+        self.braking = np.zeros(n, dtype=bool)
+        self.accel_pressed = np.zeros(n, dtype=bool)
+        self.wall_contact = np.zeros(n, dtype=np.int8)
+        self.dynamic_max_speed = np.full(n, NORMAL_MAX_SPEED)
+        self.finished = np.zeros(n, dtype=bool)
+        self.seg = np.zeros(n, dtype=np.intp)
+        self.prev_x, self.prev_z = self.x, self.z
+
+    def start_stage(self, track, stage_id, grid=True):
+        """ステージ開始。grid=True ならプレイヤーの前にスタートの隊列を組む。"""
+        self.track = track
+        self.stage_id = stage_id
+        self.reset()
+        if grid:
+            rows = np.arange(self.count)
+            self.z = (rows // 2) * OPPONENT_GRID_GAP + OPPONENT_GRID_START
+            self.x = np.where(rows % 2 == 0, -OPPONENT_GRID_LANE, OPPONENT_GRID_LANE).astype(float)
+            self.seg = self._segment_index(self.z)
+        self.prev_x, self.prev_z = self.x, self.z
+        self._refresh_tables()
+
+    def _refresh_tables(self):
+        """セグメント番号で引く表を作る。末尾に1つ「コース外」（カーブ0・勾配0・縁石なし）を足し、
+        範囲外の番号はそこへ丸める（Track.get_curve_at 等がコース外で返す値と同じ）。
+
+        step が台ごとに引く係数は、ステージと刻み幅で決まる分岐（ドリフト係数・縁石・下り坂の
+        最高速・重力・Stage 4 の上り坂）をここで済ませた値にしておく（_SEG_* の行）。"""
+        track = self.track
+        segs = track.segments
+        n = len(segs)
+        self.curve = np.zeros(n + 1)
+        self.slope = np.zeros(n + 1)
+        seg_z = np.full(n + 1, np.inf)
+        for i, seg in enumerate(segs):
+            self.curve[i] = seg['curve']
+            self.slope[i] = (seg['p2']['y'] - seg['p1']['y']) / STRIPE_LENGTH
+            seg_z[i] = seg['p1']['z']
+        start = seg_z < CURB_START_ZONE
+        self.curb_l = start | (self.curve < -CURB_CURVE_THRESHOLD)
+        self.curb_r = start | (self.curve > CURB_CURVE_THRESHOLD)
+        # 「右の縁石あり」は start か curve > TH。curve < -TH とは排他なので上の2行で Car と同じ
+        self.curb_l[n] = self.curb_r[n] = False
+        self.last_index = n
+        ranges = sorted(track.tunnel_ranges)
+        self.tunnel_bounds = np.array(ranges, dtype=float).ravel() if ranges else None
+        # AI の先読み: OPPONENT_LOOKAHEAD 先のカーブへの当て舵（コース外は 0）
+        ahead = int(OPPONENT_LOOKAHEAD / STRIPE_LENGTH)
+        self.ahead_feed = np.zeros(n + 1)
+        self.ahead_feed[:n - ahead] = self.curve[ahead:n] * OPPONENT_CURVE_FEED
+        self._layout_version = track.layout_version
+        self._tables_dt = None  # 係数表は次の step で作り直す
+
+    def _build_step_tables(self, dt_sec):
+        """刻み幅 dt_sec での係数表を作る（_refresh_tables の後と、刻み幅が変わったとき）。"""
+        stage_id = self.stage_id
+        step = dt_sec * PHYSICS_REFERENCE_HZ
+        cfg = STAGE_CONFIG.get(stage_id, STAGE_CONFIG[1])
+        seg = np.empty((_SEG_ROWS, self.last_index + 1))
+
+        # Centrifugal force: x -= curve * speed_ratio * drift_factor * step
+        drift_factor = 5.5 if stage_id == 5 else 4.0
+        seg[_SEG_DRIFT] = self.curve * (drift_factor * step)
+        # Offroad: タイヤ位置ではなく車の中心で比べられるよう tire_offset を寄せておく
+        safe_width_half = (ROAD_WORLD_WIDTH / 2.0) * 0.9 - 500.0
+        kerb_safe_zone = 200.0
+        seg[_SEG_LEFT] = -safe_width_half + self.tire_offset
+        seg[_SEG_RIGHT] = safe_width_half - self.tire_offset
+        if cfg.get('curb_enabled', False):
+            seg[_SEG_LEFT] -= self.curb_l * kerb_safe_zone
+            seg[_SEG_RIGHT] += self.curb_r * kerb_safe_zone
+        # Dynamic max speed: dms += (target - dms) * lerp（下り坂の target は +5.0、Car.max_speed_boost）
+        lerp_factor = min(1.0, 8.0 * dt_sec)
+        self._dms_keep = 1.0 - lerp_factor
+        seg[_SEG_TARGET] = (NORMAL_MAX_SPEED + (self.slope < -0.01) * 5.0) * lerp_factor
+        # Gravity（ブレーキ中は 20%）
+        gravity = -self.slope * GRAVITY_FACTOR * 10.0
+        seg[_SEG_GRAVITY] = gravity * step
+        seg[_SEG_GRAVITY_BRAKE] = gravity * 0.2 * step
+        # Stage 4 の砂: 急な上り坂ではスリップを弱める
+        seg[_SEG_UPHILL] = self.slope > 0.02
+        self._seg_table = seg
+
+        # Steering: 速度 -> turn * step の折れ線（Stage 5 は 48.5 以上で 0.85 倍に段差がつく）
+        low = STEER_SENSITIVITY_LOW * step
+        high = STEER_SENSITIVITY_HIGH * step
+        if stage_id == 5:
+            wet = 48.5
+            below_wet = np.nextafter(wet, 0.0)
+            turn_at = lambda v: low + (high - low) * (v - STEER_LOW_SPEED_PLATEAU) / (NORMAL_MAX_SPEED - STEER_LOW_SPEED_PLATEAU)
+            self._turn_xp = np.array((STEER_LOW_SPEED_PLATEAU, below_wet, wet, NORMAL_MAX_SPEED))
+            self._turn_fp = np.array((low, turn_at(below_wet), turn_at(wet) * 0.85, high * 0.85))
+        else:
+            self._turn_xp = np.array((STEER_LOW_SPEED_PLATEAU, NORMAL_MAX_SPEED))
+            self._turn_fp = np.array((low, high))
+
+        # Acceleration / braking: 速度の帯ごとの1刻みの増分（Car.update の速度による分岐の境目で区切る）
+        # 帯 k は (edges[k-1], edges[k]]。帯の中の1点で Car.update と同じ条件を評価する
+        edges = np.array((80.0, np.nextafter(107.0, 0.0), 130.0, 136.0, 150.0))
+        band_speed = np.append(0.0, edges + 1e-6)
+        brake = BRAKE_RATE * np.where(band_speed > 130.0, 0.4, np.where(band_speed > 80.0, 0.6, 1.0))
+        accel = ACCEL_RATE * np.where(band_speed > 150.0, 0.1, np.where(band_speed > 136.0, 0.5, 1.0))
+        band = np.empty((_BAND_ROWS, band_speed.size))
+        band[_BAND_BRAKE_OFFROAD] = -brake * step
+        # Sand: 路上ではブレーキが半分しか効かない
+        band[_BAND_BRAKE] = -brake * (0.5 if stage_id == 4 else 1.0) * step
+        band[_BAND_ACCEL] = accel * step
+        band[_BAND_SLIP] = (stage_id == 4) & (band_speed < 107.0)
+        self._band_table = band
+        self._speed_edges = edges
+
+        # 惰性の減速（上限超え = 0b01 / オフロード = 0b10 の組み合わせで引く）
+        coast = DECEL_RATE * 0.5
+        coast_offroad = coast * 1.2 if stage_id == 4 else coast
+        self._idle_decel = -np.array((coast, DECEL_RATE + coast,
+                                      coast_offroad, DECEL_RATE * 4.0 + coast_offroad)) * step
+        self._step = step
+        self._tables_dt = dt_sec
+
+    def _segment_index(self, z):
+        return (z / STRIPE_LENGTH).astype(np.intp)
+
+    def step(self, steer, throttle, brake, dt_sec, sim_time=0.0):
+        """全台を1刻み進める（Car.update の配列版）。steer / throttle / brake は長さ N の配列。"""
+        if self.track.layout_version != self._layout_version:
+            self._refresh_tables()
+        if dt_sec != self._tables_dt:
+            self._build_step_tables(dt_sec)
+        step = self._step
+        # 描画の補間用に直前の刻みを残す（x / z は毎刻み新しい配列になるので参照だけでよい）
+        self.prev_x, self.prev_z = self.x, self.z
+        speed = self.speed
+        # いまいるセグメントの係数（範囲外の番号は末尾の「コース外」に丸める）
+        seg = self._seg_table.take(self.seg, axis=1, mode='clip')
+
+        # 1. Steering（遊び |steer| <= 0.01 の車は動かさない）と 2. Centrifugal Force
+        self.steering_input = steer
+        dx = np.interp(speed, self._turn_xp, self._turn_fp)
+        dx *= steer * (np.abs(steer) > 0.01)
+        drift = np.minimum(speed / NORMAL_MAX_SPEED, 1.0)
+        drift *= seg[_SEG_DRIFT]
+        dx -= drift
+        x = self.x + dx
+
+        # Tunnel walls（壁の外に出ている車がいるときだけ区間を調べる）
+        wall = self._no_wall
+        if self.tunnel_bounds is not None and (x.max() > TUNNEL_WALL_LIMIT or x.min() < -TUNNEL_WALL_LIMIT):
+            # 区間の境界列 [開始, 終了, 開始, ...] の奇数番目の区間にいればトンネル内
+            in_tunnel = (np.searchsorted(self.tunnel_bounds, self.z, side='right') & 1).astype(bool)
+            overshoot = np.abs(x) - TUNNEL_WALL_LIMIT
+            hit = in_tunnel & (overshoot > 0.0)
+            if hit.any():
+                wall = np.zeros(self.count, dtype=np.int8)
+                ratio = 1.0 - (1.0 - TUNNEL_WALL_PUSHBACK_RATIO) ** step
+                pushback = np.maximum(TUNNEL_WALL_PUSHBACK * step, overshoot * ratio)
+                right = hit & (x > 0.0)
+                left = hit & ~(x > 0.0)
+                x = np.where(right, np.maximum(TUNNEL_WALL_LIMIT, x - pushback), x)
+                x = np.where(left, np.minimum(-TUNNEL_WALL_LIMIT, x + pushback), x)
+                wall[right] = 1
+                wall[left] = -1
+        self.wall_contact = wall
+
+        # 3. Offroad Logic
+        self.offroad_l = x < seg[_SEG_LEFT]
+        self.offroad_r = x > seg[_SEG_RIGHT]
+        offroad = self.offroad = self.offroad_l | self.offroad_r
+        self.x = x
+
+        # Slope physics: dynamic max speed and gravity
+        dms = self.dynamic_max_speed
+        dms *= self._dms_keep
+        dms += seg[_SEG_TARGET]
+        speed = speed + np.where(brake, seg[_SEG_GRAVITY_BRAKE], seg[_SEG_GRAVITY])
+
+        # 4. Acceleration / Deceleration / Braking
+        limit = np.where(offroad, OFFROAD_MAX_SPEED, dms)
+        band = self._band_table.take(self._speed_edges.searchsorted(speed), axis=1)
+        below = speed < limit
+        pedal = throttle > brake  # アクセルだけを踏んでいる
+        accelerating = pedal & below
+        # 上限に張り付いてアクセルを踏み続けている（路上のみ）
+        holding = pedal > (below | offroad)
+        accel_pressed = accelerating | holding
+
+        # この刻みの速度の増分。既定はブレーキもアクセルも効いていない車の減速
+        # （惰性の減速と上限超えの減速。_idle_decel を オフロード×2 + 上限超え で引く）
+        decel_key = offroad.view(np.int8) + offroad.view(np.int8)
+        decel_key += (speed > limit).view(np.int8)
+        delta = self._idle_decel.take(decel_key)
+        if self.stage_id == 4:
+            # Sand: 路上ではブレーキが半分、220km/h 未満は加速が途切れる（上り坂では弱める）
+            wave = math.sin(sim_time * 15.0)
+            grip = np.where(seg[_SEG_UPHILL], 0.85 + 0.15 * wave, 0.7 + 0.3 * wave)
+            np.copyto(delta, np.where(band[_BAND_SLIP], band[_BAND_ACCEL] * grip, band[_BAND_ACCEL]),
+                      where=accelerating)
+            np.copyto(delta, np.where(offroad, band[_BAND_BRAKE_OFFROAD], band[_BAND_BRAKE]), where=brake)
+        else:
+            np.copyto(delta, band[_BAND_ACCEL], where=accelerating)
+            np.copyto(delta, band[_BAND_BRAKE], where=brake)
+        speed += delta
+        np.copyto(speed, limit, where=holding)
+        np.maximum(speed, 0.0, out=speed)
+
+        self.braking = brake
+        self.accel_pressed = accel_pressed
+
+        # 5. Position Update（ゴールした車はその場で止める）
+        np.copyto(speed, 0.0, where=self.finished)
+        self.speed = speed
+        self.z = self.z + speed * step
+        self.seg = self._segment_index(self.z)
+        self.finished |= self.z >= self.track.goal_distance
+
+    def ai_controls(self):
+        """全台ぶんの操作を返す: 自分のレーンへ寄せつつ、先のカーブに当て舵をし、
+        台ごとの目標速度（skill）まで踏む。"""
+        steer = self.lane - self.x
+        steer /= 250.0
+        steer += self.ahead_feed.take(self.seg, mode='clip')
+        np.minimum(steer, 1.0, out=steer)
+        np.maximum(steer, -1.0, out=steer)
+        return steer, self.speed < self.target_speed, self.speed > self.brake_speed
+
+    def view(self, alpha):
+        """描画用に、直前の刻みと最新の刻みを alpha で補間した (x, z) を返す。"""
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_z + (self.z - self.prev_z) * alpha)
+
+    def advance(self, dt_sec, sim_time=0.0):
+        self.step(*self.ai_controls(), dt_sec, sim_time)
@@ -0,0 +1,155 @@
+"""パーティクルのスプライト表: 大きさ（と回転）を量子化した拡縮済み画像のアトラス。
+
+土ぼこり・砂けむりは粒ごとに大きさ（と砂けむりは角度）が違い、以前は毎フレーム粒ごとに
+pygame.transform.scale（と rotate）で新しい Surface を2枚作っていた。ここでは同じ
+テクスチャを、幅が PARTICLE_SPRITE_STEP 倍ずつ違う段と PARTICLE_SPRITE_ROTATIONS 段の
+回転で描いた画像を持っておき、描画は最も近い段を引いて不透明度を付けて blit するだけにする
+（src/opponent_sprites.py の縮小段と同じ引き方）。
+
+段の数 × 回転の数ぶんをすべて作ると大きいので、作り方は2通り:
+    lazy=False  作るときに全部描いておく（回転しない土ぼこり。段の数だけ）
+    lazy=True   初めて引かれた段だけ描き、PARTICLE_SPRITE_CACHE_SIZE 枚を超えたら
+                最も長く使われていないものから捨てる（回転する砂けむり。粒の角度は寿命の間
+                変わらないので、同じ粒は毎フレーム同じ画像を引く）
+
+火花（SparkSprites）は色が寿命の進み具合だけで決まる（白→黄→橙→赤。spark_color）ので、
+進み具合を SPARK_TINT_STEPS 段に量子化し、(大きさの段, 色の段, 左右反転) ごとに
+拡縮・反転・BLEND_MULT での色付けまで済ませた画像を lazy に持つ。1粒は加算の blit 1回になる。
+"""
+
+import math
+from collections import OrderedDict
+
+import pygame
+
+# 最小段の幅（px）と、隣り合う段の幅の比（ぼやけた粒なので車より粗くてよい）
+PARTICLE_SPRITE_MIN_WIDTH = 2
+PARTICLE_SPRITE_STEP = 1.08
+# 回転の段の数（360 / 24 = 15° 刻み）
+PARTICLE_SPRITE_ROTATIONS = 24
+# lazy=True の表に持つ画像の上限
+PARTICLE_SPRITE_CACHE_SIZE = 256
+# 火花の色の段の数（寿命 0.05〜0.25秒 = 60fps で3〜15フレームより細かく）と、色付け済みの画像の上限
+SPARK_TINT_STEPS = 32
+SPARK_SPRITE_CACHE_SIZE = 1024
+
+
+class ParticleAtlas:
+    """1枚のテクスチャの、量子化した (大きさ, 回転) ごとの画像。"""
+
+    def __init__(self, img, max_scale, rotations=1, lazy=False, cache_size=PARTICLE_SPRITE_CACHE_SIZE):
+        """max_scale はテクスチャの原寸に対する最大の倍率（それより大きい粒は最大の段で描く）。"""
+        self.img = img
+        self.base_w, self.base_h = img.get_size()
+        widths = []
+        w = float(PARTICLE_SPRITE_MIN_WIDTH)
+        top = max(1.0, self.base_w * max_scale)
+        while w < top:
+            widths.append(w)
+            w *= PARTICLE_SPRITE_STEP
+        widths.append(top)
+        self.widths = widths
+        self.rotations = rotations
+        self._angle_step = 360.0 / rotations
+        self._inv_log_step = 1.0 / math.log(PARTICLE_SPRITE_STEP)
+        self._last_level = len(widths) - 1
+        self.lazy = lazy
+        self.cache_size = cache_size
+        self._images = OrderedDict()
+        if not lazy:
+            for level in range(len(widths)):
+                for turn in range(rotations):
+                    self._images[level, turn] = self._render(level, turn)
+
+    def __len__(self):
+        return len(self._images)
+
+    def level_for(self, scale):
+        """倍率 scale に対応する段の番号。小さすぎて1px にならないときは None。"""
+        if int(self.base_w * scale) <= 0 or int(self.base_h * scale) <= 0:
+            return None
+        width_ratio = self.base_w * scale / PARTICLE_SPRITE_MIN_WIDTH
+        if width_ratio <= 1.0:
+            return 0
+        return min(self._last_level, int(math.log(width_ratio) * self._inv_log_step + 0.5))
+
+    def _render(self, level, turn):
+        w = self.widths[level]
+        size = (max(1, int(w)), max(1, int(self.base_h * w / self.base_w)))
+        surf = pygame.transform.scale(self.img, size)
+        if turn:
+            surf = pygame.transform.rotate(surf, turn * self._angle_step)
+        return surf
+
+    def get(self, scale, angle=0.0):
+        """倍率 scale・角度 angle（度）に最も近い画像。描くものがなければ None。
+
+        返す Surface は表の中のものなので、描く前に set_alpha で不透明度だけ変えてよい。"""
+        level = self.level_for(scale)
+        if level is None:
+            return None
+        return self.image(level, int(angle / self._angle_step + 0.5) % self.rotations)
+
+    def image(self, level, turn=0):
+        """段の番号 level・回転の段 turn の画像。"""
+        key = (level, turn)
+        images = self._images
+        surf = images.get(key)
+        if surf is None:
+            surf = images[key] = self._render(level, turn)
+            if len(images) > self.cache_size:
+                images.popitem(last=False)
+        elif self.lazy:
+            images.move_to_end(key)
+        return surf
+
+
+def spark_color(progress):
+    """寿命の進み具合（0.0→1.0）での火花の色: 白 → 黄（0.2）→ 橙（0.6）→ 赤。"""
+    if progress < 0.2:
+        g = 255
+        b = int(255 * (1.0 - progress / 0.2))
+    elif progress < 0.6:
+        g = int(255 - 155 * ((progress - 0.2) / 0.4))  # 255 -> 100
+        b = 0
+    else:
+        g = int(100 * (1.0 - (progress - 0.6) / 0.4))  # 100 -> 0
+        b = 0
+    return (255, max(0, g), max(0, b))
+
+
+class SparkSprites:
+    """火花の、量子化した (大きさ, 色, 左右反転) ごとの色付け済み画像。"""
+
+    def __init__(self, img, max_scale, tint_steps=SPARK_TINT_STEPS, cache_size=SPARK_SPRITE_CACHE_SIZE):
+        # 色を付ける前の拡縮済み画像（大きさの段の引き方もこちらを使う）
+        self.atlas = ParticleAtlas(img, max_scale, lazy=True, cache_size=cache_size)
+        self.tint_steps = tint_steps
+        self.tints = [spark_color(k / (tint_steps - 1)) for k in range(tint_steps)]
+        self.cache_size = cache_size
+        self._images = OrderedDict()
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, scale, progress, flip_x=False):
+        """返す Surface は表の中のものなので、描く前に set_alpha で不透明度だけ変えてよい。"""
+        atlas = self.atlas
+        level = atlas.level_for(scale)
+        if level is None:
+            level = 0  # 生きている火花は縮みきっても最小の段で見せる
+        tint = min(self.tint_steps - 1, max(0, int(progress * (self.tint_steps - 1) + 0.5)))
+        key = (level, tint, bool(flip_x))
+        images = self._images
+        surf = images.get(key)
+        if surf is not None:
+            images.move_to_end(key)
+            return surf
+        base = atlas.image(level)
+        # 加算合成では白いテクスチャはそのまま白く足されるので、先に色を掛けておく
+        surf = pygame.transform.flip(base, True, False) if flip_x else base.copy()
+        surf.fill(self.tints[tint], special_flags=pygame.BLEND_MULT)
+        images[key] = surf
+        if len(images) > self.cache_size:
+            images.popitem(last=False)
+        return surf
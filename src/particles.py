@@ -0,0 +1,176 @@
+"""パーティクル（土ぼこり・砂けむり・火花）のプール: 属性ごとに1本の配列を並べた struct-of-arrays。
+
+1粒 = 添字1つで、位置 (x, y)・速度 (vx, vy)・寿命 (life / life_max)・大きさ (scale / scale_base)・
+角度・種類（PARTICLE_DUST / PARTICLE_SAND / PARTICLE_SPARK）・生存フラグなどを、それぞれの
+配列の同じ添字に持つ。新しい粒はリングの次のスロットに上書きする（古い粒から消える）。
+
+更新は種類ごとにまとめて配列演算で行う（dust の重力と空気抵抗、sand の空気抵抗と横風、
+spark の重力と大きさの変化）。粒が数千あっても1フレームの更新は数十回の NumPy 演算で済む。
+
+配列の実体は array('d') / array('b')（標準ライブラリ）で、numpy があれば np.frombuffer で
+同じメモリを NumPy 配列として見て一括で更新する（コピーなし）。生成と描画は1粒ずつ
+array を直接読み書きする。numpy が無い環境では同じ式を1粒ずつのループで計算する。
+"""
+
+import random
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy 無しでは1粒ずつのループで更新する
+    np = None
+
+PARTICLE_DUST = 0
+PARTICLE_SAND = 1
+PARTICLE_SPARK = 2
+
+# 速度は60fps の1フレームあたりの px。重力は1秒あたりの速度の増分
+# dust: 重い泥のかたまり。強い空気抵抗ですぐ落ち、速く消え、ゆっくり広がる
+DUST_GRAVITY = 9.0
+DUST_DRAG = 0.92
+DUST_DECAY = 2.5
+DUST_GROWTH = 0.5
+# sand: 軽い砂けむり。空気抵抗が弱く、重力はごく弱く、ときどき横風を受ける
+SAND_GRAVITY = 0.6
+SAND_DRAG = 0.96
+SAND_WIND_CHANCE = 0.2  # 1フレームに横風を受ける確率
+SAND_WIND = 0.8
+# spark: 重力で落ちながら、寿命の最初の SPARK_GROW_UNTIL までで膨らみ、あとは縮む
+SPARK_GRAVITY = 60.0
+SPARK_GROW_UNTIL = 0.2
+
+# 倍精度の属性と、1バイトの属性（texture は Effects の画像リストの添字。-1 なら画像なし）
+FLOAT_FIELDS = ('x', 'y', 'vx', 'vy', 'life', 'life_max', 'scale', 'scale_base', 'angle')
+BYTE_FIELDS = ('kind', 'active', 'flip_x', 'texture')
+
+
+class ParticlePool:
+    """capacity 粒ぶんの配列。spawn() で次のスロットを取り、属性は配列へ直接書く。
+
+        i = pool.spawn(PARTICLE_DUST)
+        pool.x[i] = x
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        for name in FLOAT_FIELDS:
+            setattr(self, name, array('d', bytes(8 * capacity)))
+        for name in BYTE_FIELDS:
+            setattr(self, name, array('b', bytes(capacity)))
+        self._next = 0
+        if np is not None:
+            # 同じメモリの NumPy 配列（array の長さは変えないので、ずっと有効）
+            self._np = {name: np.frombuffer(getattr(self, name), dtype=np.float64)
+                        for name in FLOAT_FIELDS}
+            self._np.update((name, np.frombuffer(getattr(self, name), dtype=np.int8))
+                            for name in BYTE_FIELDS)
+            self._rng = np.random.default_rng()
+        else:
+            self._np = None
+
+    def spawn(self, kind):
+        """次のスロット（リングを一周していれば最も古い粒）を種類 kind の生きた粒にして添字を返す。"""
+        i = self._next
+        self._next = (i + 1) % self.capacity
+        self.kind[i] = kind
+        self.active[i] = 1
+        return i
+
+    def clear(self):
+        """全部消す。"""
+        for i in range(self.capacity):
+            self.active[i] = 0
+
+    def live(self):
+        """生きている粒の添字のリスト（スロット順）。"""
+        if self._np is not None:
+            return np.flatnonzero(self._np['active']).tolist()
+        return [i for i, alive in enumerate(self.active) if alive]
+
+    def __len__(self):
+        if self._np is not None:
+            return int(np.count_nonzero(self._np['active']))
+        return sum(self.active)
+
+    def update(self, dt):
+        """dt 秒ぶん動かし、寿命が尽きた粒を消す。"""
+        if self._np is not None:
+            self._update_arrays(dt)
+        else:
+            self._update_each(dt)
+
+    def _update_arrays(self, dt):
+        a = self._np
+        active = a['active'] != 0
+        if not active.any():
+            return
+        kind = a['kind']
+        x, y, vx, vy, life = a['x'], a['y'], a['vx'], a['vy'], a['life']
+        step = dt * 60.0
+
+        i = np.flatnonzero(active & (kind == PARTICLE_DUST))
+        if len(i):
+            vy[i] = (vy[i] + DUST_GRAVITY * dt) * DUST_DRAG
+            vx[i] *= DUST_DRAG
+            x[i] += vx[i] * step
+            y[i] += vy[i] * step
+            life[i] -= DUST_DECAY * dt
+            a['scale'][i] += DUST_GROWTH * dt
+
+        i = np.flatnonzero(active & (kind == PARTICLE_SAND))
+        if len(i):
+            gust = self._rng.random(len(i)) < SAND_WIND_CHANCE
+            vx[i] = vx[i] * SAND_DRAG + np.where(gust, self._rng.uniform(-SAND_WIND, SAND_WIND, len(i)), 0.0)
+            vy[i] = vy[i] * SAND_DRAG + SAND_GRAVITY * dt
+            x[i] += vx[i] * step
+            y[i] += vy[i] * step
+            life[i] -= dt
+
+        i = np.flatnonzero(active & (kind == PARTICLE_SPARK))
+        if len(i):
+            x[i] += vx[i] * step
+            y[i] += vy[i] * step
+            vy[i] += SPARK_GRAVITY * dt
+            life[i] -= dt
+            progress = 1.0 - life[i] / a['life_max'][i]
+            curve = np.where(progress < SPARK_GROW_UNTIL, 1.0 + progress * 2.0,
+                             np.maximum(0.0, 1.4 - (progress - SPARK_GROW_UNTIL)))
+            a['scale'][i] = a['scale_base'][i] * curve
+
+        a['active'][active & (life <= 0.0)] = 0
+
+    def _update_each(self, dt):
+        x, y, vx, vy, life = self.x, self.y, self.vx, self.vy, self.life
+        step = dt * 60.0
+        for i in range(self.capacity):
+            if not self.active[i]:
+                continue
+            kind = self.kind[i]
+            if kind == PARTICLE_DUST:
+                vy[i] = (vy[i] + DUST_GRAVITY * dt) * DUST_DRAG
+                vx[i] *= DUST_DRAG
+                x[i] += vx[i] * step
+                y[i] += vy[i] * step
+                life[i] -= DUST_DECAY * dt
+                self.scale[i] += DUST_GROWTH * dt
+            elif kind == PARTICLE_SAND:
+                vx[i] *= SAND_DRAG
+                if random.random() < SAND_WIND_CHANCE:
+                    vx[i] += random.uniform(-SAND_WIND, SAND_WIND)
+                vy[i] = vy[i] * SAND_DRAG + SAND_GRAVITY * dt
+                x[i] += vx[i] * step
+                y[i] += vy[i] * step
+                life[i] -= dt
+            else:
+                x[i] += vx[i] * step
+                y[i] += vy[i] * step
+                vy[i] += SPARK_GRAVITY * dt
+                life[i] -= dt
+                progress = 1.0 - life[i] / self.life_max[i]
+                if progress < SPARK_GROW_UNTIL:
+                    curve = 1.0 + progress * 2.0
+                else:
+                    curve = max(0.0, 1.4 - (progress - SPARK_GROW_UNTIL))
+                self.scale[i] = self.scale_base[i] * curve
+            if life[i] <= 0.0:
+                self.active[i] = 0
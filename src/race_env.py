@@ -0,0 +1,293 @@
+"""強化学習・物理定数の調整用の、gym 風のレース環境（reset / step）と、その並列版。
+
+RaceEnv は RaceSim（src/sim.py）1台を包み、1回の step で ENV_FRAME_SKIP 刻みだけ同じ操作で
+進めて、観測・報酬・終了フラグを返す（gymnasium と同じ並び）。
+
+    env = RaceEnv(stages=[1])
+    obs, info = env.reset()
+    obs, reward, terminated, truncated, info = env.step((steer, throttle, brake))
+
+観測は OBSERVATION_FIELDS の順の float の並び:
+    speed      速度 / NORMAL_MAX_SPEED
+    x          道路中心からの横位置 / 道幅の半分（±0.6 あたりからオフロード）
+    curve_*    車の位置・ENV_CURVE_LOOKAHEAD 先のカーブの曲率（セグメントの curve そのまま）
+    surface    路面の種類（SURFACE_ROAD / SURFACE_OFFROAD / SURFACE_WALL）
+報酬は進んだ距離（ENV_PROGRESS_UNIT あたり 1）から、オフロードにいた時間（秒）×
+ENV_OFFROAD_PENALTY を引いたもの。ゴールで terminated、max_time を過ぎたら truncated。
+
+VecRaceEnv は N 個の RaceEnv をワーカープロセスに分けて同時に進める。操作・観測・報酬・
+フラグは1枚の共有メモリ（multiprocessing.shared_memory）上の NumPy 配列に置き、プロセス間で
+やり取りするのは1 step につきワーカーごとに1バイトの合図だけにする（配列を pickle しない）。
+終わった環境はワーカーがその場で reset し、返す観測は次のエピソードの最初のものになる。
+
+どちらも画像・ディスプレイ・音を使わない（RaceSim.headless）ので、pygame.init も
+SDL_VIDEODRIVER の設定も要らない（dummy のままで動く）。1刻みは1コアで約6µs なので、
+1ワーカーで毎秒15万刻み前後、コア数ぶん並べて毎秒数十万刻みになる。
+
+VecRaceEnv は numpy が要る（オプション依存。無ければ VECTOR_ENV_AVAILABLE が False）。
+"""
+
+import multiprocessing
+import random
+import traceback
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:  # numpy 無しでも RaceEnv（1環境）は使える
+    np = None
+
+from .car import NORMAL_MAX_SPEED
+from .controls import ControlInput
+from .sim import RaceSim, MAX_STAGE_TIME
+from .timestep import SIM_HZ
+from .track import STAGE_CONFIG, ROAD_WORLD_WIDTH
+
+OBSERVATION_FIELDS = ('speed', 'x', 'curve_0', 'curve_1', 'curve_2', 'surface')
+# curve_0 / curve_1 / curve_2 を読む位置（車の z からの距離。world units）
+ENV_CURVE_LOOKAHEAD = (0.0, 3000.0, 9000.0)
+SURFACE_ROAD = 0
+SURFACE_OFFROAD = 1
+SURFACE_WALL = 2
+# 1 step で同じ操作のまま進める刻み数（120Hz で 30回/秒の判断）
+ENV_FRAME_SKIP = 4
+# 報酬: z がこれだけ進むごとに 1。最高速（150）で毎秒約9
+ENV_PROGRESS_UNIT = 1000.0
+# オフロードにいた1秒あたりの減点（オフロードの上限速度での進みの報酬 約2/秒 より大きくする）
+ENV_OFFROAD_PENALTY = 5.0
+
+ACTION_SIZE = 3  # steer, throttle, brake（throttle / brake は 0.5 より大きければ踏む）
+
+VECTOR_ENV_AVAILABLE = np is not None
+
+
+def to_controls(action):
+    """ControlInput か (steer, throttle, brake) の並びを ControlInput にする。"""
+    if isinstance(action, ControlInput):
+        return action
+    steer, throttle, brake = action
+    return ControlInput(max(-1.0, min(1.0, float(steer))), throttle > 0.5, brake > 0.5)
+
+
+class RaceEnv:
+    """RaceSim 1台ぶんの gym 風の環境。"""
+
+    def __init__(self, stages=None, hz=SIM_HZ, frame_skip=ENV_FRAME_SKIP, max_time=MAX_STAGE_TIME,
+                 seed=None):
+        """stages はエピソードごとに選ぶステージの候補（既定は全ステージ。seed で選び方が決まる）。"""
+        self.sim = RaceSim.headless(hz)
+        self.stages = tuple(sorted(STAGE_CONFIG) if stages is None else stages)
+        self.frame_skip = frame_skip
+        self.max_ticks = int(max_time * hz)
+        self.rng = random.Random(seed)
+        self.offroad_penalty = ENV_OFFROAD_PENALTY * self.sim.dt  # 1刻みあたり
+
+    def reset(self, stage_id=None):
+        """新しいエピソードを始め、(観測, info) を返す。"""
+        if stage_id is None:
+            stage_id = self.rng.choice(self.stages)
+        self.sim.start_stage(stage_id)
+        return self.observe(), {'stage_id': stage_id}
+
+    def step(self, action):
+        """(観測, 報酬, terminated, truncated, info) を返す。"""
+        sim = self.sim
+        car = sim.car
+        controls = to_controls(action)
+        start_z = car.z
+        offroad_ticks = 0
+        for _ in range(self.frame_skip):
+            sim.step(controls)
+            offroad_ticks += car.offroad
+            if sim.finished or sim.ticks >= self.max_ticks:
+                break
+        reward = (car.z - start_z) / ENV_PROGRESS_UNIT - offroad_ticks * self.offroad_penalty
+        truncated = not sim.finished and sim.ticks >= self.max_ticks
+        return self.observe(), reward, sim.finished, truncated, {'time': sim.time}
+
+    def observe(self):
+        sim = self.sim
+        car = sim.car
+        track = sim.track
+        if car.wall_contact:
+            surface = SURFACE_WALL
+        elif car.offroad:
+            surface = SURFACE_OFFROAD
+        else:
+            surface = SURFACE_ROAD
+        return (car.speed / NORMAL_MAX_SPEED, car.x / (ROAD_WORLD_WIDTH * 0.5),
+                *(track.get_curve_at(car.z + d) for d in ENV_CURVE_LOOKAHEAD), float(surface))
+
+
+class _Buffers:
+    """共有メモリ1枚の上に並べた、全環境ぶんの操作・観測・報酬・フラグの配列。"""
+
+    def __init__(self, num_envs, buf):
+        n = num_envs
+        obs_size = len(OBSERVATION_FIELDS)
+        offset = 0
+        self.obs = np.ndarray((n, obs_size), np.float32, buf, offset)
+        offset += self.obs.nbytes
+        self.actions = np.ndarray((n, ACTION_SIZE), np.float32, buf, offset)
+        offset += self.actions.nbytes
+        self.rewards = np.ndarray((n,), np.float32, buf, offset)
+        offset += self.rewards.nbytes
+        self.terminated = np.ndarray((n,), np.bool_, buf, offset)
+        offset += n
+        self.truncated = np.ndarray((n,), np.bool_, buf, offset)
+
+    @staticmethod
+    def nbytes(num_envs):
+        return num_envs * (4 * (len(OBSERVATION_FIELDS) + ACTION_SIZE + 1) + 2)
+
+    def reset(self, envs, lo):
+        for i, env in enumerate(envs, lo):
+            self.obs[i] = env.reset()[0]
+
+    def step(self, envs, lo):
+        for i, env in enumerate(envs, lo):
+            obs, reward, terminated, truncated, _ = env.step(self.actions[i].tolist())
+            if terminated or truncated:
+                obs = env.reset()[0]
+            self.obs[i] = obs
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+
+
+# ワーカーへの合図（1バイト）
+_CMD_RESET = b'r'
+_CMD_STEP = b's'
+_CMD_CLOSE = b'c'
+_REPLY_OK = b'k'
+
+
+def _worker(conn, shm_name, num_envs, lo, hi, env_kwargs, seed):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffers = None
+    try:
+        buffers = _Buffers(num_envs, shm.buf)
+        envs = [RaceEnv(seed=seed + i, **env_kwargs) for i in range(lo, hi)]
+        while True:
+            cmd = conn.recv_bytes()
+            if cmd == _CMD_CLOSE:
+                break
+            try:
+                if cmd == _CMD_RESET:
+                    buffers.reset(envs, lo)
+                else:
+                    buffers.step(envs, lo)
+            except Exception:
+                conn.send_bytes(traceback.format_exc().encode())
+            else:
+                conn.send_bytes(_REPLY_OK)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del buffers  # 配列が buf を参照している間は close できない
+        shm.close()
+
+
+class VecRaceEnv:
+    """N 個の RaceEnv を、共有メモリ越しにワーカープロセスで同時に進める。
+
+    workers=0 ならワーカーを作らず、呼んだプロセスの中で順に進める（同じ結果になる）。"""
+
+    def __init__(self, num_envs, workers=None, stages=None, hz=SIM_HZ, frame_skip=ENV_FRAME_SKIP,
+                 max_time=MAX_STAGE_TIME, seed=0, context=None):
+        if not VECTOR_ENV_AVAILABLE:
+            raise RuntimeError("VecRaceEnv needs NumPy (pip install numpy)")
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        workers = max(0, min(workers, num_envs))
+        self.num_envs = num_envs
+        env_kwargs = {'stages': stages, 'hz': hz, 'frame_skip': frame_skip, 'max_time': max_time}
+        self._shm = shared_memory.SharedMemory(create=True, size=_Buffers.nbytes(num_envs))
+        self._buffers = _Buffers(num_envs, self._shm.buf)
+        self._conns = []
+        self._procs = []
+        self._local_envs = None
+        if workers == 0:
+            self._local_envs = [RaceEnv(seed=seed + i, **env_kwargs) for i in range(num_envs)]
+            return
+        ctx = context or multiprocessing.get_context()
+        bounds = [num_envs * k // workers for k in range(workers + 1)]
+        try:
+            for lo, hi in zip(bounds, bounds[1:]):
+                parent, child = ctx.Pipe()
+                proc = ctx.Process(target=_worker, daemon=True,
+                                   args=(child, self._shm.name, num_envs, lo, hi, env_kwargs, seed))
+                proc.start()
+                child.close()
+                self._conns.append(parent)
+                self._procs.append(proc)
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def observation_size(self):
+        return len(OBSERVATION_FIELDS)
+
+    def _run(self, cmd):
+        if self._local_envs is not None:
+            if cmd == _CMD_RESET:
+                self._buffers.reset(self._local_envs, 0)
+            else:
+                self._buffers.step(self._local_envs, 0)
+            return
+        try:
+            for conn in self._conns:
+                conn.send_bytes(cmd)
+            errors = [reply.decode() for reply in (conn.recv_bytes() for conn in self._conns)
+                      if reply != _REPLY_OK]
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"race env worker exited: {e!r}") from e
+        if errors:
+            raise RuntimeError(f"race env worker failed:\n{errors[0]}")
+
+    def reset(self):
+        """全環境を reset し、観測 (num_envs, len(OBSERVATION_FIELDS)) を返す。"""
+        self._run(_CMD_RESET)
+        return self._buffers.obs.copy()
+
+    def step(self, actions):
+        """actions は (num_envs, 3) の (steer, throttle, brake)。(観測, 報酬, terminated, truncated) を返す。
+
+        終わった環境は reset 済みで、その観測は次のエピソードの最初のもの。"""
+        buffers = self._buffers
+        buffers.actions[:] = actions
+        self._run(_CMD_STEP)
+        return (buffers.obs.copy(), buffers.rewards.copy(),
+                buffers.terminated.copy(), buffers.truncated.copy())
+
+    def close(self):
+        if self._shm is None:
+            return
+        for conn in self._conns:
+            try:
+                conn.send_bytes(_CMD_CLOSE)
+            except OSError:
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5.0)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._conns = []
+        self._procs = []
+        self._buffers = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, '_shm', None) is not None:
+            self.close()
@@ -0,0 +1,96 @@
+"""入力だけを記録するリプレイと、それを再計算で再生するプレーヤー。
+
+以前は main.py がプレイ中の毎フレーム、車の状態9項目の dict を replay_data に積んでいた
+（6ステージで数万個・数MB）。シミュレーションは固定刻みで、操作列とステージ番号だけで
+結果が決まる（src/sim.py・Car.reset）ので、1刻みあたり16bitの入力語
+（src/controls.py の pack_controls）を array に積み、再生時は RaceSim で同じ刻みを計算し直す。
+
+ずれの検出用に CHECKSUM_INTERVAL 刻みごとの車の状態の CRC も記録しておく。再生中に
+一致しなければ desynced を立ててログに残す（プレイ中にステージ定義をホットリロードして
+コースが変わった場合など）。再生はそのまま続ける。
+"""
+
+import struct
+import zlib
+from array import array
+
+from .controls import pack_controls, unpack_controls
+from .logger import log_warn
+
+CHECKSUM_INTERVAL = 60
+
+
+def state_checksum(car):
+    return zlib.crc32(struct.pack('<4d', car.x, car.z, car.speed, car.dynamic_max_speed))
+
+
+class InputReplay:
+    """ステージごとの (stage_id, 入力語の array, チェックサムの array) の列。"""
+
+    def __init__(self, hz):
+        self.hz = hz
+        self.stages = []
+
+    def start_stage(self, stage_id):
+        self.stages.append((stage_id, array('H'), array('I')))
+
+    def record(self, controls, sim):
+        """sim.step(controls) の直後に呼ぶ。"""
+        _, inputs, checksums = self.stages[-1]
+        inputs.append(pack_controls(controls))
+        if sim.ticks % CHECKSUM_INTERVAL == 0:
+            checksums.append(state_checksum(sim.car))
+
+    def truncate(self, ticks):
+        """今のステージの記録を最初の ticks 刻みまでに切り詰める（巻き戻し用。src/rewind.py）。"""
+        _, inputs, checksums = self.stages[-1]
+        del inputs[ticks:]
+        del checksums[ticks // CHECKSUM_INTERVAL:]
+
+    def __len__(self):
+        return sum(len(inputs) for _, inputs, _ in self.stages)
+
+    def nbytes(self):
+        return sum(inputs.itemsize * len(inputs) + sums.itemsize * len(sums)
+                   for _, inputs, sums in self.stages)
+
+
+class ReplayPlayer:
+    """InputReplay を RaceSim で再計算する。step() を1刻みごとに呼ぶ。"""
+
+    def __init__(self, replay, sim):
+        if abs(sim.dt * replay.hz - 1.0) > 1e-9:
+            raise ValueError(f"replay recorded at {replay.hz} Hz, sim runs at {1.0 / sim.dt:.0f} Hz")
+        self.replay = replay
+        self.sim = sim
+        self.stage_index = -1
+        self.tick = 0
+        self.desynced = False
+
+    @property
+    def stage_id(self):
+        return self.replay.stages[self.stage_index][0]
+
+    def step(self):
+        """1刻み再生する。(続きがあるか, この刻みでステージが切り替わったか) を返す。
+
+        ステージが切り替わった刻みは sim.start_stage 直後の1刻めまで進めてある。
+        """
+        stage_changed = False
+        stages = self.replay.stages
+        while self.stage_index < 0 or self.tick >= len(stages[self.stage_index][1]):
+            self.stage_index += 1
+            if self.stage_index >= len(stages):
+                return False, stage_changed
+            self.sim.start_stage(stages[self.stage_index][0])
+            self.tick = 0
+            stage_changed = True
+        stage_id, inputs, checksums = stages[self.stage_index]
+        self.sim.step(unpack_controls(inputs[self.tick]))
+        self.tick += 1
+        if self.tick % CHECKSUM_INTERVAL == 0 and not self.desynced:
+            n = self.tick // CHECKSUM_INTERVAL - 1
+            if n < len(checksums) and checksums[n] != state_checksum(self.sim.car):
+                self.desynced = True
+                log_warn(f"replay desync: stage {stage_id} tick {self.tick}")
+        return True, stage_changed
@@ -0,0 +1,114 @@
+"""プレイ中の巻き戻し: 直近 REWIND_SECONDS 秒ぶんの状態を刻みごとに持つリングバッファ。
+
+1刻みの状態（時刻・車の x / z / speed / dynamic_max_speed・オフロードと壁接触・カメラの
+高さと勾配）を REWIND_FIELDS 個の float64 として、あらかじめ確保した1本の array('d') の
+リングに上書きしていく。記録は1刻みに float の代入10回だけで、メモリの確保は起きない。
+巻き戻しは指定した刻み数ぶん前のスロットを書き戻すだけ（1ms よりずっと短い）。
+
+Car.update の結果は (x, z, speed, dynamic_max_speed) と sim.time と操作だけで決まるので
+（src/replay.py の state_checksum と同じ4項目）、書き戻した刻みから先は巻き戻さずに走った
+場合と同じ計算になる。InputReplay / GhostRecorder は truncate(sim.ticks) で巻き戻した先の
+刻みまで切り詰めれば、リプレイの再計算もずれない。対戦車（OpponentField）がいれば、
+その物理の状態も同じリングの添字で NumPy 配列に持って一緒に戻す。
+"""
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy 無しでは対戦車が出ないので、車とカメラだけ持てばよい
+    np = None
+
+REWIND_SECONDS = 10.0
+# 巻き戻しの速さ（1描画フレームで戻す刻み数 = 進む刻み数のこの倍。10秒を5秒で戻す）
+REWIND_SPEED = 2
+REWIND_FIELDS = ('time', 'x', 'z', 'speed', 'dynamic_max_speed', 'offroad_l', 'offroad_r',
+                 'wall_contact', 'camera_y', 'slope')
+# 対戦車について持つ配列（OpponentField の属性名）
+OPPONENT_REWIND_FIELDS = ('x', 'z', 'speed', 'dynamic_max_speed', 'finished')
+
+
+class RewindBuffer:
+    """直近 seconds 秒（と今）の状態のリング。sim.step の直後に record() を呼ぶ。"""
+
+    def __init__(self, hz, seconds=REWIND_SECONDS):
+        self.hz = hz
+        self.capacity = int(round(seconds * hz)) + 1
+        self._slots = array('d', bytes(8 * len(REWIND_FIELDS) * self.capacity))
+        self._opponents = None  # (capacity, len(OPPONENT_REWIND_FIELDS), 台数)。対戦車がいれば作る
+        self._head = -1  # 最新のスロット
+        self._count = 0
+
+    @property
+    def seconds_available(self):
+        """今から何秒前まで戻れるか。"""
+        return max(0, self._count - 1) / self.hz
+
+    def start_stage(self, sim, camera_y, slope):
+        """ステージ開始時に呼ぶ。それより前へは戻らない。"""
+        self._count = 0
+        self.record(sim, camera_y, slope)
+
+    def record(self, sim, camera_y, slope):
+        head = self._head + 1
+        if head == self.capacity:
+            head = 0
+        self._head = head
+        if self._count < self.capacity:
+            self._count += 1
+        car = sim.car
+        s = self._slots
+        k = head * len(REWIND_FIELDS)
+        s[k] = sim.time
+        s[k + 1] = car.x
+        s[k + 2] = car.z
+        s[k + 3] = car.speed
+        s[k + 4] = car.dynamic_max_speed
+        s[k + 5] = car.offroad_l
+        s[k + 6] = car.offroad_r
+        s[k + 7] = car.wall_contact
+        s[k + 8] = camera_y
+        s[k + 9] = slope
+        field = sim.opponents
+        if field is not None:
+            if self._opponents is None or self._opponents.shape[2] != field.count:
+                self._opponents = np.empty((self.capacity, len(OPPONENT_REWIND_FIELDS), field.count))
+            row = self._opponents[head]
+            for i, name in enumerate(OPPONENT_REWIND_FIELDS):
+                row[i] = getattr(field, name)
+
+    def step_back(self, sim, ticks):
+        """ticks 刻み前（戻れるところまで）の状態を sim に書き戻し、(camera_y, slope) を返す。
+
+        もう戻れないときは何もせず None を返す。"""
+        ticks = min(ticks, self._count - 1)
+        if ticks <= 0:
+            return None
+        self._count -= ticks
+        head = (self._head - ticks) % self.capacity
+        self._head = head
+        car = sim.car
+        s = self._slots
+        k = head * len(REWIND_FIELDS)
+        sim.time = s[k]
+        sim.ticks -= ticks
+        sim.finished = False
+        car.x = s[k + 1]
+        car.z = s[k + 2]
+        car.speed = s[k + 3]
+        car.dynamic_max_speed = s[k + 4]
+        car.offroad_l = bool(s[k + 5])
+        car.offroad_r = bool(s[k + 6])
+        car.offroad = car.offroad_l or car.offroad_r
+        car.wall_contact = int(s[k + 7])
+        car.braking = car.accel_pressed = False
+        field = sim.opponents
+        if field is not None and self._opponents is not None:
+            row = self._opponents[head]
+            for i, name in enumerate(OPPONENT_REWIND_FIELDS):
+                setattr(field, name, row[i].copy())
+            field.finished = field.finished.astype(bool)
+            field.prev_x, field.prev_z = field.x, field.z
+            # step / ai_controls が引くセグメント番号も戻した z に合わせる
+            field.seg = field._segment_index(field.z)
+        return s[k + 8], s[k + 9]
@@ -0,0 +1,113 @@
+"""ディスプレイ無しで回せるレースのシミュレーション本体。
+
+main.py のゲームループと同じ Car / Track を、描画・音・入力デバイス抜きで固定刻みに進める。
+main.py もプレイ中の1刻みはここの RaceSim.step を通すので、ゲームとバッチ実行で物理がずれない。
+
+    sim = RaceSim.headless()
+    sim.start_stage(1)
+    while not sim.finished:
+        sim.step(ControlInput(steer=..., throttle=True))
+    sim.time  # ステージのタイム（秒）
+
+run_stages() は操作を返す関数（policy）で全ステージを走らせる。調整やテストのバッチ用で、
+実時間よりずっと速く回る（6ステージで1秒未満）。
+
+opponents に台数を渡すと AI の対戦車（src/opponents.py の OpponentField）も同じ刻みで進め、
+プレイヤーを含む全車の接触を src/collisions.py の ContactSolver で横に押し離す。
+"""
+
+from .car import Car
+from .controls import ControlInput
+from .timestep import SIM_HZ
+from .track import Track, STAGE_CONFIG
+
+# ゴール判定は車の先端で行う（車の長さ + α をワールド単位で足す）
+CAR_FRONT_OFFSET = 700.0
+# 一度もゴールしない操作で回し続けないための上限（秒）
+MAX_STAGE_TIME = 600.0
+
+# 画面サイズは当たり判定の車幅（Car の rect.width）にだけ効く。ゲームと同じ値にしておく
+SIM_SCREEN_SIZE = (800, 600)
+
+
+class RaceSim:
+    """Car と Track を1刻みずつ進め、ステージのタイムとゴールを管理する。"""
+
+    def __init__(self, car, track, hz=SIM_HZ, opponents=0):
+        self.car = car
+        self.track = track
+        self.dt = 1.0 / hz
+        self.opponents = None
+        self.contacts = None
+        if opponents:
+            # numpy が要るので使うときだけ読む
+            from .opponents import OpponentField
+            from .collisions import ContactSolver
+            self.opponents = OpponentField(opponents, car.rect.width)
+            self.contacts = ContactSolver()
+        self.stage_id = None
+        self.time = 0.0
+        self.ticks = 0
+        self.finished = False
+
+    @classmethod
+    def headless(cls, hz=SIM_HZ, opponents=0):
+        """画像を読まない Car / Track で作る（pygame.init もディスプレイも要らない）。"""
+        width, height = SIM_SCREEN_SIZE
+        return cls(Car(width, height, height - 60, load_sprites=False), Track(), hz, opponents)
+
+    def start_stage(self, stage_id):
+        """コースを作り直し、車をスタート位置へ戻す。"""
+        self.stage_id = stage_id
+        self.track.create_road(stage_id)
+        self.car.reset()
+        if self.opponents is not None:
+            self.opponents.start_stage(self.track, stage_id)
+        self.time = 0.0
+        self.ticks = 0
+        self.finished = False
+
+    def step(self, controls):
+        """1刻み進める。この刻みでゴールしたら True を返す。"""
+        if self.finished:
+            return False
+        self.car.update(controls, self.track, self.dt, stage_id=self.stage_id, sim_time=self.time)
+        if self.opponents is not None:
+            self.opponents.advance(self.dt, self.time)
+            self.contacts.resolve_field(self.car, self.opponents)
+        self.time += self.dt
+        self.ticks += 1
+        if self.car.z + CAR_FRONT_OFFSET >= self.track.goal_distance:
+            self.finished = True
+        return self.finished
+
+    def state(self):
+        """結果の取り出し用。車の状態をまとめて返す。"""
+        car = self.car
+        return {
+            'stage_id': self.stage_id, 'time': self.time, 'ticks': self.ticks,
+            'finished': self.finished, 'x': car.x, 'z': car.z, 'speed': car.speed,
+            'offroad': car.offroad, 'wall_contact': car.wall_contact,
+        }
+
+
+def run_stage(sim, stage_id, policy, max_time=MAX_STAGE_TIME):
+    """policy(sim) -> ControlInput で1ステージ走らせ、ゴールしたらタイム、しなければ None。"""
+    sim.start_stage(stage_id)
+    max_ticks = int(max_time / sim.dt)
+    while sim.ticks < max_ticks:
+        if sim.step(policy(sim)):
+            return sim.time
+    return None
+
+
+def run_stages(policy, stages=None, sim=None):
+    """全ステージ（既定は STAGE_CONFIG の全部）を走らせ、{stage_id: タイム or None} を返す。"""
+    sim = sim or RaceSim.headless()
+    stages = sorted(STAGE_CONFIG) if stages is None else stages
+    return {stage_id: run_stage(sim, stage_id, policy) for stage_id in stages}
+
+
+def full_throttle(sim):
+    """ハンドルを切らずに踏み続けるだけの操作（テスト・計測用の基準）。"""
+    return ControlInput(0.0, True, False)
@@ -0,0 +1,166 @@
+"""タイヤ痕（スキッドマーク）: 路面に残る跡をワールド座標 (z, x) のリングバッファに持つ。
+
+Stage 4 の砂の路面で強くブレーキを踏んだとき・Stage 5 のウェット路面でハンドルを大きく
+切って滑らせたときに、左右のタイヤの位置へ SKIDMARK_SPACING ごとに短い帯（始点と終点の
+(z, x)）を置く。帯は SKIDMARK_CAPACITY 本の NumPy 配列のリングに上書きしていき、
+いっぱいになったら古いものから消える。ステージがどれだけ長くても、メモリも1フレームの
+コストもこの本数で頭打ちになる。
+
+描画は Track.draw の中で行う。まず project() で描画範囲にある帯をまとめて（配列演算で一度に）
+道路の投影に通して画面上の四角形にし、セグメント番号の奥→手前に並べておく。Track.draw は
+奥→手前のセグメント描画の合間に draw_until() を呼び、その路面を描いた直後にそこの帯を描く
+（対戦車のスプライトと同じ差し込み。手前の丘に隠れる）。
+
+タイヤの位置は画面上の車のスプライトに合わせる。車は常に画面の中央下に描かれ、タイヤの
+接地点は Car.render の位置なので、そこに写る路面の奥行き（カメラから約1700）と、左右の
+タイヤの間隔・幅をワールドの長さに直して置く。置いた帯はそのまま手前へ流れて、車の後ろに
+跡が伸びる。
+
+numpy はオプション依存（無ければ SKIDMARKS_AVAILABLE が False で、跡は残らない）。
+"""
+
+try:
+    import numpy as np
+except ImportError:  # numpy 無しではタイヤ痕を出さない
+    np = None
+
+import pygame
+
+from .track import (STAGE_CONFIG, STRIPE_LENGTH, HORIZON_Y, CAMERA_HEIGHT, PROJECTION_PLANE_DIST,
+                    Track)
+
+# リングに持つ帯の本数（左右で1組2本）と、帯1本の長さ（world units）
+SKIDMARK_CAPACITY = 512
+SKIDMARK_SPACING = 150.0
+# これより手前・奥の帯は描かない（奥行き。world units）
+SKIDMARK_DRAW_DISTANCE = 6000.0
+# 跡が付き始める速度（内部単位。100km/h）と、ウェットで滑っているとみなすハンドルの切れ角
+SKIDMARK_MIN_SPEED = 48.5
+SKIDMARK_WET_STEER = 0.7
+# 跡の色: そのステージの路面の色（road_dark）をこの割合だけ黒へ寄せる
+SKIDMARK_DARKEN = 0.4
+
+SKIDMARKS_AVAILABLE = np is not None
+
+
+def tyre_contact(car_rect):
+    """Car.render のタイヤの接地点に写る路面の (奥行き, 左右のタイヤの中心の間隔の半分, 跡の幅)。"""
+    cw, ch = car_rect.width, car_rect.height
+    ground_y = car_rect.centery + ch * 0.35 + int(ch * 0.1) + int(ch * 0.08) // 2
+    depth = CAMERA_HEIGHT * PROJECTION_PLANE_DIST / max(1.0, ground_y - HORIZON_Y)
+    px_to_world = depth / PROJECTION_PLANE_DIST
+    return depth, (cw * 0.38 + 15) * px_to_world, int(cw * 0.14) * px_to_world
+
+
+def skidding(car, stage_id):
+    """この刻みにタイヤ痕が付くか。"""
+    if car.offroad or car.speed < SKIDMARK_MIN_SPEED:
+        return False
+    if stage_id == 4:
+        return car.braking
+    if stage_id == 5:
+        return abs(car.steering_input) >= SKIDMARK_WET_STEER
+    return False
+
+
+class SkidMarks:
+    """タイヤ痕のリングと、1フレームぶんの描画待ちの四角形の列。"""
+
+    def __init__(self, car_rect, capacity=SKIDMARK_CAPACITY):
+        if not SKIDMARKS_AVAILABLE:
+            raise RuntimeError("skid marks need NumPy (pip install numpy)")
+        self.depth, self.half_track, self.width = tyre_contact(car_rect)
+        self.capacity = capacity
+        # 帯ごとの 始点 z, 始点 x, 終点 z, 終点 x。未使用のスロットは z = -inf で描画範囲に入らない
+        self.z0 = np.full(capacity, -np.inf)
+        self.x0 = np.zeros(capacity)
+        self.z1 = np.full(capacity, -np.inf)
+        self.x1 = np.zeros(capacity)
+        self._next = 0
+        self._last = None  # 跡が続いている間の、直前に置いた点 (z, 道路中心からの x)
+        self._queue = []
+        self.color = (0, 0, 0)
+
+    def clear(self, stage_id=None):
+        """全部消す（ステージ開始時）。stage_id を渡すと跡の色もそのステージに合わせる。"""
+        self.z0.fill(-np.inf)
+        self.z1.fill(-np.inf)
+        self._next = 0
+        self._last = None
+        self._queue = []
+        if stage_id is not None:
+            road = STAGE_CONFIG.get(stage_id, STAGE_CONFIG[1]).get('road_dark', (99, 99, 99))
+            self.color = Track.interpolate_color(road, (0, 0, 0), SKIDMARK_DARKEN)
+
+    def __len__(self):
+        return int(np.isfinite(self.z0).sum())
+
+    def update(self, car, track, stage_id):
+        """sim.step の直後に呼ぶ。滑っていれば、前回の点から SKIDMARK_SPACING 進むごとに帯を置く。"""
+        if not skidding(car, stage_id):
+            self._last = None
+            return
+        z = car.z + self.depth
+        # 画面中央（車のスプライトの真下）に写る、道路中心からの横位置
+        x = -track.get_road_screen_offset(car.z, car.x, self.depth) * self.depth / PROJECTION_PLANE_DIST
+        if self._last is None:
+            self._last = (z, x)
+            return
+        last_z, last_x = self._last
+        if z - last_z < SKIDMARK_SPACING:
+            return
+        for side in (-1.0, 1.0):
+            i = self._next
+            self.z0[i] = last_z
+            self.x0[i] = last_x + side * self.half_track
+            self.z1[i] = z
+            self.x1[i] = x + side * self.half_track
+            self._next = (i + 1) % self.capacity
+        self._last = (z, x)
+
+    def project(self, render_points, start_idx, player_z, player_x, camera_world_y, screen_width):
+        """描画範囲にある帯を画面上の四角形にし、セグメント番号の順に並べる（Track.draw が呼ぶ）。
+
+        render_points は Track.draw のセグメント境界ごとの {'x_rel', 'y_world'}（start_idx から）。
+        戻り値は最も奥の帯のセグメント番号（描く帯がなければ -1）。"""
+        self._queue = []
+        near = player_z + PROJECTION_PLANE_DIST
+        last = (start_idx + len(render_points) - 1) * STRIPE_LENGTH
+        visible = ((self.z0 > near) & (self.z1 > near)
+                   & (self.z1 < min(player_z + SKIDMARK_DRAW_DISTANCE, last)))
+        idx = visible.nonzero()[0]
+        if not len(idx):
+            return -1
+        zs = np.concatenate((self.z0[idx], self.z1[idx]))
+        xs = np.concatenate((self.x0[idx], self.x1[idx]))
+        # Track.draw の project_on_road と同じ補間と Track.project の式を、帯の両端にまとめて通す
+        k = (zs // STRIPE_LENGTH).astype(np.intp) - start_idx
+        needed = render_points[:int(k.max()) + 2]
+        x_rel = np.array([p['x_rel'] for p in needed])
+        y_world = np.array([p['y_world'] for p in needed])
+        t = zs / STRIPE_LENGTH - (k + start_idx)
+        rel_x = x_rel[k] + (x_rel[k + 1] - x_rel[k]) * t + xs - player_x
+        rel_y = y_world[k] + (y_world[k + 1] - y_world[k]) * t - camera_world_y
+        scale = PROJECTION_PLANE_DIST / (zs - player_z)
+        sx = screen_width / 2 + rel_x * scale
+        sy = HORIZON_Y - rel_y * scale
+        half_w = self.width * 0.5 * scale
+        n = len(idx)
+        quads = np.stack((sx[:n] - half_w[:n], sy[:n], sx[:n] + half_w[:n], sy[:n],
+                          sx[n:] + half_w[n:], sy[n:], sx[n:] - half_w[n:], sy[n:]), axis=1)
+        segs = k[:n] + start_idx
+        order = segs.argsort(kind='stable')
+        self._queue = list(zip(segs[order].tolist(), quads[order].reshape(n, 4, 2).tolist()))
+        return self.next_segment
+
+    @property
+    def next_segment(self):
+        return self._queue[-1][0] if self._queue else -1
+
+    def draw_until(self, screen, min_segment):
+        """セグメント番号 min_segment 以上にある帯を奥から描き、残りの最も奥のセグメント番号を返す。"""
+        queue = self._queue
+        color = self.color
+        while queue and queue[-1][0] >= min_segment:
+            pygame.draw.polygon(screen, color, queue.pop()[1])
+        return queue[-1][0] if queue else -1
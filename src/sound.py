@@ -3,15 +3,51 @@ import wave
 import struct
 import os
 
+from .assets import assets, asset_path
+
+ENGINE_SOUND_KIND = "engine_wav"
+
+
+def decode_loop_wav(path):
+    """16bit WAV を読み込み、ミキサー形式（44.1kHz/16bit/ステレオ）の生バイト列を返す。
+    Sound(buffer=) はミキサーの形式で解釈されるため、モノラル素材は左右に複製してステレオ化する。
+    AssetStore のワーカースレッドで実行する（Sound の生成は呼び出し側でメインスレッドで行う）。"""
+    with wave.open(path, 'rb') as wf:
+        params = wf.getparams()
+        raw = wf.readframes(params.nframes)
+
+    if params.sampwidth != 2:
+        raise ValueError(f"{path}: 16bit WAVのみ対応 (got {params.sampwidth * 8}bit)")
+
+    mixer_freq, _, mixer_ch = pygame.mixer.get_init()
+    if params.framerate != mixer_freq:
+        print(f"Warning: {path} is {params.framerate}Hz but mixer is "
+              f"{mixer_freq}Hz. Pitch will be shifted.")
+
+    if params.nchannels == 1 and mixer_ch == 2:
+        n = len(raw) // 2
+        mono = struct.unpack(f"<{n}h", raw)
+        stereo = [v for s in mono for v in (s, s)]
+        raw = struct.pack(f"<{len(stereo)}h", *stereo)
+    elif params.nchannels != mixer_ch:
+        raise ValueError(f"{path}: {params.nchannels}ch はミキサー({mixer_ch}ch)と非互換")
+    return raw
+
+
+def preload_engine_sounds():
+    """エンジン音の整形をワーカーへ投げる。ミキサーの初期化後に呼ぶこと。"""
+    assets.preload_with(ENGINE_SOUND_KIND, SoundManager.ENGINE_FILES.values(), decode_loop_wav)
+
+
 class SoundManager:
     # エンジン音は自作のループWAV 3本（低/中/高回転）を直接ロードする。
     # 生成元コード: project/engine_sound_gen/generate_engine.py（コード合成・権利問題なし）
     # 以前は第三者由来の engine.wav 1本をロード時にDSP加工＋ピッチシフトして
     # 3ループを合成していたが、素材差し替えに伴い廃止した。
     ENGINE_FILES = {
-        "low": "engine_low.wav",
-        "mid": "engine_mid.wav",
-        "high": "engine_high.wav",
+        "low": "asset/engine_low.wav",
+        "mid": "asset/engine_mid.wav",
+        "high": "asset/engine_high.wav",
     }
 
     def __init__(self, start_run=False):
@@ -25,20 +61,18 @@ class SoundManager:
         self.sounds = {}
         self.user_volume = 1.0  # Master volume set via the settings menu (0.0-1.0)
 
-        # Path to engine WAVs: this file lives in src/, while asset/ is a sibling
-        # of src/ under the project root, so we need to go up one level.
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        asset_dir = os.path.join(base_path, "..", "asset")
-
+        # エンジン音 WAV の整形（モノラル→ステレオ）は AssetStore のワーカーで済ませておき、
+        # ここでは Sound の生成だけを行う（main.py が preload_engine_sounds() で先に投げる）
         try:
             loaded = {}
             for key, fname in self.ENGINE_FILES.items():
-                wav_path = os.path.join(asset_dir, fname)
+                wav_path = asset_path(fname)
                 if not os.path.exists(wav_path):
                     print(f"Warning: {wav_path} not found. Engine sound will be disabled.")
                     self.enabled = False
                     return
-                loaded[key] = self._load_loop_sound(wav_path)
+                loaded[key] = assets.load(ENGINE_SOUND_KIND, fname, decode_loop_wav,
+                                          lambda raw: pygame.mixer.Sound(buffer=raw))
 
             self.enabled = True
 
@@ -69,32 +103,6 @@ class SoundManager:
             traceback.print_exc()
             self.enabled = False
 
-    def _load_loop_sound(self, path):
-        """16bit WAV を読み込み、ミキサー形式に合わせた pygame Sound を返す。
-        Sound(buffer=) はミキサーの形式（44.1kHz/16bit/ステレオ）で解釈されるため、
-        モノラル素材は左右に複製してステレオ化してから渡す。"""
-        with wave.open(path, 'rb') as wf:
-            params = wf.getparams()
-            raw = wf.readframes(params.nframes)
-
-        if params.sampwidth != 2:
-            raise ValueError(f"{path}: 16bit WAVのみ対応 (got {params.sampwidth * 8}bit)")
-
-        mixer_freq, _, mixer_ch = pygame.mixer.get_init()
-        if params.framerate != mixer_freq:
-            print(f"Warning: {path} is {params.framerate}Hz but mixer is "
-                  f"{mixer_freq}Hz. Pitch will be shifted.")
-
-        if params.nchannels == 1 and mixer_ch == 2:
-            n = len(raw) // 2
-            mono = struct.unpack(f"<{n}h", raw)
-            stereo = [v for s in mono for v in (s, s)]
-            raw = struct.pack(f"<{len(stereo)}h", *stereo)
-        elif params.nchannels != mixer_ch:
-            raise ValueError(f"{path}: {params.nchannels}ch はミキサー({mixer_ch}ch)と非互換")
-
-        return pygame.mixer.Sound(buffer=raw)
-
     def update(self, speed, accel_pressed):
         if not self.enabled: return
         
@@ -0,0 +1,125 @@
+"""自己ベストとの差（スプリット）: ステージのベストの「距離ごとの通過時刻」の表と、その記録。
+
+通過時刻は SPLIT_INTERVAL ごとの z で取る（i 番目が z = i * SPLIT_INTERVAL を通過した時刻）。
+z は単調に増えるので表も単調に増え、ある z のベストの時刻は割り算で添字が決まって2点の補間で
+引ける（探索は要らない）。HUD はプレイ中の毎フレーム「今の時刻 - 同じ z のベストの時刻」を出す。
+
+表は float32 で、600,000 のステージが 601 点（約2.4KB）。ステージをゴールするたびに、
+そのステージのベストより速ければ ghosts/stage_<id>.splits だけを書き換える（ゴースト
+src/ghost.py と同じ置き場所・同じ「ゴール時に最速なら保存」）。
+
+ファイル形式:
+    ヘッダ SPLIT_HEADER（リトルエンディアン）: マジック b'SPLT', 形式の版, ステージ番号,
+        点の数, タイム(秒)
+    本体: 点ごとの通過時刻（float32。ネイティブのバイト順）
+"""
+
+import os
+import struct
+from array import array
+
+from .ghost import GHOST_DIR
+from .logger import log_warn
+
+SPLIT_INTERVAL = 1000.0
+SPLIT_MAGIC = b'SPLT'
+SPLIT_FORMAT = 1
+SPLIT_HEADER = struct.Struct('<4sHHId')
+
+
+def splits_path(stage_id, split_dir=GHOST_DIR):
+    return os.path.join(split_dir, f"stage_{stage_id}.splits")
+
+
+class BestSplits:
+    """保存済みのベストの通過時刻の表。"""
+
+    def __init__(self, stage_id, time, times):
+        self.stage_id = stage_id
+        self.time = time
+        self.times = times
+
+    @classmethod
+    def load(cls, stage_id, split_dir=GHOST_DIR):
+        """ステージのベストを読む。記録が無い・壊れているときは None。"""
+        path = splits_path(stage_id, split_dir)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            magic, version, stored_id, count, best = SPLIT_HEADER.unpack_from(data)
+            if magic != SPLIT_MAGIC or version != SPLIT_FORMAT or stored_id != stage_id:
+                raise ValueError(f"not a split file for stage {stage_id}")
+            times = array('f')
+            times.frombytes(data[SPLIT_HEADER.size:SPLIT_HEADER.size + count * times.itemsize])
+            if len(times) != count:
+                raise ValueError(f"truncated ({len(times)} < {count} points)")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error) as e:
+            log_warn(f"ignoring splits {path}: {e}")
+            return None
+        return cls(stage_id, best, times)
+
+    def time_at(self, z):
+        """ベストの走りが z を通過した時刻。記録の外なら None。"""
+        f = z / SPLIT_INTERVAL
+        i = int(f)
+        times = self.times
+        if i < 0 or i + 1 >= len(times):
+            return None
+        return times[i] + (times[i + 1] - times[i]) * (f - i)
+
+    def delta(self, z, time):
+        """今の走り（z を time 秒で通過）のベストとの差（秒。負ならベストより速い）。"""
+        best = self.time_at(z)
+        return None if best is None else time - best
+
+
+class SplitRecorder:
+    """プレイ中の1ステージぶんの通過時刻を積む。sim.step の直後に record() を呼ぶ。"""
+
+    def __init__(self):
+        self.stage_id = None
+        self.times = array('f')
+        self._prev = (0.0, 0.0)  # 直前の刻みの (時刻, z)
+
+    def start_stage(self, stage_id):
+        self.stage_id = stage_id
+        self.times = array('f', (0.0,))
+        self._prev = (0.0, 0.0)
+
+    def record(self, sim):
+        time, z = sim.time, sim.car.z
+        next_z = len(self.times) * SPLIT_INTERVAL
+        if z >= next_z:
+            t0, z0 = self._prev
+            # この刻みで越えた点の時刻を、直前の刻みとの間で線形に補間する
+            rate = (time - t0) / (z - z0)
+            while next_z <= z:
+                self.times.append(t0 + (next_z - z0) * rate)
+                next_z += SPLIT_INTERVAL
+        self._prev = (time, z)
+
+    def truncate(self, sim):
+        """巻き戻した sim に合わせて、まだ通過していない点を落とす（src/rewind.py）。"""
+        del self.times[int(sim.car.z // SPLIT_INTERVAL) + 1:]
+        self._prev = (sim.time, sim.car.z)
+
+    def save_if_best(self, stage_time, split_dir=GHOST_DIR):
+        """保存済みのベストより速ければ書き出し、新しい BestSplits を返す（そうでなければ None）。"""
+        best = BestSplits.load(self.stage_id, split_dir)
+        if best is not None and best.time <= stage_time:
+            return None
+        path = splits_path(self.stage_id, split_dir)
+        tmp_path = path + ".tmp"
+        try:
+            os.makedirs(split_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(SPLIT_HEADER.pack(SPLIT_MAGIC, SPLIT_FORMAT, self.stage_id,
+                                          len(self.times), stage_time))
+                self.times.tofile(f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log_warn(f"could not save splits for stage {self.stage_id}: {e}")
+            return None
+        return BestSplits(self.stage_id, stage_time, array('f', self.times))
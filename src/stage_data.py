@@ -0,0 +1,119 @@
+"""ステージ定義ファイル（src/stages.cfg）の読み込みと、実行中の変更監視。
+
+以前は STAGE_CONFIG が track.py に直書きされており、色を1つ変えるだけでもゲームを再起動して
+全アセットを読み直す必要があった。定義を外部ファイルへ出し、StageConfigWatcher が保存を
+検知したら「どのステージのどのキーが変わったか」だけを返す。キャッシュを持つ側
+（Track / BackgroundManager）は自分の CONFIG_DEPS と突き合わせ、影響するものだけを作り直す。
+
+STAGE_CONFIG の dict はモジュール間で共有されている（from .track import STAGE_CONFIG）ため、
+再読み込みは新しい dict への差し替えではなく、同じ dict の中身をその場で書き換えて行う。
+"""
+
+import ast
+import os
+
+from .logger import log_info, log_warn
+
+STAGE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stages.cfg")
+
+# 各ステージに必ず要るキー。Track.create_road / get_bg_colors が無条件に参照する。
+REQUIRED_STAGE_KEYS = ('sky_color', 'grass_color', 'road_light', 'road_dark', 'curve_mult')
+
+# 保存の検知間隔（秒）。os.stat 1回なので軽いが、毎フレーム叩く必要もない
+STAGE_WATCH_INTERVAL = 0.5
+
+_MISSING = object()  # diff 用: キーが無いことと値が None であることを区別する
+
+
+def load_stage_config(path=STAGE_FILE):
+    """ステージ定義を読み込んで {stage_id: {key: value}} を返す。不正な内容は ValueError。"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        text = f.read()
+    try:
+        data = ast.literal_eval(text)
+    except (SyntaxError, ValueError) as e:
+        raise ValueError(f"{os.path.basename(path)}: {e}") from e
+
+    if not isinstance(data, dict) or 1 not in data:
+        # 未知の stage_id は STAGE_CONFIG[1] へフォールバックする箇所が多いので、1 は必須
+        raise ValueError(f"{os.path.basename(path)}: stage 1 is missing")
+    for stage_id, cfg in data.items():
+        if not isinstance(stage_id, int) or not isinstance(cfg, dict):
+            raise ValueError(f"{os.path.basename(path)}: bad entry for stage {stage_id!r}")
+        missing = [k for k in REQUIRED_STAGE_KEYS if k not in cfg]
+        if missing:
+            raise ValueError(f"{os.path.basename(path)}: stage {stage_id} lacks {missing}")
+    return data
+
+
+def diff_stage_config(old, new):
+    """2つの定義を比べ、{stage_id: 変わったキーの set} を返す（追加・削除されたキーも含む）。"""
+    changes = {}
+    for stage_id in set(old) | set(new):
+        a = old.get(stage_id, {})
+        b = new.get(stage_id, {})
+        keys = {k for k in set(a) | set(b) if a.get(k, _MISSING) != b.get(k, _MISSING)}
+        if keys:
+            changes[stage_id] = keys
+    return changes
+
+
+def apply_stage_config(config, new):
+    """config（共有されている STAGE_CONFIG）を new の内容へその場で書き換え、差分を返す。"""
+    changes = diff_stage_config(config, new)
+    for stage_id, keys in changes.items():
+        if stage_id not in new:
+            del config[stage_id]
+            continue
+        cfg = config.setdefault(stage_id, {})
+        for key in keys:
+            if key in new[stage_id]:
+                cfg[key] = new[stage_id][key]
+            else:
+                del cfg[key]
+    return changes
+
+
+class StageConfigWatcher:
+    """ステージ定義ファイルの保存を検知して STAGE_CONFIG へ反映する。
+
+    poll() を毎フレーム呼ぶ。STAGE_WATCH_INTERVAL ごとに更新時刻を確認し、変わっていれば
+    読み直して差分だけを返す。読み込みに失敗した場合（保存途中・書き間違い）は警告を残して
+    直前の内容のまま続行する。レース中にゲームを落とさないことを優先している。
+    """
+
+    def __init__(self, config, path=STAGE_FILE):
+        self.config = config
+        self.path = path
+        self._timer = 0.0
+        self._mtime = self._stat()
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self, dt_sec):
+        """変更があれば {stage_id: 変わったキーの set} を、なければ空の dict を返す。"""
+        self._timer -= dt_sec
+        if self._timer > 0.0:
+            return {}
+        self._timer = STAGE_WATCH_INTERVAL
+        return self.reload_if_changed()
+
+    def reload_if_changed(self):
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return {}
+        self._mtime = mtime
+        try:
+            new = load_stage_config(self.path)
+        except (OSError, ValueError) as e:
+            log_warn(f"stage config reload skipped: {e}")
+            print(f"Stage config reload skipped: {e}")
+            return {}
+        changes = apply_stage_config(self.config, new)
+        if changes:
+            log_info(f"stage config reloaded: { {s: sorted(k) for s, k in changes.items()} }")
+        return changes
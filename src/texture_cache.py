@@ -0,0 +1,155 @@
+"""読み込み時に作る派生テクスチャ（拡縮済みの空・地面のミップ列・車のスプライト）のディスクキャッシュ。
+
+BackgroundLayer は空を画面幅の2倍へ、GroundLayer は地面を拡縮・切り出してミップ列全体を
+smoothscale で作り、Car は車と炎を縮小する。どれも入力が同じなら結果も同じなのに、起動と
+ステージ切り替えのたびに作り直していた。ここでは出来上がったピクセル列を生のまま
+cache/textures/ へ書き出し、次回からは PNG のデコードも拡縮もせずに読み込む。
+
+エントリのキーは次の全部のハッシュ。どれかが変われば別のキーになり、作り直して上書きする。
+    - 元アセットの中身の SHA-1（ファイルを差し替えれば無効になる）
+    - 派生処理のパラメータ（画面解像度など。呼び出し側が params に渡す）
+    - コードのバージョン（アプリの VERSION、TEXTURE_CACHE_FORMAT、pygame のバージョン。
+      派生処理の中身を変えたときは呼び出し側の params に版数を入れて上げる）
+
+ファイル名は「処理名-元アセット名-キー」。同じ処理・同じ元アセットの古いエントリは
+書き込み時に消すので、ディレクトリは処理と元アセットの組み合わせの数以上には増えない。
+
+キャッシュは速度のためだけのもの。読めない・書けないときは黙って作り直す
+（書き込み失敗はログに残す）。元アセットが無い場合はキャッシュを使わず build() に任せるので、
+FileNotFoundError の扱いは従来どおり呼び出し側の except に届く。
+"""
+
+import glob
+import hashlib
+import json
+import os
+
+import pygame
+
+from .assets import PROJECT_ROOT, asset_path, assets
+from .logger import log_warn
+from .version import VERSION
+
+CACHE_DIR = os.path.join(PROJECT_ROOT, "cache", "textures")
+# ファイル形式・キーの作り方を変えたら上げる
+TEXTURE_CACHE_FORMAT = 1
+TEXTURE_CACHE_ENABLED = True
+
+_MAGIC = b"RGTEX\n"
+
+# 元アセットのハッシュ。(パス, サイズ, 更新時刻) が同じ間は読み直さない（ステージ切り替え用）
+_digest_memo = {}
+
+
+def source_digest(key):
+    """元アセットの中身の SHA-1。ファイルが無ければ None。"""
+    path = asset_path(key)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    memo_key = (path, st.st_size, st.st_mtime_ns)
+    digest = _digest_memo.get(memo_key)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+def _entry_prefix(name, source_key):
+    stem = os.path.splitext(os.path.basename(asset_path(source_key)))[0]
+    return os.path.join(CACHE_DIR, f"{name}-{stem}-")
+
+
+def _entry_key(name, digests, params):
+    text = repr((name, digests, params, VERSION, TEXTURE_CACHE_FORMAT, pygame.version.ver))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_header(path, body=True):
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("not a texture cache file")
+        return json.loads(f.readline()), (f.read() if body else None)
+
+
+def _read_entry(path, alpha):
+    header, raw = _read_header(path)
+    surfaces = []
+    pos = 0
+    for w, h in header["sizes"]:
+        fmt = "RGBA" if alpha else "RGB"
+        n = w * h * len(fmt)
+        surf = pygame.image.frombytes(raw[pos:pos + n], (w, h), fmt)
+        surfaces.append(surf.convert_alpha() if alpha else surf.convert())
+        pos += n
+    if pos != len(raw):
+        raise ValueError("truncated texture cache file")
+    return surfaces
+
+
+def _write_entry(path, prefix, surfaces, alpha, digests):
+    fmt = "RGBA" if alpha else "RGB"
+    header = {"sizes": [list(s.get_size()) for s in surfaces], "sources": digests}
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC)
+        f.write(json.dumps(header).encode("ascii") + b"\n")
+        for surf in surfaces:
+            f.write(pygame.image.tobytes(surf, fmt))
+    os.replace(tmp, path)  # 書きかけのファイルを読まないよう、書き終えてから差し替える
+    for stale in glob.glob(glob.escape(prefix) + "*.tex"):
+        if stale != path:
+            os.remove(stale)
+
+
+def load_or_build(name, source_keys, params, build, alpha=False):
+    """派生テクスチャ（Surface のリスト）をキャッシュから読むか、build() で作って保存する。
+
+    name は派生処理の名前、source_keys は build() が assets から読む元アセットのキー
+    （先頭のものがファイル名に入る）。params は結果を左右するパラメータ全部（repr できる値）。
+    キャッシュから読めたときは、先読み中の元アセットのデコードを捨てる。
+    """
+    digests = [source_digest(k) for k in source_keys]
+    if not TEXTURE_CACHE_ENABLED or None in digests:
+        return build()
+    prefix = _entry_prefix(name, source_keys[0])
+    path = prefix + _entry_key(name, digests, params) + ".tex"
+    if os.path.exists(path):
+        try:
+            surfaces = _read_entry(path, alpha)
+            assets.discard(source_keys)
+            return surfaces
+        except Exception as e:  # 壊れたエントリは作り直して上書きする
+            log_warn(f"texture cache unreadable, rebuilding: {path}: {e}")
+    surfaces = build()
+    try:
+        _write_entry(path, prefix, surfaces, alpha, digests)
+    except Exception as e:
+        log_warn(f"texture cache write failed: {path}: {e}")
+    return surfaces
+
+
+def is_cached(source_key):
+    """source_key の今の中身から作ったエントリがあるか（先読みを省けるかの目安）。
+
+    パラメータまでは見ないので、解像度を変えた直後などは True でも load_or_build が
+    作り直す（そのときは元アセットをその場で同期デコードするだけで、結果は正しい）。
+    """
+    digest = source_digest(source_key)
+    if not TEXTURE_CACHE_ENABLED or digest is None:
+        return False
+    stem = os.path.splitext(os.path.basename(asset_path(source_key)))[0]
+    for path in glob.glob(os.path.join(glob.escape(CACHE_DIR), f"*-{glob.escape(stem)}-*.tex")):
+        try:
+            header, _ = _read_header(path, body=False)
+        except Exception:
+            continue
+        if digest in header.get("sources", ()):
+            return True
+    return False
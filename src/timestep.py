@@ -0,0 +1,55 @@
+"""固定刻みのシミュレーション時計と、描画用の補間。
+
+以前は main.py が描画1フレームにつき Car.update を1回呼んでおり、物理定数も1フレームあたりの
+量だったため、clock.tick(FPS) が 60fps を保てないとゲーム全体が遅くなっていた（処理落ちで
+ラップタイムが伸びる）。FixedTimestep は経過した実時間を SIM_HZ の刻みに切り分け、描画
+フレームごとに「このフレームで進める刻みの数」を返す。描画は直前2刻みの状態を alpha で
+補間するので、描画が 30 / 60 / 144Hz のどれでも、フレームを落としても、進み方は同じになる。
+
+    ticks = sim_clock.advance(frame_dt)
+    for _ in range(ticks):
+        ...1刻みぶん進める（dt は sim_clock.dt）...
+    view_z = lerp(prev_z, car.z, sim_clock.alpha)
+"""
+
+SIM_HZ = 120
+# 1フレームで追いつく刻みの上限。これを超えて遅れたぶんは捨てる（ゲームがその分だけ遅れる）。
+# 重いフレームで刻みを増やす → さらに重くなる、の悪循環を防ぐ
+MAX_SIM_STEPS_PER_FRAME = 8
+# ウィンドウのドラッグ中などで止まっていたフレームの経過時間の上限
+MAX_FRAME_DT = 0.25
+
+
+def lerp(a, b, t):
+    return a + (b - a) * t
+
+
+def smoothing_factor(per_frame, dt_sec, reference_hz=60.0):
+    """60fps の1フレームあたり per_frame だけ目標へ寄せるローパスを、dt_sec の刻みに換算する。"""
+    return 1.0 - (1.0 - per_frame) ** (dt_sec * reference_hz)
+
+
+class FixedTimestep:
+    def __init__(self, hz=SIM_HZ, max_steps=MAX_SIM_STEPS_PER_FRAME):
+        self.dt = 1.0 / hz
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, frame_dt):
+        """描画フレームの経過時間を足し、このフレームで進める刻みの数を返す。"""
+        self.accumulator += min(frame_dt, MAX_FRAME_DT)
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = 0.0  # 追いつけない分は捨てる
+        else:
+            self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        """描画の補間係数（0=直前の刻み、1=最新の刻み）。"""
+        return min(1.0, self.accumulator / self.dt)
+
+    def reset(self):
+        self.accumulator = 0.0
@@ -2,6 +2,9 @@ import pygame
 import random
 import math
 
+from .assets import assets
+from .stage_data import load_stage_config
+
 # --- Constants & Config ---
 STRIPE_LENGTH = 300.0
 ROAD_WORLD_WIDTH = 3388.0
@@ -125,85 +128,28 @@ CAMERA_HEIGHT = 1500.0
 DRAW_DISTANCE = 50000.0
 GOAL_DISTANCE = 600000.0
 
-STAGE_CONFIG = {
-    1: { 
-        'sky_color': (100, 149, 237), 'grass_color': (34, 139, 34),
-        'road_light': (101, 101, 101), 'road_dark': (99, 99, 99),
-        'bg_image': 'asset/bg1.png', 'ground_image': 'asset/bg1v.png', 'bg_offset_y': -140,
-        'curve_freq': 0.05, 'curve_amp': 30.0,
-        'curve_mult': 0.8,
-        'sharp_prob': 0.1, 's_curve_prob': 0.1,
-        'curb_enabled': True
-    },
-    2: { 
-        'sky_color': (255, 140, 0), 'grass_color': (210, 180, 140),
-        'road_light': (106, 106, 106), 'road_dark': (104, 104, 104),
-        'bg_image': 'asset/bg2.png', 'ground_image': 'asset/bg2v.png', 'bg_offset_y': -135,
-        'curve_freq': 0.08, 'curve_amp': 60.0,
-        'curve_mult': 1.0,
-        'sharp_prob': 0.2, 's_curve_prob': 0.2,
-        'curb_enabled': True
-    },
-    3: { 
-        'sky_color': (20, 40, 110), 'grass_color': (20, 20, 20),
-        'road_light': (116, 116, 126), 'road_dark': (114, 114, 124),
-        'bg_image': 'asset/bg3.png', 'ground_image': 'asset/bg3v.png', 'bg_offset_y': -169,
-        'curve_freq': 0.1, 'curve_amp': 90.0,
-        'curve_mult': 1.2,
-        'sharp_prob': 0.3, 's_curve_prob': 0.4,
-        'curb_enabled': True
-    },
-    4: { 
-        'sky_color': (200, 240, 255), 'grass_color': (139, 69, 19),
-        'road_light': (126, 126, 126), 'road_dark': (124, 124, 124),
-        'bg_image': 'asset/bg4.png', 'ground_image': 'asset/bg4v.png', 'bg_offset_y': -175, 
-        'fog_color': (190, 160, 130),  # 明るい砂漠色（背景に馴染む）
-        'curve_freq': 0.04, 'curve_amp': 50.0,
-        'curve_mult': 1.5,
-        'sharp_prob': 0.5, 's_curve_prob': 0.3,
-        'curb_enabled': False,  # ステージ4は縁石なし
-        'sand_enabled': True,   # 砂粒子を有効化
-        'sand_color': (230, 200, 100),  # 砂の色（明るい黄色）
-        'fog_gradient': True,  # [TEST] 霧グラデーション有効化
-        'fog_gradient_height': 80,  # 霧の高さ
-        'fog_gradient_offset': 0  # 水平線からのオフセット
-    },
-    5: { 
-        'sky_color': (100, 149, 237), 'grass_color': (34, 139, 34),
-        'road_light': (101, 101, 101), 'road_dark': (99, 99, 99),
-        'bg_image': 'asset/bg5.png', 'ground_image': 'asset/bg5v.png', 'bg_offset_y': -135,
-        'curve_freq': 0.12, 'curve_amp': 80.0,
-        'curve_mult': 1.8,
-        'sharp_prob': 0.6, 's_curve_prob': 0.3,
-        'curb_enabled': True,
-        'fog_color': (175, 185, 195), # Keep for curbs/edges base
-        'road_fog_color': (169, 171, 166), # User specified grey
-        'fog_gradient': True,        # 霧グラデーションを有効化
-        'fog_gradient_height': 80,   # 霧の高さ
-        'fog_gradient_offset': 0     # 開始位置（下段グラデ開始から）
-    },
-    6: {
-        # Stage1の環境・コース特性を複製（トンネルギミック用ステージ）
-        # stage_idが乱数シードのため、実際のコースレイアウトはStage1とは別物になる
-        'sky_color': (100, 149, 237), 'grass_color': (34, 139, 34),
-        'road_light': (101, 101, 101), 'road_dark': (99, 99, 99),
-        'bg_image': 'asset/bg1.png', 'ground_image': 'asset/bg1v.png', 'bg_offset_y': -140,
-        'curve_freq': 0.05, 'curve_amp': 30.0,
-        'curve_mult': 0.8,
-        'sharp_prob': 0.1, 's_curve_prob': 0.1,
-        'curb_enabled': False,  # ステージ6は縁石なし（トンネルギミック優先）
-        # トンネル区間（固定位置・固定長、複数区間）: docs/tunnel_requirements.md 3-1参照
-        'tunnels': [
-            {'start_z': 20000.0, 'length': 63000.0},
-            {'start_z': 200000.0, 'length': 63000.0},
-            {'start_z': 400000.0, 'length': 63000.0},
-        ],
-    },
-}
+# ステージ定義は src/stages.cfg にある（実行中に保存すると StageConfigWatcher が反映する）。
+# この dict は他モジュールと共有されるため、再読み込みでも差し替えずに中身だけを書き換える。
+STAGE_CONFIG = load_stage_config()
 
 class Track:
+    # STAGE_CONFIG から作る派生キャッシュと、それぞれが依存するキー。ステージ定義の
+    # ホットリロード時は apply_config_change() が変わったキーと突き合わせ、該当する
+    # キャッシュだけを作り直す（ここに無いキーは毎フレーム cfg から直接読んでいる）。
+    #   segments       … コースレイアウト（create_road の乱数列。作り直すとコースが変わる）
+    #   segment_colors … セグメントに焼き込んだ路面の明暗色（レイアウトはそのまま塗り直す）
+    #   tunnel_table   … トンネル区間の (開始z, 終了z) 表（draw / get_tunnel_at が参照）
+    CONFIG_DEPS = {
+        'segments': frozenset({'curve_mult', 'sharp_prob'}),
+        'segment_colors': frozenset({'road_light', 'road_dark'}),
+        'tunnel_table': frozenset({'tunnels'}),
+    }
+
     def __init__(self):
         self.segments = []
+        self.stage_id = None
+        self._tunnel_ranges = []        # 現在のステージのトンネル区間表（CONFIG_DEPS 参照）
+        self.layout_version = 0         # コース・トンネル表を作り直すたびに増える（派生表の作り直し判定用）
         self.goal_distance = GOAL_DISTANCE
         self.goal_distance = GOAL_DISTANCE
         self.stripe_length = STRIPE_LENGTH
@@ -211,7 +157,9 @@ class Track:
         self._tunnel_glow_size = (0, 0)
         self._glow_scratch = {}         # ブラーの縮小/拡大に使うSurfaceのキャッシュ
         self._mountain_ridge = Track._build_mountain_ridge()  # 坑口の山の稜線（世界座標、形は毎フレーム同じ）
-        self._mountain_forest_tex = pygame.image.load(MOUNTAIN_FOREST_IMAGE).convert_alpha()  # 山肌に敷き詰める森テクスチャ
+        # 山肌に敷き詰める森テクスチャ。描画で初めて使うときに受け取る
+        # （コースと当たり判定だけを使うディスプレイ無しのシミュレーションでは読まない）
+        self._mountain_forest_tex = None
         self._alpha_scratch = {}        # 山肌テクスチャのマスク・タイル描画に使うSurfaceのキャッシュ
 
     @staticmethod
@@ -309,6 +257,8 @@ class Track:
 
 
     def create_road(self, s_id):
+        self.stage_id = s_id
+        self._rebuild_tunnel_table()
         self.segments.clear()
         cfg = STAGE_CONFIG.get(s_id, STAGE_CONFIG[1])
         c_light = cfg["road_light"]
@@ -366,7 +316,46 @@ class Track:
         
         # End Buffer
         self.add_segment_sequence(300, 0.0, 0.0, c_light, c_dark)
+        self.layout_version += 1
+
+
+    def _rebuild_tunnel_table(self):
+        cfg = STAGE_CONFIG.get(self.stage_id, STAGE_CONFIG[1])
+        self._tunnel_ranges = [(t['start_z'], t['start_z'] + t['length'])
+                               for t in cfg.get('tunnels', [])]
+        self.layout_version += 1
 
+    @property
+    def tunnel_ranges(self):
+        """現在のステージのトンネル区間 [(開始z, 終了z), ...]。"""
+        return self._tunnel_ranges
+
+    def _recolor_segments(self):
+        cfg = STAGE_CONFIG.get(self.stage_id, STAGE_CONFIG[1])
+        c_light = cfg["road_light"]
+        c_dark = cfg["road_dark"]
+        for seg in self.segments:
+            seg['color'] = c_light if (seg['index'] % 2 == 0) else c_dark
+
+    def apply_config_change(self, stage_id, keys):
+        """ステージ定義の変更（stage_id の keys が変わった）を反映し、作り直したキャッシュ名を返す。
+
+        読み込み中のステージ以外の変更は無視する（次に create_road した時点で読まれる）。
+        レイアウトを作り直す場合は色も表も create_road の中で作り直されるので、残りは見ない。
+        """
+        if stage_id != self.stage_id or not self.segments:
+            return []
+        rebuilt = []
+        if keys & self.CONFIG_DEPS['segments']:
+            self.create_road(stage_id)
+            return ['segments', 'segment_colors', 'tunnel_table']
+        if keys & self.CONFIG_DEPS['segment_colors']:
+            self._recolor_segments()
+            rebuilt.append('segment_colors')
+        if keys & self.CONFIG_DEPS['tunnel_table']:
+            self._rebuild_tunnel_table()
+            rebuilt.append('tunnel_table')
+        return rebuilt
 
     def get_bg_image(self, stage_id):
         cfg = STAGE_CONFIG.get(stage_id, STAGE_CONFIG[1])
@@ -479,9 +468,13 @@ class Track:
 
     def get_tunnel_at(self, z, stage_id=1):
         """Returns True if the given z position is within any of the stage's tunnel sections."""
-        cfg = STAGE_CONFIG.get(stage_id, STAGE_CONFIG[1])
-        for t in cfg.get('tunnels', []):
-            if t['start_z'] <= z < t['start_z'] + t['length']:
+        if stage_id == self.stage_id:
+            ranges = self._tunnel_ranges
+        else:
+            cfg = STAGE_CONFIG.get(stage_id, STAGE_CONFIG[1])
+            ranges = [(t['start_z'], t['start_z'] + t['length']) for t in cfg.get('tunnels', [])]
+        for t_start, t_end in ranges:
+            if t_start <= z < t_end:
                 return True
         return False
 
@@ -605,6 +598,8 @@ class Track:
         mask.fill((0, 0, 0, 0))
         pygame.draw.polygon(mask, (255, 255, 255, 255), local_poly)
 
+        if self._mountain_forest_tex is None:
+            self._mountain_forest_tex = assets.image(MOUNTAIN_FOREST_IMAGE)
         tex = self._mountain_forest_tex
         # タイルの上限は画面幅まで（それより大きくしても、はみ出す分は敷き詰めループが
         # 別タイルでまかなうので見た目は変わらない。坑口に接近するとscaleが急激に増えるため、
@@ -657,7 +652,11 @@ class Track:
             pygame.transform.smoothscale(layer, screen_size, up)
             screen.blit(up, (0, 0), special_flags=pygame.BLEND_ADD)
 
-    def draw(self, screen, player_z, player_x, screen_width, screen_height, stage_id=1, fog_color=None, camera_y=None):
+    def draw(self, screen, player_z, player_x, screen_width, screen_height, stage_id=1, fog_color=None, camera_y=None,
+             sprites=None, skidmarks=None):
+        # sprites: 道路上に立つスプライト（対戦車。src/opponent_sprites.py の OpponentSprites）。
+        # prepare() 済みのものを渡すと、奥→手前のセグメント描画の間に差し込んで描く
+        # skidmarks: 路面のタイヤ痕（src/skidmarks.py の SkidMarks）。各セグメントの路面の直後に描く
         # Config (fallback for fog)
         cfg = STAGE_CONFIG.get(stage_id, STAGE_CONFIG[1])
         if fog_color is None:
@@ -667,7 +666,10 @@ class Track:
         curb_enabled = cfg.get('curb_enabled', False)
 
         # Tunnel section ranges (Stage6 gimmick, may appear multiple times per stage)
-        tunnel_ranges = [(t['start_z'], t['start_z'] + t['length']) for t in cfg.get('tunnels', [])]
+        if stage_id == self.stage_id:
+            tunnel_ranges = self._tunnel_ranges
+        else:
+            tunnel_ranges = [(t['start_z'], t['start_z'] + t['length']) for t in cfg.get('tunnels', [])]
         
         # Find start segment
         start_idx = int(player_z / STRIPE_LENGTH)
@@ -734,6 +736,30 @@ class Track:
         assert not render_points or render_points[0]['x_rel'] == 0.0, \
             "x_turn origin is off the camera position; car.x frame would break"
 
+        # 道路上の点 (z, 横位置 x) の投影。セグメント両端の render_points を補間する
+        next_sprite_seg = -1
+        if sprites is not None:
+            next_sprite_seg = sprites.next_segment
+            sprite_cam_y = (self.get_height_at(player_z) if camera_y is None else camera_y) + CAMERA_HEIGHT
+
+            def project_on_road(z, x):
+                k = int(z / STRIPE_LENGTH) - start_idx
+                if k < 0 or k + 1 >= len(render_points):
+                    return None
+                p_near = render_points[k]
+                p_far = render_points[k + 1]
+                t = (z - p_near['z_world']) / STRIPE_LENGTH
+                rel_x = p_near['x_rel'] + (p_far['x_rel'] - p_near['x_rel']) * t + x - player_x
+                rel_y = p_near['y_world'] + (p_far['y_world'] - p_near['y_world']) * t - sprite_cam_y
+                return self.project(rel_x, rel_y, z - player_z, 0, screen_width, screen_height)
+
+        # タイヤ痕は描画範囲の帯をまとめて投影しておき、セグメントごとに路面の上へ描く
+        next_mark_seg = -1
+        if skidmarks is not None:
+            mark_cam_y = (self.get_height_at(player_z) if camera_y is None else camera_y) + CAMERA_HEIGHT
+            next_mark_seg = skidmarks.project(render_points, start_idx, player_z, player_x, mark_cam_y,
+                                              screen_width)
+
         # トンネル天井ライトの発光用Surface（ライト本体だけを描き、後段でブラーをかけて加算合成する）
         # 黒でクリアするのは、加算合成では黒＝発光なしとして扱われるため（縮小時に黒と混ざって減衰する）
         # 弧の分割数はフレームに1つだけ決め、全トンネルセグメントで共有する（_arc_segments_for参照:
@@ -761,6 +787,12 @@ class Track:
 
         # Draw Back-to-Front
         for i in range(max_idx, start_idx - 1, -1):
+             # 描き終えた奥のセグメント（i + 1 以降）の路面にタイヤ痕を描く（i の路面が手前を覆う）
+             if next_mark_seg > i:
+                 next_mark_seg = skidmarks.draw_until(screen, i + 1)
+             # セグメント i より奥にいるスプライトを、i の路面より先に描く（手前の丘に隠れる）
+             if next_sprite_seg > i:
+                 next_sprite_seg = sprites.draw_until(screen, i + 1, project_on_road)
              if i >= len(self.segments): continue
              k = i - start_idx
              if k + 1 >= len(render_points): continue
@@ -1252,6 +1284,11 @@ class Track:
                      gh = (STRIPE_LENGTH * 0.3) * gs
                      pygame.draw.rect(screen, (255, 255, 255), (gx - gw/2, gy - gh, gw, gh))
 
+        if next_mark_seg >= 0:
+            skidmarks.draw_until(screen, start_idx)
+        if next_sprite_seg >= 0:
+            sprites.draw_until(screen, start_idx, project_on_road)
+
         # トンネル天井ライトのにじみを、本体ポリゴンの上からまとめて重ねる
         if tunnel_glow_surf is not None:
             self._blit_tunnel_glow(screen, tunnel_glow_surf)
@@ -209,7 +209,7 @@ class UI:
                 global_poly = [(p[0] + x, p[1] + y) for p in polys[i]]
                 pygame.draw.polygon(screen, color, global_poly)
 
-    def draw_hud(self, screen, stage_id, elapsed_time, rem_dist):
+    def draw_hud(self, screen, stage_id, elapsed_time, rem_dist, split_delta=None):
         # Stage (1.5x size, italic)
         # Create italic font for stage display
         italic_font = pygame.font.Font(None, HUD_FONT_SIZE)
@@ -221,6 +221,12 @@ class UI:
         # Time
         time_surface = self.font.render(f"TIME: {elapsed_time:.2f}", True, (255, 255, 255))
         screen.blit(time_surface, (20, 60))
+
+        # Delta vs the stage's best run (green = ahead, red = behind)
+        if split_delta is not None:
+            color = (80, 255, 120) if split_delta <= 0.0 else (255, 90, 90)
+            delta_surface = self.font.render(f"{split_delta:+.2f}", True, color)
+            screen.blit(delta_surface, (20 + time_surface.get_width() + 16, 60))
         
         # Dist
         d_s = self.font.render(f"DIST: {rem_dist}m", True, (200, 200, 200))
@@ -237,6 +243,18 @@ class UI:
         tr = t.get_rect(center=(self.screen_width/2, self.screen_height/2))
         screen.blit(t, tr)
 
+    def draw_loading(self, screen, fraction):
+        """起動時のアセット読み込み中に出すプログレスバー（fraction: 0.0-1.0）。"""
+        screen.fill((0, 0, 0))
+        t = self.font.render("LOADING", True, (255, 255, 255))
+        screen.blit(t, t.get_rect(center=(self.screen_width / 2, self.screen_height / 2 - 30)))
+        bar_w = self.screen_width // 2
+        bar = pygame.Rect((self.screen_width - bar_w) // 2, self.screen_height // 2, bar_w, 12)
+        pygame.draw.rect(screen, (80, 80, 80), bar, 1)
+        fill = bar.inflate(-4, -4)
+        fill.width = int(fill.width * max(0.0, min(1.0, fraction)))
+        pygame.draw.rect(screen, (255, 215, 0), fill)
+
     def draw_game_clear(self, screen, total_time, ranking_data):
         # Overlay
         s = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
@@ -316,6 +334,19 @@ class UI:
         jp_rect = jp_guide_s.get_rect(topright=(self.screen_width - 20, 95))
         screen.blit(jp_guide_s, jp_rect)
 
+    def draw_rewind_status(self, screen, seconds_left):
+        """
+        Draws the REWIND indicator while the rewind button is held, with how far back it can still go.
+        """
+        color = (120, 200, 255) if seconds_left > 0.0 else (150, 150, 150)
+        msg = self.font.render("<< REWIND", True, color)
+        msg_scaled = pygame.transform.rotozoom(msg, 0, 2.0)
+        rect = msg_scaled.get_rect(topright=(self.screen_width - 20, 20))
+        screen.blit(msg_scaled, rect)
+
+        left = self.font.render(f"{seconds_left:.1f}s", True, (200, 200, 200))
+        screen.blit(left, left.get_rect(topright=(self.screen_width - 20, 95)))
+
     def draw_settings_menu(self, screen, master_volume):
         """
         Draws the volume settings overlay (opened/closed with Tab / Start).
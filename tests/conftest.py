@@ -0,0 +1,27 @@
+# テスト全体の共通設定。
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from src import logger, texture_cache
+
+
+@pytest.fixture(autouse=True)
+def no_texture_cache(monkeypatch):
+    # テストは pygame.image.load を差し替えて偽の画像を読ませるので、実物の asset/ から
+    # 作ったディスクキャッシュを読んだり、偽の画像で上書きしたりしないよう無効にしておく
+    monkeypatch.setattr(texture_cache, "TEXTURE_CACHE_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def log_to_tmp(monkeypatch, tmp_path):
+    # 読み込み失敗などのテストは log_warn を通るので、リポジトリの logs/ に書かないよう
+    # ログの置き場所をテストごとの一時ディレクトリへ向ける
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    monkeypatch.setattr(logger, "LOG_DIR", str(log_dir))
+    return log_dir
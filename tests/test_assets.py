@@ -0,0 +1,78 @@
+# AssetStore（スレッドプールでデコードし、受け取り時に変換する置き場）のテスト。
+#
+# asset/ の画像は LFS ポインタのままなので、pygame.image.load を差し替えて確かめる。
+
+import os
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from src.assets import AssetStore, asset_path, PROJECT_ROOT
+
+
+@pytest.fixture(scope="module")
+def screen():
+    pygame.init()
+    return pygame.display.set_mode((64, 64))
+
+
+@pytest.fixture()
+def store():
+    s = AssetStore(workers=4)
+    yield s
+    s.shutdown()
+
+
+def test_paths_do_not_depend_on_cwd():
+    assert asset_path("car") == os.path.join(PROJECT_ROOT, "asset", "car.png")
+    assert asset_path("asset/bg1.png") == os.path.join(PROJECT_ROOT, "asset", "bg1.png")
+
+
+def test_preload_decodes_in_parallel_and_converts_on_take(screen, store, monkeypatch):
+    # 4本のデコードが同時に走っていないと barrier が抜けず、タイムアウトで失敗する
+    barrier = threading.Barrier(4, timeout=5)
+    main_thread = threading.current_thread()
+    decoded_on = []
+
+    def load(path):
+        decoded_on.append(threading.current_thread())
+        barrier.wait()
+        return pygame.Surface((8, 4), pygame.SRCALPHA)
+
+    monkeypatch.setattr(pygame.image, "load", load)
+    keys = ["a.png", "b.png", "c.png", "d.png"]
+    store.preload(keys)
+    surf = store.image("a.png")
+    assert surf.get_size() == (8, 4)
+    assert main_thread not in decoded_on
+    assert store.image("a.png") is surf  # keep=True は同じ Surface を返す
+
+    for key in keys:
+        store.image(key)
+    assert store.progress() == (4, 4)
+    assert not store.is_loading()
+
+
+def test_keep_false_releases_and_errors_propagate(screen, store, monkeypatch):
+    calls = []
+
+    def load(path):
+        calls.append(path)
+        if path.endswith("missing.png"):
+            raise FileNotFoundError(path)
+        return pygame.Surface((4, 4))
+
+    monkeypatch.setattr(pygame.image, "load", load)
+    store.preload(["bg.png"], alpha=False)
+    first = store.image("bg.png", alpha=False, keep=False)
+    second = store.image("bg.png", alpha=False, keep=False)
+    assert first is not second and len(calls) == 2
+
+    with pytest.raises(FileNotFoundError):
+        store.image("missing.png")
@@ -0,0 +1,41 @@
+# 自動運転（src/autopilot.py）のテスト。
+#
+# ディスプレイ無しで全ステージをゴールできること・毎回同じタイムになること・
+# ほとんど道路を外れないこと、目標速度の表がブレーキで守れる形になっていることを確かめる。
+
+import math
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.autopilot import Autopilot, build_speed_profile, AUTOPILOT_BRAKE
+from src.sim import RaceSim, run_stages
+from src.track import STRIPE_LENGTH
+
+
+def test_autopilot_finishes_every_stage_on_the_road():
+    autopilot = Autopilot()
+    ticks = [0, 0]
+
+    def policy(sim):
+        ticks[0] += 1
+        ticks[1] += sim.car.offroad
+        return autopilot(sim)
+
+    first = run_stages(policy)
+    assert set(first) == {1, 2, 3, 4, 5, 6}
+    assert all(t is not None and 30.0 < t < 200.0 for t in first.values())
+    assert ticks[1] < 0.02 * ticks[0]
+    assert run_stages(Autopilot()) == first
+
+
+def test_speed_profile_can_be_met_by_braking():
+    sim = RaceSim.headless()
+    sim.start_stage(3)
+    profile = build_speed_profile(sim.track, 3)
+    assert len(profile) == len(sim.track.segments) + 1
+    assert min(profile) < max(profile)  # カーブの手前では目標が下がる
+    per_segment = 2.0 * AUTOPILOT_BRAKE * STRIPE_LENGTH
+    for here, there in zip(profile, profile[1:]):
+        assert here <= math.sqrt(there ** 2 + per_segment) + 1e-9
@@ -0,0 +1,105 @@
+# BackgroundManager のグラデーション帯キャッシュ（_get_band）のテスト。
+#
+# 帯は毎フレーム作り直していた頃と同じ絵であること、フェード中の倍率変化では
+# 量子化された段のぶんしか Surface が作られないことを確認する。
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from src.background import BackgroundManager, HAZE_MULT_STEPS
+
+SCREEN_W, SCREEN_H = 800, 600
+
+
+@pytest.fixture(scope="module")
+def manager():
+    pygame.init()
+    pygame.display.set_mode((SCREEN_W, SCREEN_H))
+    return BackgroundManager(SCREEN_W, SCREEN_H)
+
+
+def test_band_matches_per_line_drawing(manager):
+    """mult=1.0 の帯は、以前の1行ずつ draw.line で描いていた帯と同一。"""
+    top, bottom, height = (200, 180, 160), (90, 110, 70), 20
+    ref = pygame.Surface((SCREEN_W, height), pygame.SRCALPHA)
+    for i in range(height):
+        t = i / float(height)
+        color = manager._interpolate_color(top, bottom, t)
+        pygame.draw.line(ref, (*color, int(t ** 2 * 180)), (0, i), (SCREEN_W, i))
+    band = manager._get_band(height, top, bottom, 180, 2, True, 1.0)
+    assert pygame.image.tobytes(band, "RGBA") == pygame.image.tobytes(ref, "RGBA")
+
+
+def test_fade_reuses_quantised_levels(manager):
+    manager._band_cache.clear()
+    color = (120, 130, 140)
+    for _ in range(2):  # 2往復目は全段キャッシュヒット
+        for k in range(1001):
+            manager._get_band(80, color, color, 200, 3, False, k / 1000.0)
+    assert len(manager._band_cache) == HAZE_MULT_STEPS + 1
+    assert manager._get_band(80, color, color, 200, 3, False, 0.5) is \
+        manager._get_band(80, color, color, 200, 3, False, 0.5 + 0.2 / HAZE_MULT_STEPS)
+
+
+@pytest.fixture()
+def staged_manager(manager, monkeypatch):
+    # 背景画像はリポジトリ未追跡なので、横方向に模様のある画像で代用する
+    def stripes(_path):
+        surf = pygame.Surface((400, 300))
+        for x in range(0, 400, 10):
+            surf.fill(((x * 7) % 256, (x * 3) % 256, 90), (x, 0, 10, 300))
+        return surf
+    monkeypatch.setattr(pygame.image, "load", stripes)
+    manager.current_stage_id = -1
+    manager.set_stage(1)
+    return manager
+
+
+def test_sky_cache_matches_direct_drawing(staged_manager):
+    m = staged_manager
+    screen = pygame.display.get_surface()
+    layer = m.layers[0]
+    for pitch, x in [(0, layer.current_x), (3, -123.4), (-12, -799.0)]:
+        layer.current_x = x
+        m._tunnel_haze_mult = 1.0
+        screen.fill((1, 2, 3))
+        m._draw_sky(screen, pitch, pitch)
+        cached = pygame.image.tobytes(screen, "RGB")
+
+        screen.fill((1, 2, 3))
+        layer.draw(screen, pitch)
+        band, band_y = m._prepare_gradient_band(pitch)
+        screen.blit(band, (0, band_y))
+        assert cached == pygame.image.tobytes(screen, "RGB")
+
+
+def test_sky_cache_skips_subpixel_scroll(staged_manager):
+    m = staged_manager
+    screen = pygame.display.get_surface()
+    m._tunnel_haze_mult = 1.0
+    m.layers[0].current_x = -300.2
+    m._draw_sky(screen, 0, 0)
+    key = m._sky_key
+    m.layers[0].current_x = -300.9  # 整数位置は同じ
+    m._draw_sky(screen, 0, 0)
+    assert m._sky_key is key
+    m.layers[0].current_x = -301.1
+    m._draw_sky(screen, 0, 0)
+    assert m._sky_key != key
+
+
+def test_wrapping_layer_keeps_scrolling(staged_manager):
+    layer = staged_manager.layers[0]
+    layer.wrap = True
+    for _ in range(600):  # 長いカーブ: クランプなら端で止まる
+        layer.update(1 / 60.0, 1.0, 3000.0)
+    assert -layer.width <= layer.current_x < 0
+    assert layer.covers_screen(0)
+    layer.wrap = False
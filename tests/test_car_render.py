@@ -0,0 +1,59 @@
+# Car.render の描画用スプライト（姿勢アトラス・ランプのにじみ・アフターファイア）のテスト。
+#
+# 傾き・ブレーキ・アフターファイアのどれを描いても、render() が毎フレーム回転・拡縮を
+# しないこと（読み込み時に作った画像から選ぶだけ）と、選ぶ姿勢が角度に十分近いことを確かめる。
+
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from src.assets import assets
+from src.car import Car, CAR_POSE_MAX_ANGLE, CAR_POSE_STEP
+
+
+@pytest.fixture()
+def car(monkeypatch):
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    # asset/ の画像は LFS ポインタのままなので、車とアフターファイアの画像を差し替える
+    monkeypatch.setattr(pygame.image, "load", lambda _src, *_: pygame.Surface((400, 200), pygame.SRCALPHA))
+    assets.discard(["car", "afterfire"])
+    car = Car(800, 600, 540)
+    yield car, screen
+    assets.discard(["car", "afterfire"])
+
+
+def test_render_only_blits_prebuilt_sprites(car, monkeypatch):
+    car, screen = car
+    assert len(car.fire_variants) == 25
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError("render() must not transform surfaces per frame")
+
+    monkeypatch.setattr(pygame.transform, "rotate", forbidden)
+    monkeypatch.setattr(pygame.transform, "scale", forbidden)
+    random.seed(1)
+    car.braking = True
+    car.accel_pressed = True
+    car.speed = 20.0
+    for angle in (-3.5, -2.5, -0.6, 0.0, 0.05, 1.3, 3.49):
+        for _ in range(5):
+            car.render(screen, angle=angle)
+
+
+def test_pose_is_nearest_quantised_angle(car):
+    car, _ = car
+    for angle in (-CAR_POSE_MAX_ANGLE, -1.37, 0.2, 2.5, CAR_POSE_MAX_ANGLE):
+        img, used = car._pose_for(angle)
+        assert abs(used - angle) <= CAR_POSE_STEP / 2
+        assert img is car.pose_atlas[car.pose_angles.index(used)]
+    # 範囲外はその場で回転する
+    img, used = car._pose_for(CAR_POSE_MAX_ANGLE + 5.0)
+    assert used == CAR_POSE_MAX_ANGLE + 5.0 and img.get_height() > car.original_img.get_height()
@@ -0,0 +1,105 @@
+# 車同士の接触（src/collisions.py）のテスト。
+#
+# z でソートした並びから拾う近傍の組が総当たりと一致すること、重なった組が横に
+# 押し離されること、トンネルの壁際ではもう一方が押されること、押されたプレイヤーの
+# 路肩・壁のフラグが押された先の位置で決め直されることを確かめる。
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.collisions import CAR_BODY_LENGTH, CAR_BODY_WIDTH, ContactSolver, ZSortedIndex
+from src.controls import ControlInput
+from src.sim import RaceSim
+from src.track import TUNNEL_WALL_LIMIT
+
+
+def brute_force_pairs(z, reach):
+    n = len(z)
+    return {frozenset((i, j)) for i in range(n) for j in range(i + 1, n) if abs(z[i] - z[j]) < reach}
+
+
+def test_neighbour_pairs_match_all_pairs_as_order_changes():
+    rng = np.random.default_rng(3)
+    z = rng.uniform(0.0, 60000.0, 150)
+    index = ZSortedIndex()
+    for _ in range(20):
+        z = z + rng.uniform(0.0, 400.0, len(z))  # 1刻みで少しずつ抜きつ抜かれつ
+        order = index.update(z)
+        assert np.all(np.diff(z[order]) >= 0.0)
+        a, b = index.neighbour_pairs(z, CAR_BODY_LENGTH)
+        assert {frozenset(p) for p in zip(a.tolist(), b.tolist())} == brute_force_pairs(z, CAR_BODY_LENGTH)
+
+
+def test_overlapping_cars_are_pushed_apart_sideways():
+    solver = ContactSolver()
+    x = np.array([0.0, 300.0, 5000.0])
+    z = np.array([1000.0, 1500.0, 1200.0])
+    out = solver.resolve(x, z)
+    assert solver.contacts == 1
+    assert out[1] - out[0] == pytest.approx(CAR_BODY_WIDTH, rel=0.2)
+    assert out[0] + out[1] == pytest.approx(300.0)  # 半分ずつ押す
+    assert out[2] == 5000.0
+    assert list(x) == [0.0, 300.0, 5000.0]  # 入力は書き換えない
+
+
+def test_tunnel_wall_limits_the_push():
+    solver = ContactSolver()
+    x = np.array([TUNNEL_WALL_LIMIT - 100.0, TUNNEL_WALL_LIMIT - 300.0])
+    z = np.array([1000.0, 1200.0])
+    out = solver.resolve(x, z, np.array([0.0, 5000.0]))
+    assert out[0] == TUNNEL_WALL_LIMIT
+    assert out[0] - out[1] > 0.85 * CAR_BODY_WIDTH  # 壁際の車のぶんはもう一方が押される
+
+
+def test_cars_beyond_the_wall_are_not_snapped_back():
+    solver = ContactSolver()
+    # 0 と 1 が接触。2 は離れた位置で壁の外（Car.update が少しずつ押し戻している途中）
+    x = np.array([TUNNEL_WALL_LIMIT + 150.0, TUNNEL_WALL_LIMIT - 100.0, -TUNNEL_WALL_LIMIT - 200.0])
+    z = np.array([1000.0, 1200.0, 30000.0])
+    out = solver.resolve(x, z, np.array([0.0, 50000.0]))
+    assert solver.contacts == 1
+    assert out[2] == x[2]
+    # 壁の外の車は押されてもそれ以上外へは出ず、もう一方が内側へ押される
+    assert out[0] == x[0]
+    assert out[1] < x[1]
+
+
+def test_pushed_player_flags_follow_new_position():
+    sim = RaceSim.headless(opponents=1)
+    sim.start_stage(1)
+    car, field = sim.car, sim.opponents
+    car.z = field.z[0] = 60000.0
+    car.x, field.x[0] = -600.0, -450.0
+    car.update_offroad(sim.track, 1)
+    assert not car.offroad
+    sim.contacts.resolve_field(car, field)
+    assert car.x < -600.0
+    assert car.offroad_l and car.offroad and not car.offroad_r
+
+    # トンネル内で壁に押し付けられたら火花の向きが立ち、押し戻されて離れたら消える
+    sim.start_stage(6)
+    car, field = sim.car, sim.opponents
+    car.z = field.z[0] = 40000.0
+    car.x, field.x[0] = 1000.0, 800.0
+    sim.contacts.resolve_field(car, field)
+    assert car.x == TUNNEL_WALL_LIMIT
+    assert car.wall_contact == 1 and car.offroad_r
+    field.x[0] = 1300.0
+    sim.contacts.resolve_field(car, field)
+    assert car.x < TUNNEL_WALL_LIMIT
+    assert car.wall_contact == 0
+
+
+def test_large_field_runs_headless():
+    sim = RaceSim.headless(opponents=120)
+    sim.start_stage(6)
+    for _ in range(600):
+        sim.step(ControlInput(0.0, True, False))
+    assert sim.opponents.x.shape == (120,)
+    assert np.all(np.isfinite(sim.opponents.x))
@@ -0,0 +1,82 @@
+# パーティクルのエミッタ（src/emitters.py）のテスト。
+#
+# 1秒あたりに出る粒の数がフレームレートによらず rate どおりなこと、路面ごとの表と
+# ステージ定義での上書き・間違った名前の扱い、Effects が車の状態から正しい側に火花を出すことを確かめる。
+
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from src import emitters
+from src.emitters import Emitter, EMITTER_TABLE, SURFACE_ASPHALT, SURFACE_SAND, build_emitters
+
+
+def make_car(**state):
+    car = dict(speed=100.0, offroad_l=False, offroad_r=False, accel_pressed=False, braking=False,
+               steering_input=0.0, wall_contact=0, rect=pygame.Rect(240, 410, 320, 160))
+    car.update(state)
+    return SimpleNamespace(**car)
+
+
+@pytest.mark.parametrize("fps", [24, 30, 60, 144, 240])
+def test_emission_rate_is_frame_rate_independent(fps):
+    emitter = Emitter('wall', EMITTER_TABLE[SURFACE_ASPHALT]['wall_spark_right'])
+    car = make_car(speed=32.4, wall_contact=1)
+    total = sum(emitter.count(1.0 / fps, car, 0.0) for _ in range(10 * fps))
+    assert total in (150, 151)  # 15/秒 × 10秒（最初の端数はランダム）
+    # 条件が切れたら出さない・速度の範囲外でも出さない
+    assert emitter.count(0.5, make_car(speed=32.4), 0.0) == 0
+    assert emitter.count(0.5, make_car(speed=5.0, wall_contact=1), 0.0) == 0
+
+
+def test_surface_tables_and_stage_overrides(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(emitters, "log_warn", warnings.append)
+    asphalt = {e.name: e for e in build_emitters({})}
+    sand = {e.name: e for e in build_emitters({'surface': SURFACE_SAND})}
+    assert 'brake_dust' not in asphalt and asphalt['offroad_dust_left'].particle == 'dust'
+    assert sand['brake_dust'].particle == 'sand' and sand['offroad_dust_left'].particle == 'sand'
+    assert not warnings
+
+    cfg = {'surface': SURFACE_SAND,
+           'emitters': {'brake_dust': {'rate': 2.0}, 'accel_slip': {'anchor': 'nowhere'},
+                        'no_such_emitter': {'rate': 1.0}}}
+    custom = {e.name: e for e in build_emitters(cfg)}
+    assert custom['brake_dust'].rate == 2.0 and custom['wall_spark_left'].rate == 15.0
+    assert 'accel_slip' not in custom  # 間違った項目のエミッタは飛ばす
+    assert len(warnings) == 2
+    assert {e.name for e in build_emitters({'surface': 'ice'})} == set(asphalt)
+
+
+def test_effects_emit_sparks_on_the_contact_side(monkeypatch):
+    pytest.importorskip("numpy")
+    pygame.display.init()
+    pygame.display.set_mode((800, 600))
+    monkeypatch.setattr(pygame.image, "load",
+                        lambda *a, **k: pygame.Surface((64, 64), pygame.SRCALPHA))
+    from src.effects import Effects
+    fx = Effects(800, 600)
+    right = make_car(speed=32.4, wall_contact=1, offroad_r=True)
+    for _ in range(60):
+        fx.update_emitters(1 / 60, right, 6, 0.0)
+    sparks = fx.sparks.live()
+    assert sparks and all(fx.sparks.flip_x[i] and fx.sparks.x[i] > right.rect.right for i in sparks)
+    dust = fx.particles.live()
+    assert dust and all(fx.particles.x[i] > right.rect.centerx for i in dust)
+
+    # Stage 4（砂の路面）ではブレーキで砂けむりが出て、ほかのステージでは出ない
+    fx.clear_all()
+    braking = make_car(braking=True)
+    for _ in range(60):
+        fx.update_emitters(1 / 60, braking, 1, 0.0)
+    assert len(fx.particles) == 0
+    for _ in range(60):
+        fx.update_emitters(1 / 60, braking, 4, 0.0)
+    assert len(fx.particles) >= 7
@@ -0,0 +1,65 @@
+# 自己ベストのゴースト（src/ghost.py）のテスト。
+#
+# ディスプレイ無しのシミュレーションで1ステージ走って記録を保存し、mmap で開いた記録を
+# 時刻で引くと走ったときの位置が返ること、遅い走りでは上書きされないことを確かめる。
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from src.controls import ControlInput
+from src.ghost import Ghost, GhostRecorder, ghost_path, read_best_time
+from src.sim import RaceSim
+
+
+def run(tmp_path, stage_id=1, ticks=600):
+    sim = RaceSim.headless()
+    sim.start_stage(stage_id)
+    recorder = GhostRecorder(round(1.0 / sim.dt))
+    recorder.start_stage(stage_id)
+    poses = []
+    for t in range(ticks):
+        sim.step(ControlInput(0.3 if t % 200 < 50 else 0.0, True, False))
+        recorder.record(sim.car)
+        poses.append((sim.time, sim.car.z, sim.car.x, sim.car.speed))
+    return sim, recorder, poses
+
+
+def test_saved_run_samples_back_by_time(tmp_path):
+    sim, recorder, poses = run(tmp_path)
+    assert recorder.save_if_best(sim.time, tmp_path)
+    ghost = Ghost.open(1, tmp_path)
+    try:
+        assert ghost.ticks == len(poses) and ghost.time == sim.time
+        for t, z, x, speed in poses[:-1]:
+            assert ghost.sample(t) == pytest.approx((z, x, speed), rel=1e-6, abs=1e-3)
+        # 刻みの間は前後の刻みを補間する
+        (t0, z0, _, _), (t1, z1, _, _) = poses[100], poses[101]
+        assert z0 < ghost.sample((t0 + t1) / 2)[0] < z1
+        assert ghost.sample(sim.time + 1.0) is None  # 記録の外
+    finally:
+        ghost.close()
+
+
+def test_only_faster_runs_replace_the_record(tmp_path):
+    sim, recorder, _ = run(tmp_path)
+    assert recorder.save_if_best(40.0, tmp_path)
+    assert not recorder.save_if_best(41.0, tmp_path)
+    assert read_best_time(1, tmp_path) == 40.0
+    ghost = Ghost.open(1, tmp_path)
+    ghost.close()  # 開いていた記録を閉じれば置き換えられる
+    assert recorder.save_if_best(39.5, tmp_path)
+    assert read_best_time(1, tmp_path) == 39.5
+
+
+def test_missing_or_broken_record_is_ignored(tmp_path, log_to_tmp):
+    assert Ghost.open(2, tmp_path) is None
+    sim, recorder, _ = run(tmp_path, ticks=120)
+    recorder.save_if_best(sim.time, tmp_path)
+    path = Path(ghost_path(1, tmp_path))
+    path.write_bytes(path.read_bytes()[:-100])
+    assert Ghost.open(1, tmp_path) is None
+    assert "ignoring ghost" in (log_to_tmp / "warn.log").read_text(encoding="utf-8")
@@ -0,0 +1,138 @@
+# GroundLayer（地面の描画）のテスト。
+#
+# 帯の割り付けが許容量を守って隙間なく並ぶこと、帯の上端位置が変わると割り付けを作り直すこと、
+# strips / mode7 のどちらのエンジンでも地面の範囲を隙間なく埋めること、
+# 拡大帯を画面に載る列だけ拡大しても全幅を拡大したときと（列の継ぎ目の1pxを除き）同じ絵になることを確かめる。
+
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from src.track import HORIZON_Y
+
+from src.background import (GroundLayer, GROUND_STRIP_TOLERANCE_PX,
+                            GROUND_STRIP_TOLERANCE_TEXELS)
+
+SCREEN_W, SCREEN_H = 800, 600
+
+
+@pytest.fixture(scope="module")
+def screen():
+    pygame.init()
+    return pygame.display.set_mode((SCREEN_W, SCREEN_H))
+
+
+@pytest.fixture()
+def ground(screen, monkeypatch):
+    # 地面画像はリポジトリ未追跡なので、細かい模様のノイズ画像で代用する
+    # （一様な色だと縮小の差が出ず、比較にならない）
+    def noise(_path):
+        rng = random.Random(7)
+        surf = pygame.Surface((400, 300))
+        for _ in range(4000):
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            surf.fill(color, (rng.randrange(400), rng.randrange(300),
+                              rng.randrange(1, 12), rng.randrange(1, 4)))
+        return surf
+    monkeypatch.setattr(pygame.image, "load", noise)
+    return GroundLayer("ground.png", SCREEN_W, SCREEN_H)
+
+
+def render(screen, layer, pitch, road_x, player_z):
+    screen.fill((255, 0, 255))
+    layer.draw(screen, pitch, road_x, player_z)
+    return pygame.image.tobytes(screen, "RGB")
+
+
+def test_layout_rebuilt_when_offset_changes(ground):
+    before = list(ground.strip_layout)
+    ground.set_start_y(ground.start_y + 10)
+    assert ground.strip_layout != before
+    # 上端が地平線より上なら地面は描かない
+    ground.set_start_y(HORIZON_Y)
+    assert ground.strip_layout == []
+
+
+@pytest.mark.parametrize("engine", ["strips", "mode7"])
+@pytest.mark.parametrize("pitch, road_x", [(0, 0.0), (7, 140.0), (-9, -260.0)])
+def test_engines_cover_ground_region(screen, ground, engine, pitch, road_x):
+    """どちらのエンジンも帯の上端〜画面下端を隙間なく埋める（帯の継ぎ目・折り返しに穴が無い）。"""
+    if engine == "mode7":
+        pytest.importorskip("numpy")
+    ground.engine = engine
+    render(screen, ground, pitch, road_x, 30000.0)
+    top = ground.start_y + pitch
+    assert screen.get_at((SCREEN_W // 2, top - 1))[:3] == (255, 0, 255)
+    for y in range(top, SCREEN_H):
+        for x in (0, SCREEN_W // 2, SCREEN_W - 1):
+            assert screen.get_at((x, y))[:3] != (255, 0, 255), (x, y)
+
+
+def test_mode7_scrolls_with_player_z(screen, ground):
+    pytest.importorskip("numpy")
+    ground.engine = "mode7"
+    assert render(screen, ground, 0, 0.0, 1000.0) != render(screen, ground, 0, 0.0, 1500.0)
+
+
+def test_adaptive_strip_layout(ground):
+    """帯の割り付け: 隙間なく並び、許容量を守り、固定2pxより大幅に本数が少ない。"""
+    offset = ground.start_y - HORIZON_Y
+    visible = SCREEN_H - ground.start_y
+    layout = [strip for strip in ground.strip_layout if strip[0] < visible]
+    expected_dy = 0
+    for dy, h, level, _src_h in layout:
+        assert dy == expected_dy
+        expected_dy += h
+        if h > 1:
+            shift_px, texel_err, _ = ground._strip_error(offset, dy, h)
+            assert shift_px <= GROUND_STRIP_TOLERANCE_PX
+            assert texel_err <= GROUND_STRIP_TOLERANCE_TEXELS
+            assert ground._mip_level(offset, dy + h - 1) == level
+    fixed_2px = (visible + 1) // 2
+    assert len(layout) <= 0.65 * fixed_2px
+    # 地平線寄りは細く、手前は太い
+    assert min(h for dy, h, *_ in layout if dy < 40) == 1
+    assert max(h for dy, h, *_ in layout if dy > 200) >= 4
+
+
+def draw_full_width_strip(self, screen, mip, dy, h, src_y, scale, center_x, pitch_offset_y,
+                          shift=0.0, src_h=None):
+    """画面に載る列だけを切り出す前の _draw_strip（全幅を拡縮して blit する）。"""
+    if h <= 0: return
+    if src_h is None: src_h = h
+    strip_surf = mip.subsurface(pygame.Rect(0, src_y, self.width, src_h))
+    new_width = int(self.width * scale)
+    if new_width < self.width and self.antialias:
+        scaled_strip = pygame.transform.smoothscale(strip_surf, (new_width, h))
+    else:
+        scaled_strip = pygame.transform.scale(strip_surf, (new_width, h))
+    screen.blit(scaled_strip, (center_x - new_width // 2 + int(shift),
+                               self.start_y + int(pitch_offset_y) + dy))
+
+
+@pytest.mark.parametrize("pitch, road_x, player_z",
+                         [(0, 0.0, 0.0), (3, 60.0, 5000.0), (-9, -260.0, 12345.6)])
+def test_magnified_strips_match_full_width(screen, ground, monkeypatch, pitch, road_x, player_z):
+    """拡大帯を画面に載る列だけ拡大しても、違うのは列の継ぎ目が1pxずれた画素だけ。"""
+    np = pytest.importorskip("numpy")
+    ground.engine = "strips"
+    render(screen, ground, pitch, road_x, player_z)
+    cropped = pygame.surfarray.array3d(screen)
+    monkeypatch.setattr(GroundLayer, "_draw_strip", draw_full_width_strip)
+    render(screen, ground, pitch, road_x, player_z)
+    full = pygame.surfarray.array3d(screen)
+
+    differs = (cropped != full).any(axis=2)
+    assert differs.mean() < 0.01
+    # 違う画素は、隣の列の参照画素と一致する（継ぎ目の位置のずれ）
+    unexplained = differs.copy()
+    unexplained[1:] &= (cropped[1:] != full[:-1]).any(axis=2)
+    unexplained[:-1] &= (cropped[:-1] != full[1:]).any(axis=2)
+    assert unexplained.sum() <= 0.001 * differs.size
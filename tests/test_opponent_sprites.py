@@ -0,0 +1,97 @@
+# 対戦車のスプライト（src/opponent_sprites.py）と Track.draw への差し込みのテスト。
+#
+# 縮小段が見かけの幅に十分近いものを選ぶこと、車が奥から順に描かれること、
+# 手前の丘の路面が奥の車を隠すこと（セグメント描画との差し込み）を確かめる。
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.opponent_sprites import OpponentSprites, OPPONENT_WORLD_WIDTH, OPPONENT_SPRITE_STEP
+from src.track import Track, STRIPE_LENGTH
+
+SCREEN_W, SCREEN_H = 800, 600
+CAR_COLOR = (255, 0, 255)  # 道路・空に現れない色
+
+
+@pytest.fixture(scope="module")
+def screen():
+    pygame.init()
+    return pygame.display.set_mode((SCREEN_W, SCREEN_H))
+
+
+@pytest.fixture()
+def sprites(screen):
+    img = pygame.Surface((320, 160), pygame.SRCALPHA)
+    img.fill(CAR_COLOR)
+    return OpponentSprites(img.convert_alpha())
+
+
+@pytest.fixture()
+def track(monkeypatch):
+    monkeypatch.setattr(pygame.image, "load", lambda _path: pygame.Surface((4, 4), pygame.SRCALPHA))
+    track = Track()
+    track.create_road(1)
+    return track
+
+
+def test_levels_track_projected_width(sprites):
+    widths = [img.get_width() for img in sprites.normal]
+    assert widths == sorted(widths) and widths[-1] == 320
+    assert [img.get_size() for img in sprites.brake] == [img.get_size() for img in sprites.normal]
+    for scale in np.linspace(0.02, 0.35, 50):
+        wanted = OPPONENT_WORLD_WIDTH * scale
+        got = sprites.normal[sprites.level_for(scale)].get_width()
+        assert abs(got / wanted - 1.0) < OPPONENT_SPRITE_STEP - 1.0 + 0.02
+
+
+def count_car_pixels(screen, track, sprites, zs):
+    screen.fill((0, 0, 0))
+    zs = np.array(zs, dtype=float)
+    sprites.prepare(np.zeros(len(zs)), zs, np.zeros(len(zs), dtype=bool), 0.0)
+    track.draw(screen, 0.0, 0.0, SCREEN_W, SCREEN_H, 1, None, 0.0, sprites=sprites)
+    assert sprites.next_segment == -1  # 全部描き終わっている
+    # smoothscale で色が数段ずれるので近い色を数える
+    pixels = pygame.surfarray.array3d(screen).astype(int)
+    return int((np.abs(pixels - CAR_COLOR).max(axis=2) < 8).sum())
+
+
+def test_cars_drawn_far_to_near(screen, track, sprites):
+    drawn = []
+    project = sprites.draw_until
+
+    def recording(screen, min_segment, project_on_road):
+        return project(screen, min_segment, lambda z, x: drawn.append(z) or project_on_road(z, x))
+
+    sprites.draw_until = recording
+    assert count_car_pixels(screen, track, sprites, [3000.0, 9000.0, 6000.0, 100.0]) > 0
+    # プレイヤーの後ろ（投影面より手前）の車は描かない
+    assert drawn == [9000.0, 6000.0, 3000.0]
+
+
+def test_hill_crest_hides_car_behind_it(screen, track, sprites):
+    assert count_car_pixels(screen, track, sprites, [15000.0]) > 0
+    # カメラ（高さ 1500）より高い台地を手前に置くと、その先の車は路面に隠れる
+    for seg in track.segments[8:30]:
+        seg['p1']['y'] = seg['p2']['y'] = 2500.0
+    track.segments[30]['p1']['y'] = 2500.0
+    assert int(15000.0 / STRIPE_LENGTH) > 30
+    assert count_car_pixels(screen, track, sprites, [15000.0]) == 0
+
+
+def test_ghost_is_inserted_in_depth_order(screen, track, sprites):
+    zs = np.array([3000.0, 9000.0])
+    sprites.prepare(np.zeros(2), zs, np.zeros(2, dtype=bool), 0.0)
+    sprites.add_ghost(0.0, 6000.0, 0.0)
+    sprites.add_ghost(0.0, 100.0, 0.0)  # 投影面より手前は描かない
+    drawn = []
+    sprites.draw_until(screen, 0, lambda z, x: drawn.append(z))
+    assert drawn == [9000.0, 6000.0, 3000.0]
@@ -0,0 +1,60 @@
+# AI の対戦車（src/opponents.py）のテスト。
+#
+# OpponentField は Car.update の配列版なので、1台ぶんを同じ操作で走らせたときに
+# スカラーの Car と x / z / speed が一致すること、多数台でも全ステージを走り切ることを確かめる。
+# （係数を表にまとめて先に掛けてあるぶん丸めの順序が違うので、値は相対 1e-9（0 付近は 1e-6）まで、フラグは完全一致）
+
+import math
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.controls import ControlInput
+from src.opponents import OpponentField
+from src.sim import RaceSim, run_stage
+
+
+@pytest.mark.parametrize("stage_id", [1, 4, 5, 6])
+def test_single_opponent_matches_scalar_car(stage_id):
+    sim = RaceSim.headless()
+    sim.start_stage(stage_id)
+    field = OpponentField(1, sim.car.rect.width)
+    field.start_stage(sim.track, stage_id, grid=False)
+    for t in range(4000):
+        # 左右に振りつつ、ときどきアクセルを離してブレーキも踏む
+        steer = max(-1.0, min(1.0, -sim.car.x / 400.0 + 0.9 * math.sin(t * 0.01)))
+        controls = ControlInput(steer, t % 600 < 560, t % 600 >= 580)
+        sim_time = sim.time
+        sim.step(controls)
+        field.step(np.array([controls.steer]), np.array([controls.throttle]),
+                   np.array([controls.brake]), sim.dt, sim_time)
+        car = sim.car
+        assert (field.x[0], field.z[0], field.speed[0]) == pytest.approx((car.x, car.z, car.speed), rel=1e-9, abs=1e-6), t
+        assert field.offroad[0] == car.offroad
+        assert field.wall_contact[0] == car.wall_contact
+
+
+def test_field_races_alongside_player():
+    sim = RaceSim.headless(opponents=50)
+    # 接触で横に押されるので、道路の中央へ戻しながら走る
+    assert run_stage(sim, 6, lambda s: ControlInput(max(-1.0, min(1.0, -s.car.x / 300.0)), True, False)) is not None
+    field = sim.opponents
+    assert field.z.shape == (50,)
+    assert field.z.min() > 100000.0
+    # skill が違うので全台が同じ位置には並ばない
+    assert np.unique(field.z).size > 1
+
+
+def test_tables_follow_track_rebuild():
+    sim = RaceSim.headless(opponents=4)
+    sim.start_stage(1)
+    curve_1 = sim.opponents.curve.copy()
+    # ホットリロード等で Track だけ作り直された場合も、次の刻みで表を引き直す
+    sim.track.create_road(3)
+    sim.step(ControlInput())
+    assert not np.array_equal(sim.opponents.curve, curve_1)
@@ -0,0 +1,120 @@
+# パーティクルのスプライト表（src/particle_sprites.py）のテスト。
+#
+# 引いた画像の大きさが段の刻み以内で正確なこと、lazy の表が上限を超えると最も長く
+# 使われていない画像から捨てること、Effects の描画が毎フレーム拡縮・回転しないこと、
+# 火花の色付け済みの画像が進み具合の色・左右反転のとおりで、描画のたびに作り直さないことを確かめる。
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import random
+
+import pygame
+import pytest
+
+from src.particle_sprites import ParticleAtlas, SparkSprites, spark_color, PARTICLE_SPRITE_STEP
+
+
+def test_quantised_sizes_and_shared_surfaces():
+    atlas = ParticleAtlas(pygame.Surface((128, 64)), max_scale=1.5)
+    assert len(atlas) == len(atlas.widths)
+    for scale in (0.05, 0.3, 0.77, 1.0, 1.49):
+        w, h = atlas.get(scale).get_size()
+        assert 1 / PARTICLE_SPRITE_STEP <= w / (128 * scale) <= PARTICLE_SPRITE_STEP
+        assert h == pytest.approx(w / 2, abs=1)
+    assert atlas.get(0.5) is atlas.get(0.5 * (1 + (PARTICLE_SPRITE_STEP - 1) * 0.1))
+    assert atlas.get(0.001) is None
+    # 最大の倍率より大きい粒は最大の段
+    assert atlas.get(3.0).get_width() == 192
+
+
+def test_lazy_rotations_evict_least_recently_used():
+    atlas = ParticleAtlas(pygame.Surface((32, 32)), max_scale=1.0, rotations=24, lazy=True, cache_size=4)
+    assert len(atlas) == 0
+    first = atlas.get(1.0, 0.0)
+    assert atlas.get(1.0, 90.0).get_size() == first.get_size()
+    assert atlas.get(1.0, 45.0).get_width() > first.get_width()  # 回転で外接矩形が広がる
+    assert atlas.get(1.0, 359.0) is first  # 0° と同じ段
+    atlas.get(1.0, 30.0)
+    atlas.get(1.0, 60.0)  # 5枚目: 最も前に使った 90° が捨てられる
+    assert len(atlas) == 4
+    assert atlas.get(1.0, 0.0) is first
+
+
+def test_render_does_not_rescale_per_frame(monkeypatch):
+    pytest.importorskip("numpy")
+    pygame.display.init()
+    pygame.display.set_mode((800, 600))
+    monkeypatch.setattr(pygame.image, "load",
+                        lambda *a, **k: pygame.Surface((64, 64), pygame.SRCALPHA))
+    from src.effects import Effects
+    fx = Effects(800, 600)
+    screen = pygame.Surface((800, 600))
+    random.seed(5)
+    for _ in range(200):
+        fx.add_dust(400, 500, 0.2)
+        fx.add_sand_dust(300, 500, 0.5)
+    fx.update_particles(1 / 60)
+    fx.render_behind_car(screen)  # 砂けむりの角度の段はここで初めて作られる
+
+    calls = []
+    real_scale = pygame.transform.scale
+    monkeypatch.setattr(pygame.transform, "scale", lambda *a: calls.append(a) or real_scale(*a))
+    monkeypatch.setattr(pygame.transform, "rotate", lambda *a: calls.append(a))
+    for _ in range(5):
+        fx.update_particles(1 / 60)
+        fx.render_behind_car(screen)
+    assert len(fx.particles) > 0
+    assert calls == []
+
+
+def test_spark_sprites_are_tinted_and_flipped():
+    assert spark_color(0.0) == (255, 255, 255)
+    assert spark_color(0.2) == (255, 255, 0)
+    assert spark_color(0.6) == (255, 100, 0)
+    assert spark_color(1.0) == (255, 0, 0)
+    img = pygame.Surface((100, 50))
+    img.fill((255, 255, 255))
+    img.fill((0, 0, 0), (0, 0, 50, 50))  # 左半分だけ黒
+    sprites = SparkSprites(img, max_scale=1.0)
+    # 色の段は SPARK_TINT_STEPS 等分（両端は spark_color の白と赤そのもの）
+    right = sprites.get(1.0, 1.0)
+    w, h = right.get_size()
+    assert right.get_at((w - 1, h // 2))[:3] == (255, 0, 0)
+    assert right.get_at((0, h // 2))[:3] == (0, 0, 0)
+    flipped = sprites.get(1.0, 1.0, flip_x=True)
+    assert flipped.get_at((0, h // 2))[:3] == (255, 0, 0)
+    assert sprites.get(0.99, 0.99) is right
+    assert sprites.get(1.0, 0.0).get_at((w - 1, h // 2))[:3] == (255, 255, 255)
+    # 縮みきった火花も最小の段で描く
+    assert sprites.get(0.0, 0.99).get_width() >= 1
+    # 色付けは元のテクスチャ（と色を付ける前の段の画像）を変えない
+    assert img.get_at((99, 25))[:3] == (255, 255, 255)
+    assert sprites.atlas.image(sprites.atlas.level_for(1.0)).get_at((w - 1, h // 2))[:3] == (255, 255, 255)
+
+
+def test_render_sparks_reuses_cached_sprites(monkeypatch):
+    pytest.importorskip("numpy")
+    pygame.display.init()
+    pygame.display.set_mode((800, 600))
+    monkeypatch.setattr(pygame.image, "load",
+                        lambda *a, **k: pygame.Surface((256, 256), pygame.SRCALPHA))
+    from src.effects import Effects
+    fx = Effects(800, 600)
+    screen = pygame.Surface((800, 600))
+    random.seed(6)
+    for n in range(50):
+        fx.add_spark(400, 500, flip_x=n % 2 == 0)
+    fx.render_sparks(screen)
+    cached = len(fx.spark_sprites)
+    assert 0 < cached <= 50
+
+    calls = []
+    for name in ("scale", "flip"):
+        monkeypatch.setattr(pygame.transform, name, lambda *a: calls.append(a))
+    fx.render_sparks(screen)  # 同じ状態をもう一度描いても新しい画像は作らない
+    assert calls == [] and len(fx.spark_sprites) == cached
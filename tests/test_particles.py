@@ -0,0 +1,82 @@
+# パーティクルのプール（src/particles.py）のテスト。
+#
+# 配列演算での更新と1粒ずつのループでの更新が同じ結果になること、リングが一周すると
+# 古い粒から上書きされ寿命が尽きた粒が消えること、数千粒でも Effects の更新が速いことを確かめる。
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import random
+
+import pytest
+
+from src import particles
+from src.particles import ParticlePool, PARTICLE_DUST, PARTICLE_SAND, PARTICLE_SPARK
+
+
+def fill(pool, count, kinds, seed=1):
+    rng = random.Random(seed)
+    for _ in range(count):
+        i = pool.spawn(rng.choice(kinds))
+        pool.x[i] = rng.uniform(0, 800)
+        pool.y[i] = rng.uniform(300, 600)
+        pool.vx[i] = rng.uniform(-5, 5)
+        pool.vy[i] = rng.uniform(-4, 0)
+        pool.life_max[i] = pool.life[i] = rng.uniform(0.05, 1.5)
+        pool.scale_base[i] = pool.scale[i] = rng.uniform(0.02, 1.0)
+
+
+def test_vectorised_update_matches_loop():
+    pytest.importorskip("numpy")
+    # 砂の横風は乱数なので、乱数を使わない dust と spark で比べる
+    a, b = ParticlePool(200), ParticlePool(200)
+    fill(a, 200, (PARTICLE_DUST, PARTICLE_SPARK))
+    fill(b, 200, (PARTICLE_DUST, PARTICLE_SPARK))
+    for _ in range(40):
+        a._update_arrays(1 / 60)
+        b._update_each(1 / 60)
+    assert a.active == b.active
+    assert 0 < len(a) < 200
+    for name in particles.FLOAT_FIELDS:
+        assert getattr(a, name) == pytest.approx(getattr(b, name))
+
+
+def test_ring_overwrites_oldest_and_expires():
+    pool = ParticlePool(8)
+    for n in range(12):
+        i = pool.spawn(PARTICLE_SAND)
+        pool.life[i] = pool.life_max[i] = 0.5 if n < 10 else 2.0
+    assert len(pool) == 8
+    # 最後の2粒（スロット 2, 3）だけが 0.5秒を越えて残る
+    for _ in range(60):
+        pool.update(1 / 60)
+    assert pool.live() == [2, 3]
+    pool.clear()
+    assert len(pool) == 0 and pool.live() == []
+
+
+def test_effects_update_scales_to_thousands(monkeypatch):
+    pytest.importorskip("numpy")
+    import pygame
+    monkeypatch.setattr(pygame.image, "load", lambda *a, **k: pygame.Surface((64, 64)))
+    from src import effects as effects_module
+    monkeypatch.setattr(effects_module, "EFFECTS_MAX_PARTICLES", 5000)
+    monkeypatch.setattr(effects_module, "EFFECTS_MAX_SPARKS", 5000)
+    fx = effects_module.Effects(800, 600)
+    random.seed(3)
+    for n in range(5000):
+        fx.add_dust(400, 500, 0.3)
+        fx.add_spark(400, 500, flip_x=n % 2 == 0)
+    for _ in range(3):
+        fx.add_sand_dust(400, 500, 0.5)
+    start = time.perf_counter()
+    for _ in range(10):
+        fx.update_particles(1 / 60)
+    per_frame = (time.perf_counter() - start) / 10
+    assert len(fx.particles) > 4000
+    assert per_frame < 0.005
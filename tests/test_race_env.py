@@ -0,0 +1,66 @@
+# gym 風のレース環境（src/race_env.py）のテスト。
+#
+# 観測・報酬の形、オフロードの減点、ゴール・打ち切りの扱い、ワーカープロセスで進めても
+# 同じプロセスの中で進めたのと同じ結果になることを確かめる。
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from src.race_env import (RaceEnv, OBSERVATION_FIELDS, SURFACE_ROAD, SURFACE_OFFROAD,
+                          ENV_FRAME_SKIP)
+
+
+def test_step_reports_progress_and_offroad():
+    env = RaceEnv(stages=[1])
+    obs, info = env.reset()
+    assert info['stage_id'] == 1 and len(obs) == len(OBSERVATION_FIELDS)
+    assert obs[0] == 0.0 and obs[-1] == SURFACE_ROAD
+    for _ in range(100):
+        obs, reward, terminated, truncated, _ = env.step((0.0, 1.0, 0.0))
+    assert reward > 0.0 and not terminated and not truncated
+    assert env.sim.ticks == 100 * ENV_FRAME_SKIP
+    # 右へ切り続けて道路を外れると減点が進みの報酬を上回る
+    for _ in range(200):
+        obs, reward, *_ = env.step((1.0, 1.0, 0.0))
+    assert obs[-1] == SURFACE_OFFROAD and reward < 0.0
+
+
+def test_episode_ends_by_goal_or_time_limit():
+    env = RaceEnv(stages=[1], max_time=1.0)
+    env.reset()
+    steps = 0
+    while True:
+        steps += 1
+        _, _, terminated, truncated, info = env.step((0.0, 1.0, 0.0))
+        if terminated or truncated:
+            break
+    assert truncated and not terminated and info['time'] == pytest.approx(1.0)
+    assert steps == -(-120 // ENV_FRAME_SKIP)
+
+
+def run_vec(np, workers):
+    from src.race_env import VecRaceEnv
+    with VecRaceEnv(6, workers=workers, stages=[1, 2], max_time=2.0, seed=3) as env:
+        obs = env.reset()
+        actions = np.zeros((6, 3), np.float32)
+        actions[:, 1] = 1.0
+        history = [obs]
+        ended = 0
+        for _ in range(80):
+            actions[:, 0] = np.clip(-obs[:, 1] * 3.0, -1.0, 1.0)
+            obs, rewards, terminated, truncated = env.step(actions)
+            ended += int(truncated.sum())
+            history.append(np.concatenate((obs.ravel(), rewards)))
+        return history, ended
+
+
+def test_worker_processes_match_in_process_run():
+    np = pytest.importorskip("numpy")
+    local, ended = run_vec(np, 0)
+    assert ended == 6  # 2秒で打ち切られ、その場で次のエピソードが始まる
+    pooled, _ = run_vec(np, 2)
+    assert all(np.array_equal(a, b) for a, b in zip(local, pooled))
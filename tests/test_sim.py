@@ -0,0 +1,43 @@
+# ディスプレイ無しのシミュレーション（src/sim.py）のテスト。
+#
+# pygame.init もディスプレイも作らずに全ステージを走らせ、ゴールできること・
+# 同じ操作なら結果が完全に一致すること・刻みを変えても走りがほぼ同じことを確かめる。
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pygame
+
+from src.controls import ControlInput, read_controls
+from src.sim import RaceSim, run_stage, run_stages
+
+
+def keep_center(sim):
+    """道路の中央へ戻すように切りながら踏み続ける。"""
+    return ControlInput(max(-1.0, min(1.0, -sim.car.x / 300.0)), True, False)
+
+
+def test_all_stages_finish_headless_and_deterministic():
+    first = run_stages(keep_center)
+    assert set(first) == {1, 2, 3, 4, 5, 6}
+    assert all(t is not None and 30.0 < t < 200.0 for t in first.values())
+    assert run_stages(keep_center) == first
+
+
+def test_step_rate_does_not_change_the_race():
+    # 物理定数は 60fps の1フレームあたりで、刻みに合わせて換算される
+    t60 = run_stage(RaceSim.headless(hz=60), 1, keep_center)
+    t120 = run_stage(RaceSim.headless(hz=120), 1, keep_center)
+    assert abs(t60 - t120) < 0.02 * t60
+
+
+def test_read_controls_maps_keyboard():
+    class Keys(dict):
+        def __getitem__(self, key):
+            return self.get(key, False)
+
+    assert read_controls(Keys({pygame.K_LEFT: True, pygame.K_UP: True})) == ControlInput(-1.0, True, False)
+    assert read_controls(Keys({pygame.K_LEFT: True, pygame.K_RIGHT: True, pygame.K_b: True})) == \
+        ControlInput(0.0, False, True)
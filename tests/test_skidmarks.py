@@ -0,0 +1,78 @@
+# タイヤ痕（src/skidmarks.py）のテスト。
+#
+# 砂の路面でブレーキを踏むと跡が付き、ほかのステージでは付かないこと、リングの本数を
+# 超えると古い跡から消えること、描いた跡が画面上の車のタイヤの真下から手前へ伸びることを確かめる。
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.controls import ControlInput
+from src.sim import RaceSim
+from src.skidmarks import SkidMarks, SKIDMARK_SPACING, tyre_contact
+
+SCREEN_W, SCREEN_H = 800, 600
+MARK_COLOR = (255, 0, 255)
+
+
+def drive(stage_id, ticks, marks, brake_every=240):
+    sim = RaceSim.headless()
+    sim.start_stage(stage_id)
+    marks.clear(stage_id)
+    for t in range(ticks):
+        braking = t > 300 and t % brake_every < 60
+        sim.step(ControlInput(max(-1.0, min(1.0, -sim.car.x / 300.0)), not braking, braking))
+        marks.update(sim.car, sim.track, stage_id)
+    return sim
+
+
+def test_marks_only_when_braking_on_sand():
+    sim = RaceSim.headless()
+    marks = SkidMarks(sim.car.rect)
+    drive(1, 1200, marks)
+    assert len(marks) == 0
+    drive(4, 1200, marks)
+    assert len(marks) > 0 and len(marks) % 2 == 0  # 左右1組ずつ
+    assert np.all(marks.z1[:len(marks)] - marks.z0[:len(marks)] >= SKIDMARK_SPACING)
+
+
+def test_ring_evicts_oldest_marks():
+    sim = RaceSim.headless()
+    marks = SkidMarks(sim.car.rect, capacity=64)
+    sim = drive(4, 6000, marks, brake_every=120)
+    assert len(marks) == 64
+    # 残っているのは最も新しい跡（最後に置いた帯の終点が最も前）
+    assert marks.z1.max() <= sim.car.z + marks.depth
+    assert marks.z1.min() > sim.car.z + marks.depth - 64 * 30 * SKIDMARK_SPACING
+
+
+def test_marks_trail_from_under_the_tyres(monkeypatch):
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
+    monkeypatch.setattr(pygame.image, "load", lambda _path: pygame.Surface((4, 4), pygame.SRCALPHA))
+    sim = RaceSim.headless()
+    marks = SkidMarks(sim.car.rect)
+    sim = drive(4, 520, marks)  # 480 刻みから踏み始めて、まだ踏んでいる
+    assert len(marks) > 0
+    marks.color = MARK_COLOR
+    screen.fill((0, 0, 0))
+    sim.track.draw(screen, sim.car.z, sim.car.x, SCREEN_W, SCREEN_H, 4, None, skidmarks=marks)
+    assert marks.next_segment == -1
+    pixels = pygame.surfarray.array3d(screen)
+    hit = (pixels == MARK_COLOR).all(axis=2)
+    ys = hit.any(axis=0).nonzero()[0]
+    xs = hit.any(axis=1).nonzero()[0]
+    # 跡はタイヤの接地点（画面の下の方）から画面の下端へ向かって伸び、左右に分かれる
+    rect = sim.car.rect
+    depth, _, _ = tyre_contact(rect)
+    assert ys.min() >= rect.centery and ys.max() == SCREEN_H - 1
+    assert hit[:SCREEN_W // 2].any() and hit[SCREEN_W // 2:].any()
+    assert abs((xs.min() + xs.max()) / 2 - SCREEN_W / 2) < 40
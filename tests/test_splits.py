@@ -0,0 +1,85 @@
+# 自己ベストとの差（src/splits.py）のテスト。
+#
+# ステージを最後まで走って通過時刻の表を保存し、読み戻した表を z で引くと走ったときの時刻が
+# 返ること（同じ走りなら差はほぼ 0、遅い走りなら正）、表が数KBに収まること、遅い走りでは
+# 上書きされないこと、巻き戻しで通過していない点が落ちることを確かめる。
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from src.controls import ControlInput
+from src.splits import BestSplits, SplitRecorder, SPLIT_INTERVAL, splits_path
+from src.sim import RaceSim
+
+
+def keep_center(sim, throttle=True):
+    return ControlInput(max(-1.0, min(1.0, -sim.car.x / 300.0)), throttle, False)
+
+
+def run(policy=keep_center, stage_id=1):
+    sim = RaceSim.headless()
+    sim.start_stage(stage_id)
+    recorder = SplitRecorder()
+    recorder.start_stage(stage_id)
+    passes = []
+    while not sim.finished:
+        sim.step(policy(sim))
+        recorder.record(sim)
+        passes.append((sim.car.z, sim.time))
+    return sim, recorder, passes
+
+
+def test_best_run_round_trips_and_gives_zero_delta(tmp_path):
+    sim, recorder, passes = run()
+    best = recorder.save_if_best(sim.time, tmp_path)
+    assert best is not None
+    assert os.path.getsize(splits_path(1, tmp_path)) < 4096
+    loaded = BestSplits.load(1, tmp_path)
+    assert loaded.time == sim.time and list(loaded.times) == list(best.times)
+    times = list(loaded.times)
+    assert times == sorted(times) and len(times) == int(passes[-1][0] // SPLIT_INTERVAL) + 1
+    # 点の間は直線で補間するので、加速の急な発進直後を除けば HUD の表示（1/100秒）の誤差に収まる
+    for z, t in passes[::10]:
+        delta = loaded.delta(z, t)
+        if delta is not None and z > 3 * SPLIT_INTERVAL:
+            assert abs(delta) < 0.01
+    assert loaded.time_at(passes[-1][0] + SPLIT_INTERVAL) is None
+
+
+def test_slower_run_shows_positive_delta_and_is_not_saved(tmp_path):
+    sim, recorder, _ = run()
+    recorder.save_if_best(sim.time, tmp_path)
+    best = BestSplits.load(1, tmp_path)
+    # 5秒ごとに1秒アクセルを離す
+    slow, slow_recorder, passes = run(lambda s: keep_center(s, (s.ticks // 120) % 5 != 4))
+    z, t = passes[len(passes) // 2]
+    assert best.delta(z, t) > 1.0
+    assert slow_recorder.save_if_best(slow.time, tmp_path) is None
+    assert BestSplits.load(1, tmp_path).time == sim.time
+
+
+def test_truncate_drops_points_not_yet_passed():
+    sim = RaceSim.headless()
+    sim.start_stage(1)
+    recorder = SplitRecorder()
+    recorder.start_stage(1)
+    for _ in range(900):
+        sim.step(keep_center(sim))
+        recorder.record(sim)
+    full = len(recorder.times)
+    sim.car.z -= 5 * SPLIT_INTERVAL  # 巻き戻した体
+    recorder.truncate(sim)
+    assert len(recorder.times) == full - 5
+
+
+def test_missing_or_foreign_file_loads_as_none(tmp_path, log_to_tmp):
+    assert BestSplits.load(2, tmp_path) is None
+    Path(splits_path(3, tmp_path)).write_bytes(b'junk')
+    assert BestSplits.load(3, tmp_path) is None
+    # 警告はテスト用の一時ディレクトリのログに出る（リポジトリの logs/ には書かない）
+    assert "ignoring splits" in (log_to_tmp / "warn.log").read_text(encoding="utf-8")
@@ -0,0 +1,95 @@
+# ステージ定義のホットリロード（src/stage_data.py）のテスト。
+#
+# 確認すること:
+#   - 差分は「変わったキー」だけを返し、共有 dict をその場で書き換える
+#   - 色だけの変更ではセグメントの色が変わり、カーブ配置（乱数で作るコース形状）は変わらない
+#   - 壊れた保存内容では直前の定義のまま続行する
+
+import copy
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from src.stage_data import (StageConfigWatcher, apply_stage_config,
+                            diff_stage_config, load_stage_config)
+from src.track import Track, STAGE_CONFIG
+
+
+@pytest.fixture(scope="module")
+def screen():
+    pygame.init()
+    return pygame.display.set_mode((800, 600))
+
+
+@pytest.fixture()
+def make_track(screen, monkeypatch):
+    # Track.__init__ の asset/forest.png ロードをスタブする（test_track_continuity.py と同じ理由）
+    def _make(stage):
+        monkeypatch.setattr(
+            pygame.image, "load",
+            lambda _path: pygame.Surface((4, 4), pygame.SRCALPHA))
+        track = Track()
+        track.create_road(stage)
+        return track
+    return _make
+
+
+@pytest.fixture()
+def restore_config():
+    saved = copy.deepcopy(STAGE_CONFIG)
+    yield
+    apply_stage_config(STAGE_CONFIG, saved)
+
+
+def test_diff_reports_only_changed_keys():
+    old = {1: {'a': 1, 'b': (1, 2)}, 2: {'a': 1}}
+    new = {1: {'a': 1, 'b': (1, 3), 'c': None}, 3: {'a': 1}}
+    assert diff_stage_config(old, new) == {1: {'b', 'c'}, 2: {'a'}, 3: {'a'}}
+
+
+def test_apply_mutates_shared_dict_in_place():
+    config = {1: {'a': 1, 'b': 2}}
+    alias = config  # from .track import STAGE_CONFIG で共有されている状況
+    stage1 = config[1]
+    apply_stage_config(config, {1: {'a': 5}, 2: {'a': 1}})
+    assert alias is config and config[1] is stage1
+    assert config == {1: {'a': 5}, 2: {'a': 1}}
+
+
+def test_color_change_keeps_layout(make_track, restore_config):
+    track = make_track(1)
+    curves = [seg['curve'] for seg in track.segments]
+    new = copy.deepcopy(STAGE_CONFIG)
+    new[1]['road_light'] = (1, 2, 3)
+    changes = apply_stage_config(STAGE_CONFIG, new)
+
+    rebuilt = track.apply_config_change(1, changes[1])
+    assert rebuilt == ['segment_colors']
+    assert [seg['curve'] for seg in track.segments] == curves
+    assert (1, 2, 3) in {seg['color'] for seg in track.segments}
+
+
+def test_other_stage_change_is_ignored(make_track):
+    track = make_track(1)
+    assert track.apply_config_change(2, {'road_light'}) == []
+
+
+def test_watcher_keeps_config_on_broken_file(tmp_path, log_to_tmp):
+    path = tmp_path / "stages.cfg"
+    path.write_text(Path(load_stage_config.__defaults__[0]).read_text(encoding="utf-8"),
+                    encoding="utf-8")
+    config = load_stage_config(str(path))
+    watcher = StageConfigWatcher(config, str(path))
+    before = copy.deepcopy(config)
+
+    path.write_text("{1: {'sky_color': (0, 0,", encoding="utf-8")  # 保存途中
+    os.utime(path, ns=(1, 1))
+    assert watcher.reload_if_changed() == {}
+    assert config == before
+    assert "stage config reload skipped" in (log_to_tmp / "warn.log").read_text(encoding="utf-8")
@@ -0,0 +1,69 @@
+# 派生テクスチャのディスクキャッシュ（src/texture_cache.py）のテスト。
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from src import texture_cache
+from src.texture_cache import load_or_build, is_cached
+
+
+@pytest.fixture(scope="module")
+def screen():
+    pygame.init()
+    return pygame.display.set_mode((64, 64))
+
+
+@pytest.fixture()
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(texture_cache, "TEXTURE_CACHE_ENABLED", True)
+    monkeypatch.setattr(texture_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    source = tmp_path / "src.png"
+    source.write_bytes(b"first")
+    return str(source)
+
+
+def make_build(calls, color):
+    def build():
+        calls.append(color)
+        a = pygame.Surface((6, 4)).convert()
+        a.fill(color)
+        b = pygame.transform.smoothscale(a, (6, 2))
+        return [a, b]
+    return build
+
+
+def test_second_load_reads_cache_with_same_pixels(screen, cache):
+    calls = []
+    first = load_or_build("ground", [cache], (800, 1), make_build(calls, (10, 200, 30)))
+    assert is_cached(cache)
+    second = load_or_build("ground", [cache], (800, 1), make_build(calls, (10, 200, 30)))
+    assert calls == [(10, 200, 30)]
+    for a, b in zip(first, second):
+        assert a.get_size() == b.get_size()
+        assert pygame.image.tobytes(a, "RGB") == pygame.image.tobytes(b, "RGB")
+
+
+def test_source_or_params_change_rebuilds_and_replaces(screen, cache):
+    calls = []
+    load_or_build("ground", [cache], (800, 1), make_build(calls, (1, 2, 3)))
+    load_or_build("ground", [cache], (1024, 1), make_build(calls, (4, 5, 6)))
+    Path(cache).write_bytes(b"second asset")
+    assert not is_cached(cache)
+    out = load_or_build("ground", [cache], (1024, 1), make_build(calls, (7, 8, 9)))
+    assert calls == [(1, 2, 3), (4, 5, 6), (7, 8, 9)]
+    assert out[0].get_at((0, 0))[:3] == (7, 8, 9)
+    # 同じ処理・同じ元アセットのエントリは常に1つだけ残る
+    assert len(os.listdir(texture_cache.CACHE_DIR)) == 1
+
+
+def test_missing_source_bypasses_cache(screen, cache, tmp_path):
+    calls = []
+    load_or_build("car", [str(tmp_path / "none.png")], (320,), make_build(calls, (0, 0, 0)))
+    assert calls and not os.path.exists(texture_cache.CACHE_DIR)